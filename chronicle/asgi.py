@@ -2,6 +2,8 @@
 ASGI config for chronicle project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The live event stream (core.views.event_stream) keeps connections open and should
+be served through this entry point, e.g. ``uvicorn chronicle.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -1,8 +1,12 @@
+import json
+import logging
 import os
+import time
+from datetime import datetime
 
 from celery import Celery
 from celery.schedules import crontab
-from django.utils import timezone
+from celery.signals import beat_init, before_task_publish, task_postrun, task_prerun
 
 # Django ayarlarını Celery'ye bildir
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chronicle.settings")
@@ -18,6 +22,23 @@ app.conf.beat_schedule = {
         "task": "health_data.tasks.check_appointments",
         "schedule": crontab(minute="*/15"),  # Her 15 dakikada bir kontrol et
     },
+    "dispatch-due-reminders": {
+        "task": "health_data.tasks.dispatch_due_reminders",
+        "schedule": crontab(minute="*"),  # Her dakika hatırlatma kuyruğunu tara
+    },
+    "process-email-outbox": {
+        "task": "health_data.tasks.process_email_outbox",
+        "schedule": crontab(minute="*"),  # Her dakika email kuyruğunu boşalt
+    },
+    "bootstrap-reminder-schedule": {
+        "task": "health_data.tasks.bootstrap_reminder_schedule",
+        "schedule": crontab(minute=30, hour=3),  # Her gece kuyrukta eksik kalan ilaçları tamamla
+    },
+    "reconcile-unread-message-counts": {
+        "task": "health_data.tasks.reconcile_unread_message_counts",
+        "schedule": crontab(minute=0),  # Her saat başı okunmamış mesaj sayaçlarını düzelt
+    },
+    # Hatırlatma kuyruğu yerine saat indeksiyle tarama (dispatch-due-reminders ile birlikte açılmamalı)
     # "check-medication-reminders": {
     #     "task": "health_data.tasks.check_medication_reminders",
     #     # Her 5 dakikada bir çalıştır
@@ -26,41 +47,98 @@ app.conf.beat_schedule = {
 }
 
 
-# Dinamik zamanlama için özel scheduler
-class DynamicScheduler:
-    def __init__(self, app):
-        self.app = app
-        self._schedule = {}
-        self._initialized = False
-
-    def setup_schedule(self):
-        """Başlangıçta tüm aktif ilaçlar için zamanlayıcıları oluştur"""
-        # Django modellerini burada import et
-        from health_data.models import Medication
-        from health_data.tasks import schedule_next_reminder
-
-        # Tüm aktif ilaçlar için zamanlayıcıları oluştur
-        medications = Medication.objects.filter(is_active=True, start_date__lte=timezone.now().date()).exclude(
-            end_date__lt=timezone.now().date()
-        )
-
-        for medication in medications:
-            schedule_next_reminder(medication)
-
-    def get_schedule(self):
-        """Mevcut zamanlayıcıları döndür"""
-        if not self._initialized:
-            self.setup_schedule()
-            self._initialized = True
-        return self._schedule
-
-
-# Dinamik zamanlayıcıyı Celery'ye ekle
-app.conf.beat_scheduler = DynamicScheduler(app)
-
 # Uygulamalardan görevleri otomatik yükle
 app.autodiscover_tasks()
 
+telemetry_logger = logging.getLogger("core.metrics")
+
+
+@beat_init.connect
+def enqueue_reminder_bootstrap(sender=None, **kwargs):
+    """Beat başlarken hatırlatma kuyruğunun tamamlanmasını bir işçiye bırak (beat'i bekletmez)"""
+    app.send_task("health_data.tasks.bootstrap_reminder_schedule")
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers=None, **kwargs):
+    """Kuyruk gecikmesini ölçmek için mesaja kuyruğa eklenme zamanını yaz"""
+    # Başlıksız yayınlanan mesajlarda gecikme ölçülmez
+    if headers is not None:
+        headers.setdefault("enqueued_at", time.time())
+
+
+@task_prerun.connect
+def start_task_telemetry(task=None, **kwargs):
+    from core.metrics import start_task_stats
+
+    # Gecikme, kuyruğa eklenme (veya ileri tarihli görevlerde ETA) zamanından başlangıca kadar geçen süredir
+    enqueued_at = task.request.get("enqueued_at")
+    if task.request.eta:
+        eta = datetime.fromisoformat(task.request.eta).timestamp()
+        enqueued_at = max(enqueued_at or eta, eta)
+    lag = max(time.time() - enqueued_at, 0) if enqueued_at else None
+
+    task.request.telemetry = start_task_stats(lag)
+
+
+@task_postrun.connect
+def record_task_telemetry(task=None, retval=None, state=None, **kwargs):
+    """Görev süresi, gecikmesi, işlenen kayıt ve email sayılarını metriklere ve loga yaz"""
+    from django.conf import settings
+
+    from core.metrics import record_metrics, stop_task_stats
+
+    telemetry = task.request.get("telemetry")
+    if telemetry is None:
+        return
+    stats, token = telemetry
+    stop_task_stats(token)
+    duration = time.perf_counter() - stats.started
+
+    # Görevler işledikleri kayıt sayısını, email kuyruğu görevi ise gönderim özetini döndürür
+    items = emails_sent = 0
+    if isinstance(retval, int) and not isinstance(retval, bool):
+        items = retval
+    elif isinstance(retval, dict) and "claimed" in retval:
+        items, emails_sent = retval["claimed"], retval.get("sent", 0)
+
+    # Sayaçlar ve göstergeler paylaşılan metrik deposuna tek seferde yazılır
+    gauges = {}
+    if stats.lag is not None:
+        gauges["task_last_queue_lag_seconds"] = round(stats.lag * 1_000_000)
+    if state == "SUCCESS":
+        gauges["task_last_success_timestamp_seconds"] = int(time.time())
+    record_metrics(
+        task.name,
+        {
+            "task_runs_total": 1,
+            "task_failures_total": int(state == "FAILURE"),
+            "task_queue_lag_seconds_total": round((stats.lag or 0) * 1_000_000),
+            "task_run_duration_seconds_total": round(duration * 1_000_000),
+            "task_items_processed_total": items,
+            "task_emails_queued_total": stats.emails_queued,
+            "task_emails_sent_total": emails_sent,
+        },
+        gauges,
+    )
+
+    behind = stats.lag is not None and stats.lag > settings.TASK_LAG_WARNING_SECONDS
+    telemetry_logger.log(
+        logging.WARNING if behind or state == "FAILURE" else logging.INFO,
+        json.dumps(
+            {
+                "event": "task",
+                "task": task.name,
+                "state": state,
+                "lag_ms": round(stats.lag * 1000, 2) if stats.lag is not None else None,
+                "duration_ms": round(duration * 1000, 2),
+                "items": items,
+                "emails_queued": stats.emails_queued,
+                "emails_sent": emails_sent,
+            }
+        ),
+    )
+
 
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
@@ -62,6 +62,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.RequestMetricsMiddleware",  # Görünüm bazında sorgu/süre metrikleri
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -76,7 +77,7 @@ ROOT_URLCONF = "chronicle.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "core.template_backends.InstrumentedDjangoTemplates",  # Şablon süreleri ölçülür
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -104,6 +105,36 @@ DATABASES = {
     }
 }
 
+# Redis (Celery kuyruğu, paylaşılan önbellek ve metrikler)
+REDIS_URL = "redis://localhost:6379"
+
+# Cache
+# Dashboard özetleri ve okunmamış mesaj sayaçları web ve celery süreçleri tarafından birlikte
+# güncellenir; bu yüzden önbellek tüm süreçlerin paylaştığı Redis'te tutulur.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"{REDIS_URL}/1",
+    }
+}
+
+# İstek metrikleri
+# Bu sayıdan fazla SQL sorgusu çalıştıran istekler uyarı olarak loglanır (N+1 tespiti için)
+REQUEST_QUERY_BUDGET = 20
+# /metrics/ adresine erişim için "Authorization: Bearer <token>" başlığı; boşsa yalnızca yöneticiler erişebilir
+METRICS_TOKEN = None
+# Kuyrukta bu süreden (saniye) uzun bekleyen görevler uyarı olarak loglanır
+TASK_LAG_WARNING_SECONDS = 60
+# Web ve celery süreçlerinin metrikleri burada toplanır. Anahtarların süresi yoktur, önbellekten ayrı bir
+# veritabanında tutulur. Boş bırakılırsa metrikler yalnızca süreç belleğinde tutulur (testler).
+METRICS_REDIS_URL = f"{REDIS_URL}/3"
+
+# Canlı olay akışı (Server-Sent Events)
+# Boş bırakılırsa olaylar yalnızca aynı süreçteki bağlantılara iletilir. Celery görevlerinde
+# oluşan olayların da iletilmesi için Redis pub/sub kullanılmalıdır.
+EVENTS_BROKER_URL = None
+# EVENTS_BROKER_URL = f"{REDIS_URL}/2"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -187,7 +218,7 @@ ACCOUNT_RATE_LIMITS = {
 }
 
 # Celery settings
-CELERY_BROKER_URL = "redis://localhost:6379/0"
+CELERY_BROKER_URL = f"{REDIS_URL}/0"
 CELERY_RESULT_BACKEND = "django-db"
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
@@ -237,6 +268,11 @@ LOGGING = {
             "level": "INFO",
             "propagate": True,
         },
+        "core.metrics": {  # İstek metrikleri (JSON satırları)
+            "handlers": ["console", "file"],
+            "level": "INFO",
+            "propagate": False,
+        },
         "django.request": {  # Django request hataları için
             "handlers": ["console", "file"],
             "level": "ERROR",
@@ -0,0 +1,13 @@
+"""Test ayarları; Redis sunucusu ve Celery işçisi gerektirmez.
+
+`manage.py test` bu modülü varsayılan olarak kullanır; diğer test çalıştırıcıları için
+DJANGO_SETTINGS_MODULE=chronicle.test_settings ayarlanmalıdır.
+"""
+
+from .settings import *  # noqa: F403
+
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+# Metrikler yalnızca süreç belleğinde tutulur
+METRICS_REDIS_URL = None
+# Görevler kuyruğa atılmadan aynı süreçte çalıştırılır
+CELERY_TASK_ALWAYS_EAGER = True
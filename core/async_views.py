@@ -0,0 +1,25 @@
+from asgiref.sync import sync_to_async
+from django.shortcuts import render
+
+
+async def arender(request, template_name, context=None):
+    """Şablonu senkron bir thread'de işler (context processor'lar senkron ORM kullanır)"""
+    # Şablonlar ve context processor'lar request.user'ı kullanır; kullanıcı asenkron olarak
+    # zaten yüklendiği için tekrar sorgulanmaması adına aynı nesne atanır
+    request.user = await request.auser()
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def aiterate(iterator):
+    """Senkron üreteci asenkron akışa çevirir; her parça ayrı bir thread çağrısında üretilir.
+
+    ASGI altında StreamingHttpResponse senkron üreteçleri önce tamamen belleğe toplar.
+    """
+    done = object()
+    next_part = sync_to_async(next)
+    try:
+        while (part := await next_part(iterator, done)) is not done:
+            yield part
+    finally:
+        # Bağlantı koptuğunda açık veritabanı imleci üretecin kendi thread'inde kapatılır
+        await sync_to_async(iterator.close)()
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+from functools import cache
+
+import redis
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def user_channel(user_id):
+    return f"events:user:{user_id}"
+
+
+def format_event(event, data):
+    """Olayı Server-Sent Events biçiminde tek bir mesaja çevir"""
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+class LocalBroker:
+    """Olayları yalnızca aynı süreçteki abonelere dağıtan broker (geliştirme ve testler için)"""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                # Yayın senkron koddan (başka bir thread'den) yapılabilir
+                loop.call_soon_threadsafe(queue.put_nowait, payload)
+            except RuntimeError:
+                # Abonenin olay döngüsü kapanmış
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        queue = asyncio.Queue()
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+
+        async def receive(timeout):
+            try:
+                return await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                return None
+
+        try:
+            yield receive
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(channel)
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+
+class RedisBroker:
+    """Olayları Redis pub/sub üzerinden tüm süreçlere (web + celery) dağıtan broker"""
+
+    def __init__(self, url):
+        self.url = url
+        self._client = None
+
+    def publish(self, channel, payload):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        self._client.publish(channel, payload)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+
+        async def receive(timeout):
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+            return message["data"].decode() if message else None
+
+        try:
+            yield receive
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+            await client.aclose()
+
+
+@cache
+def get_broker():
+    if settings.EVENTS_BROKER_URL:
+        return RedisBroker(settings.EVENTS_BROKER_URL)
+    return LocalBroker()
+
+
+def publish_event(user_id, event, data):
+    """Kullanıcının açık olay akışlarına bir olay gönder (işlem tamamlandıktan sonra)"""
+    payload = format_event(event, data)
+
+    def send():
+        try:
+            get_broker().publish(user_channel(user_id), payload)
+        except (redis.RedisError, OSError):
+            # Canlı bildirim gönderilemese de sayfa yenilendiğinde veri görünür
+            logger.exception(f"Olay yayınlanamadı: Kullanıcı ID {user_id}")
+
+    transaction.on_commit(send)
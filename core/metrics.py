@@ -0,0 +1,213 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from functools import cache
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY_PREFIX = "metrics"
+METRIC_PREFIX = "chronicle"
+
+# İstek süresince sorgu ve şablon sürelerinin toplandığı nesne (async görünümlerde de taşınır)
+_request_stats = ContextVar("request_stats", default=None)
+# Çalışan celery görevinin sayaçları
+_task_stats = ContextVar("task_stats", default=None)
+
+
+class RequestStats:
+    """Tek bir isteğin sorgu sayısı, SQL süresi ve şablon işleme süresi"""
+
+    __slots__ = ("queries", "sql_time", "template_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+
+
+def start_request_stats():
+    stats = RequestStats()
+    return stats, _request_stats.set(stats)
+
+
+def stop_request_stats(token):
+    _request_stats.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Veritabanı bağlantılarına eklenen sarmalayıcı; aktif istek varsa sorguyu ölçer"""
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_time += time.perf_counter() - started
+
+
+def add_template_time(seconds):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.template_time += seconds
+
+
+# (ad, tür, açıklama, ölçek) - süreler depoda mikrosaniye olarak tutulur
+REQUEST_METRICS = [
+    ("http_requests_total", "counter", "Handled requests per view", 1),
+    ("http_request_duration_seconds_total", "counter", "Time spent handling requests per view", 1e-6),
+    ("db_queries_total", "counter", "SQL queries executed per view", 1),
+    ("db_query_duration_seconds_total", "counter", "Time spent in SQL queries per view", 1e-6),
+    ("template_render_duration_seconds_total", "counter", "Time spent rendering templates per view", 1e-6),
+    ("http_response_size_bytes_total", "counter", "Response body bytes per view (non-streaming)", 1),
+    ("query_budget_exceeded_total", "counter", "Requests that exceeded REQUEST_QUERY_BUDGET per view", 1),
+]
+
+
+TASK_METRICS = [
+    ("task_runs_total", "counter", "Finished task runs", 1),
+    ("task_failures_total", "counter", "Task runs that raised an exception", 1),
+    ("task_queue_lag_seconds_total", "counter", "Time between enqueue (or ETA) and task start", 1e-6),
+    ("task_run_duration_seconds_total", "counter", "Time spent running tasks", 1e-6),
+    ("task_items_processed_total", "counter", "Items (reminders, appointments, emails) processed by tasks", 1),
+    ("task_emails_queued_total", "counter", "Emails added to the outbox by tasks", 1),
+    ("task_emails_sent_total", "counter", "Emails delivered by outbox tasks", 1),
+    ("task_last_queue_lag_seconds", "gauge", "Queue lag of the most recent run", 1e-6),
+    ("task_last_success_timestamp_seconds", "gauge", "Unix time of the most recent successful run", 1),
+]
+
+
+class TaskStats:
+    """Tek bir görev çalışmasının sayaçları"""
+
+    __slots__ = ("started", "lag", "emails_queued")
+
+    def __init__(self, lag):
+        self.started = time.perf_counter()
+        self.lag = lag
+        self.emails_queued = 0
+
+
+def start_task_stats(lag):
+    stats = TaskStats(lag)
+    return stats, _task_stats.set(stats)
+
+
+def stop_task_stats(token):
+    _task_stats.reset(token)
+
+
+def add_task_emails(count):
+    """Çalışan görev varsa kuyruğa eklenen email sayısını ona ekle"""
+    stats = _task_stats.get()
+    if stats is not None:
+        stats.emails_queued += count
+
+
+def metric_key(name):
+    return f"{METRICS_KEY_PREFIX}:{name}"
+
+
+class LocalMetricsStore:
+    """Metrikleri yalnızca süreç belleğinde tutan depo (testler için)"""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def update(self, label, counters, gauges):
+        with self._lock:
+            for name, value in counters.items():
+                self._values[(name, label)] = self._values.get((name, label), 0) + value
+            for name, value in gauges.items():
+                self._values[(name, label)] = value
+
+    def read(self, names):
+        with self._lock:
+            return {key: value for key, value in self._values.items() if key[0] in names}
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class RedisMetricsStore:
+    """Metrikleri tüm süreçlerin (web + celery) paylaştığı Redis'te, metrik başına bir hash olarak tutar.
+
+    Anahtarların süresi yoktur ve önbellekten ayrı bir veritabanındadır; Redis'in bellek politikası
+    süresiz anahtarları silmediği sürece (noeviction, volatile-*) sayaçlar kaybolmaz. Bir isteğin veya
+    görevin tüm metrikleri tek pipeline ile yazılır.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def update(self, label, counters, gauges):
+        pipeline = self.client.pipeline(transaction=False)
+        for name, value in counters.items():
+            pipeline.hincrby(metric_key(name), label, value)
+        for name, value in gauges.items():
+            pipeline.hset(metric_key(name), label, value)
+        pipeline.execute()
+
+    def read(self, names):
+        pipeline = self.client.pipeline(transaction=False)
+        for name in names:
+            pipeline.hgetall(metric_key(name))
+        return {
+            (name, label.decode()): int(value)
+            for name, fields in zip(names, pipeline.execute())
+            for label, value in fields.items()
+        }
+
+
+@cache
+def get_metrics_store():
+    if settings.METRICS_REDIS_URL:
+        return RedisMetricsStore(settings.METRICS_REDIS_URL)
+    return LocalMetricsStore()
+
+
+def record_metrics(label, counters, gauges=None):
+    """Sayaçları artır ve göstergeleri yaz (süreler mikrosaniye olarak tam sayı tutulur)"""
+    counters = {name: value for name, value in counters.items() if value}
+    if not counters and not gauges:
+        return
+    try:
+        get_metrics_store().update(label, counters, gauges or {})
+    except (redis.RedisError, OSError):
+        # Metrik deposuna ulaşılamaması isteği veya görevi bozmamalı
+        logger.exception(f"Metrikler kaydedilemedi: {label}")
+
+
+def render_prometheus(families, label_name, labels):
+    """Metrikleri Prometheus metin biçiminde döndür.
+
+    families: (ad, tür, açıklama, ölçek) listesi; ölçek depodaki tam sayıyı birime çevirir.
+    """
+    values = get_metrics_store().read([name for name, *_ in families])
+
+    lines = []
+    for name, metric_type, description, scale in families:
+        full_name = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {full_name} {description}")
+        lines.append(f"# TYPE {full_name} {metric_type}")
+        for label in labels:
+            value = values.get((name, label))
+            if value is None:
+                continue
+            escaped = label.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{full_name}{{{label_name}="{escaped}"}} {value if scale == 1 else round(value * scale, 6)}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,92 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from .metrics import record_metrics, start_request_stats, stop_request_stats
+
+logger = logging.getLogger("core.metrics")
+
+
+class RequestMetricsMiddleware:
+    """Her görünüm için sorgu sayısı, SQL süresi, şablon süresi ve yanıt boyutunu kaydeder.
+
+    Sorgu bütçesini (REQUEST_QUERY_BUDGET) aşan istekler uyarı olarak loglanır.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats, token = start_request_stats()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_request_stats(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats, token = start_request_stats()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_request_stats(token)
+        # Metrik deposuna yazma senkron bir ağ çağrısıdır; olay döngüsünü bloklamaması için ayrı thread'de
+        # çalıştırılır (veritabanı kullanmadığı için veritabanı thread'ini beklemesine gerek yoktur)
+        await sync_to_async(self.record, thread_sensitive=False)(
+            request, response, stats, time.perf_counter() - started
+        )
+        return response
+
+    def record(self, request, response, stats, duration):
+        match = request.resolver_match
+        if match is None:
+            # Çözümlenemeyen adresler (404) görünüm bazında izlenmez
+            return
+        view = match.view_name
+
+        # Akış yanıtlarının boyutu ve süresi istek sonunda bilinmez
+        size = None if response.streaming else len(response.content)
+        over_budget = stats.queries > settings.REQUEST_QUERY_BUDGET
+
+        record_metrics(
+            view,
+            {
+                "http_requests_total": 1,
+                "http_request_duration_seconds_total": round(duration * 1_000_000),
+                "db_queries_total": stats.queries,
+                "db_query_duration_seconds_total": round(stats.sql_time * 1_000_000),
+                "template_render_duration_seconds_total": round(stats.template_time * 1_000_000),
+                "http_response_size_bytes_total": size,
+                "query_budget_exceeded_total": int(over_budget),
+            },
+        )
+
+        line = json.dumps(
+            {
+                "event": "request",
+                "view": view,
+                "method": request.method,
+                "status": response.status_code,
+                "duration_ms": round(duration * 1000, 2),
+                "queries": stats.queries,
+                "sql_ms": round(stats.sql_time * 1000, 2),
+                "template_ms": round(stats.template_time * 1000, 2),
+                "response_bytes": size,
+                "over_query_budget": over_budget,
+            }
+        )
+        logger.log(logging.WARNING if over_budget else logging.INFO, line)
@@ -24,6 +24,7 @@ class Notification(models.Model):
         verbose_name = "Bildirim"
         verbose_name_plural = "Bildirimler"
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["user", "-created_at"], name="notification_user_created_idx")]
 
     def __str__(self):
         return f"{self.user.username} - {self.title}"
@@ -0,0 +1,117 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+
+
+class KeysetPage:
+    """Anahtar (keyset) sayfalamasıyla alınmış tek bir sayfa"""
+
+    def __init__(self, object_list, next_cursor, cursor_param, query_params):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.cursor_param = cursor_param
+        self.query_params = query_params
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def next_query(self):
+        """Bir sonraki sayfanın sorgu dizesi (diğer GET parametreleri korunur)"""
+        params = self.query_params.copy()
+        params[self.cursor_param] = self.next_cursor
+        return params.urlencode()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+def _field_names(ordering):
+    return [field.lstrip("-") for field in ordering]
+
+
+def _serialize(value):
+    # DjangoJSONEncoder mikrosaniyeleri kırptığı için tarih/saat değerleri tam hassasiyetle yazılır
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(obj, ordering):
+    values = [_serialize(getattr(obj, name)) for name in _field_names(ordering)]
+    payload = json.dumps(values, cls=DjangoJSONEncoder).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor, model, ordering):
+    """İmleci sıralama alanlarının değerlerine çevir, geçersizse None döndür"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            return None
+        return [model._meta.get_field(name).to_python(value) for name, value in zip(_field_names(ordering), values)]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _after(ordering, values):
+    """Sıralamada verilen değerlerden sonra gelen satırları seçen filtre"""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        lookup = "lt" if field.startswith("-") else "gt"
+        step = Q(**{f"{field.lstrip('-')}__{lookup}": values[i]})
+        for previous, value in zip(ordering[:i], values[:i]):
+            step &= Q(**{previous.lstrip("-"): value})
+        condition |= step
+    return condition
+
+
+def _page_queryset(request, queryset, ordering, per_page, cursor_param):
+    queryset = queryset.order_by(*ordering)
+
+    cursor = request.GET.get(cursor_param)
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, ordering)
+        if values is not None:
+            queryset = queryset.filter(_after(ordering, values))
+
+    # Bir fazla satır alınarak sonraki sayfanın olup olmadığı anlaşılır
+    return queryset[: per_page + 1]
+
+
+def _build_page(request, object_list, ordering, per_page, cursor_param):
+    next_cursor = None
+    if len(object_list) > per_page:
+        object_list = object_list[:per_page]
+        next_cursor = encode_cursor(object_list[-1], ordering)
+
+    return KeysetPage(object_list, next_cursor, cursor_param, request.GET)
+
+
+def keyset_paginate(request, queryset, ordering, per_page=DEFAULT_PAGE_SIZE, cursor_param="cursor"):
+    """Sorguyu (tarih, id) gibi benzersiz bir sıralama üzerinden sayfala.
+
+    OFFSET kullanılmadığı için sayfa maliyeti kayıt sayısından bağımsızdır.
+    Sıralamanın son alanı benzersiz olmalıdır (ör. "-id").
+    """
+    object_list = list(_page_queryset(request, queryset, ordering, per_page, cursor_param))
+    return _build_page(request, object_list, ordering, per_page, cursor_param)
+
+
+async def akeyset_paginate(request, queryset, ordering, per_page=DEFAULT_PAGE_SIZE, cursor_param="cursor"):
+    """keyset_paginate'in asenkron görünümler için sürümü"""
+    object_list = [obj async for obj in _page_queryset(request, queryset, ordering, per_page, cursor_param)]
+    return _build_page(request, object_list, ordering, per_page, cursor_param)
@@ -0,0 +1,55 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from health_data.models import DailyActivity, Exercise, Medication, Sleep
+
+from .events import publish_event
+from .metrics import record_query
+from .models import HealthTip, Notification
+from .snapshots import invalidate_health_tips, invalidate_snapshot_section
+
+SNAPSHOT_SECTIONS = {
+    Exercise: "exercise",
+    Sleep: "sleep",
+    DailyActivity: "daily_activity",
+    Medication: "medication",
+}
+
+
+@receiver([post_save, post_delete], sender=Exercise)
+@receiver([post_save, post_delete], sender=Sleep)
+@receiver([post_save, post_delete], sender=DailyActivity)
+@receiver([post_save, post_delete], sender=Medication)
+def refresh_dashboard_snapshot(sender, instance, **kwargs):
+    """Sağlık verisi değiştiğinde kullanıcının dashboard özetindeki ilgili bölümü geçersiz kıl"""
+    invalidate_snapshot_section(instance.user_id, SNAPSHOT_SECTIONS[sender])
+
+
+@receiver([post_save, post_delete], sender=HealthTip)
+def refresh_health_tips(sender, instance, **kwargs):
+    """Sağlık ipuçları değiştiğinde önbelleği temizle"""
+    invalidate_health_tips()
+
+
+@receiver(post_save, sender=Notification)
+def publish_notification(sender, instance, created, **kwargs):
+    """Yeni bildirimi kullanıcının olay akışına gönder"""
+    if created:
+        publish_event(
+            instance.user_id,
+            "notification",
+            {
+                "id": instance.id,
+                "title": instance.title,
+                "notification_type": instance.notification_type,
+                "link": instance.link,
+            },
+        )
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """İstek metrikleri için veritabanı sorgularını ölçen sarmalayıcıyı ekle"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
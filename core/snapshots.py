@@ -0,0 +1,228 @@
+import random
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from health_data.models import DailyActivity, Exercise, Medication, Sleep
+
+from .models import HealthTip
+
+# Önbellekteki dashboard bölümlerinin ömrü (saniye). Sinyaller bölümlerin sürümünü artırarak
+# eskiyen bölümü geçersiz kıldığı için bu süre yalnızca kaçırılan güncellemelere karşı bir emniyet payıdır.
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+# Bölümler model nesneleri değil sade değerler olarak saklanır; biçim değiştiğinde artırılır ki eski
+# biçimdeki girdiler okunmasın
+SNAPSHOT_FORMAT = 2
+HEALTH_TIPS_CACHE_KEY = f"dashboard:health_tips:v{SNAPSHOT_FORMAT}"
+
+# Günlük hedefler
+DAILY_GOALS = {
+    "steps": 10000,
+    "water": 2.5,  # Litre
+    "sleep": 8,  # Saat
+}
+
+
+def snapshot_cache_key(user_id, section, today):
+    return f"dashboard:snapshot:v{SNAPSHOT_FORMAT}:{user_id}:{today.isoformat()}:{section}"
+
+
+def snapshot_version_key(user_id, section):
+    return f"dashboard:snapshot_version:{user_id}:{section}"
+
+
+def _sleep_section(user_id, today):
+    """Son 7 günün uyku serisi ve ortalama uyku süresi"""
+    start_date = today - timedelta(days=7)
+
+    # Son 7 uyku kaydı (ortalama için) ve son 7 günün uyku verileri
+    recent_durations = list(
+        Sleep.objects.filter(user_id=user_id).order_by("-sleep_time").values_list("duration", flat=True)[:7]
+    )
+    sleep_data = Sleep.objects.filter(user_id=user_id, date__gte=start_date, date__lte=today).values_list(
+        "date", "duration"
+    )
+
+    # Eksik günleri doldur
+    all_dates = [(start_date + timedelta(days=x)) for x in range((today - start_date).days + 1)]
+    sleep_dict = {date: float(duration) for date, duration in sleep_data}
+
+    return {
+        "sleep_labels": [date.strftime("%d.%m") for date in all_dates],
+        "sleep_durations": [sleep_dict.get(date, 0) for date in all_dates],
+        "avg_sleep": float(sum(recent_durations) / len(recent_durations)) if recent_durations else 0,
+    }
+
+
+def _exercise_section(user_id, today):
+    """Son 7 günün egzersiz dağılımı ve bugünün yakılan kalorisi"""
+    start_date = today - timedelta(days=7)
+
+    exercise_data = (
+        Exercise.objects.filter(user_id=user_id, date__gte=start_date, date__lte=today)
+        .values("exercise_type")
+        .annotate(count=Count("id"))
+        .order_by("exercise_type")
+    )
+
+    # Egzersiz türlerini Türkçe olarak al
+    exercise_type_map = dict(Exercise.EXERCISE_TYPES)
+    calories_burned = Exercise.objects.filter(user_id=user_id, date=today).aggregate(total=Sum("calories_burned"))
+
+    return {
+        "exercise_labels": [exercise_type_map.get(ex["exercise_type"], ex["exercise_type"]) for ex in exercise_data],
+        "exercise_counts": [ex["count"] for ex in exercise_data],
+        "calories_burned": calories_burned["total"] or 0,
+    }
+
+
+def _daily_activity_section(user_id, today):
+    """Günlük adım ve su tüketimi"""
+    daily_activity = DailyActivity.objects.filter(user_id=user_id, date=today).values("steps", "water_intake").first()
+    if not daily_activity:
+        return {"daily_steps": 0, "daily_water": 0.0}
+    return {
+        "daily_steps": daily_activity["steps"] or 0,
+        "daily_water": float(daily_activity["water_intake"] or 0),
+    }
+
+
+def _medication_section(user_id, today):
+    """Aktif ilaçlar"""
+    active_medications = Medication.objects.filter(
+        user_id=user_id, is_active=True, start_date__lte=today, end_date__gte=today
+    ).order_by("start_date")
+    frequencies = dict(Medication.FREQUENCY_CHOICES)
+    return {
+        "active_medications": [
+            {"name": name, "dosage": dosage, "frequency_display": str(frequencies.get(frequency, frequency))}
+            for name, dosage, frequency in active_medications.values_list("name", "dosage", "frequency")
+        ]
+    }
+
+
+# Her model değişikliğinde yalnızca ilgili bölüm yeniden hesaplanır
+SECTIONS = {
+    "sleep": _sleep_section,
+    "exercise": _exercise_section,
+    "daily_activity": _daily_activity_section,
+    "medication": _medication_section,
+}
+
+
+def _new_version():
+    # Silinen/süresi dolan bir sürüm anahtarı yeniden oluşturulduğunda eski bölümlerle eşleşmemeli
+    return time.time_ns()
+
+
+def _snapshot_keys(user_id, today):
+    return {
+        section: (snapshot_cache_key(user_id, section, today), snapshot_version_key(user_id, section))
+        for section in SECTIONS
+    }
+
+
+def _compute_sections(sections, user_id, today):
+    return [SECTIONS[section](user_id, today) for section in sections]
+
+
+def _read_snapshot(keys, cached, today):
+    """Önbellekteki güncel bölümlerden özeti oluştur; eksik veya eskimiş bölümleri sürümleriyle döndür.
+
+    Her bölüm hesaplandığı andaki sürümüyle saklanır. Hesaplama sırasında veri değişirse sinyal sürümü
+    artırmış olur ve geç yazılan eski bölüm bir sonraki okumada kullanılmaz.
+    """
+    snapshot = {"date": today}
+    missing = {}
+    for section, (key, version_key) in keys.items():
+        version = cached.get(version_key)
+        entry = cached.get(key)
+        if version is not None and entry is not None and entry[0] == version:
+            snapshot.update(entry[1])
+        else:
+            missing[section] = version
+    return snapshot, missing
+
+
+def get_dashboard_data(user_id):
+    """Dashboard özetini ve rastgele bir sağlık ipucunu tek önbellek okumasıyla getir (eksik bölümler hesaplanır)"""
+    today = timezone.localdate()
+    keys = _snapshot_keys(user_id, today)
+    cached = cache.get_many([key for pair in keys.values() for key in pair] + [HEALTH_TIPS_CACHE_KEY])
+    snapshot, missing = _read_snapshot(keys, cached, today)
+
+    entries = {}
+    for section, version in missing.items():
+        key, version_key = keys[section]
+        if version is None:
+            version = _new_version()
+            cache.add(version_key, version, SNAPSHOT_TIMEOUT)
+        data = SECTIONS[section](user_id, today)
+        snapshot.update(data)
+        entries[key] = (version, data)
+    if entries:
+        cache.set_many(entries, SNAPSHOT_TIMEOUT)
+
+    health_tips = cached.get(HEALTH_TIPS_CACHE_KEY)
+    if health_tips is None:
+        health_tips = list(HealthTip.objects.filter(is_active=True).values("id", "title", "content"))
+        cache.set(HEALTH_TIPS_CACHE_KEY, health_tips, SNAPSHOT_TIMEOUT)
+
+    health_tip = random.choice(health_tips) if health_tips else None
+    return snapshot, health_tip
+
+
+async def aget_dashboard_data(user_id):
+    """get_dashboard_data'nın asenkron görünümler için sürümü"""
+    today = timezone.localdate()
+    keys = _snapshot_keys(user_id, today)
+    cached = await cache.aget_many([key for pair in keys.values() for key in pair] + [HEALTH_TIPS_CACHE_KEY])
+    snapshot, missing = _read_snapshot(keys, cached, today)
+
+    for section, version in missing.items():
+        if version is None:
+            missing[section] = _new_version()
+            await cache.aadd(keys[section][1], missing[section], SNAPSHOT_TIMEOUT)
+    # Django'nun async ORM'i de sorguları tek bir veritabanı thread'inde sırayla çalıştırır; bu yüzden
+    # eksik bölümler eşzamanlı değil, tek bir thread geçişinde sırayla hesaplanır. Bu sırada olay döngüsü
+    # diğer isteklere hizmet etmeye devam eder.
+    sections = await sync_to_async(_compute_sections)(list(missing), user_id, today)
+    entries = {}
+    for (section, version), data in zip(missing.items(), sections):
+        snapshot.update(data)
+        entries[keys[section][0]] = (version, data)
+    if entries:
+        await cache.aset_many(entries, SNAPSHOT_TIMEOUT)
+
+    health_tips = cached.get(HEALTH_TIPS_CACHE_KEY)
+    if health_tips is None:
+        health_tips = [tip async for tip in HealthTip.objects.filter(is_active=True).values("id", "title", "content")]
+        await cache.aset(HEALTH_TIPS_CACHE_KEY, health_tips, SNAPSHOT_TIMEOUT)
+
+    health_tip = random.choice(health_tips) if health_tips else None
+    return snapshot, health_tip
+
+
+def invalidate_snapshot_section(user_id, section):
+    """Özetin verilen bölümünü eskimiş say; bölüm bir sonraki dashboard ziyaretinde yeniden hesaplanır.
+
+    Sürüm işlem tamamlandıktan sonra artırılır, böylece bu arada hesaplanan bölüm de geçersiz olur.
+    """
+    key = snapshot_version_key(user_id, section)
+
+    def bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), SNAPSHOT_TIMEOUT)
+
+    transaction.on_commit(bump)
+
+
+def invalidate_health_tips():
+    cache.delete(HEALTH_TIPS_CACHE_KEY)
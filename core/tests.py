@@ -1 +1,365 @@
-# Create your tests here.
+import asyncio
+import threading
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+import redis
+from asgiref.sync import sync_to_async
+from celery.app.task import Context
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from chronicle.celery import record_task_telemetry, stamp_enqueue_time, start_task_telemetry
+from health_data.models import DailyActivity, Exercise, Medication, Message, Sleep
+from health_data.tasks import reconcile_unread_message_counts, send_message_digest
+
+from .events import LocalBroker, format_event, get_broker, publish_event, user_channel
+from .metrics import get_metrics_store, record_query, start_request_stats, stop_request_stats
+from .models import HealthTip, Notification
+from .snapshots import aget_dashboard_data, get_dashboard_data, snapshot_cache_key
+
+User = get_user_model()
+
+
+class LocalBrokerTests(TestCase):
+    """Yerel broker olayları yalnızca ilgili kanalın abonelerine dağıtmalı"""
+
+    async def test_publish_fans_out_to_channel_subscribers(self):
+        broker = LocalBroker()
+        async with broker.subscribe("a") as first, broker.subscribe("a") as second, broker.subscribe("b") as other:
+            broker.publish("a", "olay")
+            self.assertEqual(await first(1), "olay")
+            self.assertEqual(await second(1), "olay")
+            self.assertIsNone(await other(0.01))
+        self.assertEqual(broker._subscribers, {})
+
+    def test_broker_failures_are_logged(self):
+        with (
+            mock.patch.object(get_broker(), "publish", side_effect=redis.ConnectionError("bağlantı yok")),
+            self.assertLogs("core.events", "ERROR") as logs,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            publish_event(1, "message", {"id": 1})
+        self.assertIn("bağlantı yok", logs.output[0])
+
+
+class EventStreamTests(TestCase):
+    """Olay akışı yeni mesaj ve bildirimleri bağlı kullanıcıya iletmeli"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+        cls.doctor = User.objects.create_user(
+            username="doktor", email="doktor@example.com", password="parola", is_doctor=True
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.assertIsInstance(get_broker(), LocalBroker)
+
+    def create_with_events(self, model, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return model.objects.create(**kwargs)
+
+    async def test_stream_pushes_messages_and_notifications(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("core:event_stream"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+
+        async def next_event():
+            return (await asyncio.wait_for(anext(stream), 1)).decode()
+
+        first = await next_event()
+        self.assertIn(format_event("unread_count", {"count": 0}), first)
+
+        create = sync_to_async(self.create_with_events)
+        message = await create(Message, sender=self.doctor, receiver=self.user, subject="Konu", content="-")
+        event = await next_event()
+        self.assertTrue(event.startswith("event: message\n"))
+        self.assertIn(f'"id": {message.id}', event)
+        self.assertEqual(await next_event(), format_event("unread_count", {"count": 1}))
+
+        # Başka kullanıcının olayları bu akışa düşmemeli
+        await create(Notification, user=self.doctor, notification_type="system", title="Başka", message="-")
+        await create(Notification, user=self.user, notification_type="system", title="Bildirim", message="-")
+        event = await next_event()
+        self.assertTrue(event.startswith("event: notification\n"))
+        self.assertIn('"title": "Bildirim"', event)
+
+        # İstemci bağlantıyı kapattığında abonelik sonlanmalı
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.01)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertNotIn(user_channel(self.user.id), get_broker()._subscribers)
+
+    def test_wsgi_returns_current_state_and_closes(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("core:event_stream"))
+        self.assertFalse(response.streaming)
+        self.assertIn(format_event("unread_count", {"count": 0}), response.content.decode())
+
+    def test_stream_requires_login(self):
+        response = self.client.get(reverse("core:event_stream"))
+        self.assertEqual(response.status_code, 302)
+
+
+class DashboardSnapshotTests(TestCase):
+    """Dashboard özeti bölüm bölüm önbelleklenmeli, veri değişince yalnızca ilgili bölüm yeniden hesaplanmalı"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+
+    def create(self, model, **kwargs):
+        # Sinyaller bölümü işlem tamamlandıktan sonra geçersiz kılar
+        with self.captureOnCommitCallbacks(execute=True):
+            return model.objects.create(user=self.user, **kwargs)
+
+    def test_signals_invalidate_only_the_changed_section(self):
+        snapshot, _ = get_dashboard_data(self.user.id)
+        self.assertEqual(snapshot["calories_burned"], 0)
+        with self.assertNumQueries(0):
+            get_dashboard_data(self.user.id)
+
+        exercise = self.create(
+            Exercise, date=self.today, exercise_type="walking", duration=30, intensity=5, calories_burned=200
+        )
+        with self.assertNumQueries(2):
+            snapshot, _ = get_dashboard_data(self.user.id)
+        self.assertEqual(snapshot["calories_burned"], 200)
+        self.assertEqual(snapshot["exercise_labels"], ["Yürüyüş"])
+
+        self.create(Sleep, date=self.today, sleep_time="23:00", wake_time="07:00", quality=4, duration=8)
+        with self.assertNumQueries(2):
+            snapshot, _ = get_dashboard_data(self.user.id)
+        self.assertEqual(snapshot["avg_sleep"], 8.0)
+        self.assertEqual(snapshot["calories_burned"], 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            exercise.delete()
+        snapshot, _ = get_dashboard_data(self.user.id)
+        self.assertEqual(snapshot["calories_burned"], 0)
+
+    def test_daily_activity_is_todays(self):
+        self.create(DailyActivity, date=self.today - timedelta(days=1), steps=9000, water_intake=2)
+        snapshot, _ = get_dashboard_data(self.user.id)
+        self.assertEqual((snapshot["daily_steps"], snapshot["daily_water"]), (0, 0.0))
+
+        self.create(DailyActivity, date=self.today, steps=3000, water_intake=1.5)
+        snapshot, _ = get_dashboard_data(self.user.id)
+        self.assertEqual((snapshot["daily_steps"], snapshot["daily_water"]), (3000, 1.5))
+
+    def test_sections_cache_plain_values(self):
+        Medication.objects.create(
+            user=self.user,
+            name="Metformin",
+            dosage="500 mg",
+            frequency="twice_daily",
+            start_date=self.today,
+            end_date=self.today + timedelta(days=30),
+        )
+        HealthTip.objects.create(title="Su", content="Günde 2 litre su için.", category="general")
+        snapshot, health_tip = get_dashboard_data(self.user.id)
+        expected = [{"name": "Metformin", "dosage": "500 mg", "frequency_display": "Günde İki"}]
+        self.assertEqual(snapshot["active_medications"], expected)
+        self.assertEqual(health_tip["content"], "Günde 2 litre su için.")
+
+        # Önbellekte model nesnesi tutulmaz
+        _, data = cache.get(snapshot_cache_key(self.user.id, "medication", self.today))
+        self.assertEqual(data["active_medications"], expected)
+
+    def test_section_computed_before_a_change_is_not_reused(self):
+        get_dashboard_data(self.user.id)
+        key = snapshot_cache_key(self.user.id, "daily_activity", self.today)
+        stale = cache.get(key)
+
+        # Değişiklikten önce hesaplanan bölüm, sinyalden sonra önbelleğe yazılsa da kullanılmamalı
+        self.create(DailyActivity, date=self.today, steps=4000)
+        cache.set(key, stale)
+        snapshot, _ = get_dashboard_data(self.user.id)
+        self.assertEqual(snapshot["daily_steps"], 4000)
+
+    async def test_async_snapshot_matches_sync(self):
+        create = sync_to_async(self.create)
+        await create(Exercise, date=self.today, exercise_type="running", duration=20, intensity=7, calories_burned=150)
+        snapshot, _ = await aget_dashboard_data(self.user.id)
+        self.assertEqual(snapshot, (await sync_to_async(get_dashboard_data)(self.user.id))[0])
+        self.assertEqual(snapshot["calories_burned"], 150)
+
+    async def test_dashboard_view(self):
+        response = await self.async_client.get(reverse("core:dashboard"))
+        self.assertEqual(response.status_code, 302)
+
+        await sync_to_async(self.create)(DailyActivity, date=self.today, steps=5000, water_intake=2)
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("core:dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["summary_data"]["daily_steps"], 5000)
+        self.assertEqual(response.context["summary_data"]["daily_water"], 2.0)
+
+
+class RequestMetricsTests(TestCase):
+    """İstek metrikleri görünüm bazında toplanmalı ve /metrics/ adresinden okunabilmeli"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+        cls.admin = User.objects.create_user(
+            username="yonetici", email="yonetici@example.com", password="parola", is_staff=True
+        )
+
+    def setUp(self):
+        cache.clear()
+        get_metrics_store().clear()
+
+    def metric(self, name, label):
+        return get_metrics_store().read([name]).get((name, label))
+
+    def test_query_wrapper_counts_only_during_requests(self):
+        self.assertIn(record_query, connection.execute_wrappers)
+        User.objects.count()
+
+        stats, token = start_request_stats()
+        try:
+            User.objects.count()
+            User.objects.exists()
+        finally:
+            stop_request_stats(token)
+        self.assertEqual(stats.queries, 2)
+        self.assertGreater(stats.sql_time, 0)
+
+    def test_middleware_records_view_metrics(self):
+        self.client.force_login(self.user)
+        url = reverse("core:notification_list")
+        with self.assertLogs("core.metrics", "INFO") as logs:
+            self.client.get(url)
+            self.client.get(url)
+        self.assertEqual(self.metric("http_requests_total", "core:notification_list"), 2)
+        self.assertGreater(self.metric("db_queries_total", "core:notification_list"), 0)
+        self.assertGreater(self.metric("template_render_duration_seconds_total", "core:notification_list"), 0)
+        self.assertGreater(self.metric("http_response_size_bytes_total", "core:notification_list"), 0)
+        self.assertIsNone(self.metric("query_budget_exceeded_total", "core:notification_list"))
+        self.assertIn('"view": "core:notification_list"', logs.output[0])
+
+        with override_settings(REQUEST_QUERY_BUDGET=0), self.assertLogs("core.metrics", "WARNING"):
+            self.client.get(url)
+        self.assertEqual(self.metric("query_budget_exceeded_total", "core:notification_list"), 1)
+
+    def test_store_failures_do_not_break_requests(self):
+        self.client.force_login(self.user)
+        with (
+            mock.patch.object(get_metrics_store(), "update", side_effect=redis.ConnectionError("bağlantı yok")),
+            self.assertLogs("core.metrics", "ERROR") as logs,
+        ):
+            response = self.client.get(reverse("core:notification_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("bağlantı yok", logs.output[0])
+
+    async def test_async_requests_record_metrics_off_the_event_loop(self):
+        await self.async_client.aforce_login(self.user)
+        store = get_metrics_store()
+        threads = []
+
+        def update(*args):
+            threads.append(threading.get_ident())
+
+        with mock.patch.object(store, "update", side_effect=update):
+            response = await self.async_client.get(reverse("core:dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+    def test_metrics_view(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("core:notification_list"))
+        self.assertEqual(self.client.get(reverse("core:metrics")).status_code, 403)
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("core:metrics"))
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn("# TYPE chronicle_http_requests_total counter", content)
+        self.assertIn('chronicle_http_requests_total{view="core:notification_list"} 1\n', content)
+
+        self.client.logout()
+        with override_settings(METRICS_TOKEN="gizli"):
+            self.assertEqual(self.client.get(reverse("core:metrics")).status_code, 403)
+            response = self.client.get(reverse("core:metrics"), headers={"Authorization": "Bearer gizli"})
+        self.assertEqual(response.status_code, 200)
+
+
+class TaskTelemetryTests(TestCase):
+    """Celery sinyalleri görev çalışmalarını paylaşılan metrik deposuna yazmalı"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+        cls.doctor = User.objects.create_user(
+            username="doktor", email="doktor@example.com", password="parola", is_doctor=True
+        )
+
+    def setUp(self):
+        cache.clear()
+        get_metrics_store().clear()
+
+    def metrics(self, task):
+        names = ["task_runs_total", "task_failures_total", "task_items_processed_total", "task_emails_queued_total"]
+        names += ["task_last_success_timestamp_seconds", "task_last_queue_lag_seconds", "task_queue_lag_seconds_total"]
+        return {name: value for (name, label), value in get_metrics_store().read(names).items() if label == task.name}
+
+    def test_enqueue_time_is_stamped_when_headers_exist(self):
+        headers = {}
+        stamp_enqueue_time(headers=headers)
+        self.assertIn("enqueued_at", headers)
+        # Başlıksız yayın görevi kuyruğa eklemeyi bozmamalı
+        stamp_enqueue_time(headers=None)
+
+    def test_eager_runs_update_counters(self):
+        Message.objects.create(sender=self.user, receiver=self.doctor, subject="Konu", content="-", email_pending=True)
+        self.assertEqual(send_message_digest.delay(self.doctor.id).get(), 1)
+        send_message_digest.delay(self.doctor.id)
+
+        metrics = self.metrics(send_message_digest)
+        self.assertEqual(metrics["task_runs_total"], 2)
+        self.assertEqual(metrics["task_items_processed_total"], 1)
+        self.assertEqual(metrics["task_emails_queued_total"], 1)
+        self.assertAlmostEqual(metrics["task_last_success_timestamp_seconds"], time.time(), delta=5)
+        self.assertNotIn("task_failures_total", metrics)
+
+    def test_failures_are_counted_and_logged(self):
+        with (
+            mock.patch("health_data.tasks.reconcile_unread_counts", side_effect=RuntimeError),
+            self.assertLogs("core.metrics", "WARNING") as logs,
+        ):
+            self.assertEqual(reconcile_unread_message_counts.delay().state, "FAILURE")
+        metrics = self.metrics(reconcile_unread_message_counts)
+        self.assertEqual((metrics["task_runs_total"], metrics["task_failures_total"]), (1, 1))
+        self.assertNotIn("task_last_success_timestamp_seconds", metrics)
+        self.assertIn('"state": "FAILURE"', logs.output[0])
+
+    def test_queue_lag(self):
+        # Kuyruğa eklenme zamanı işçide mesaj başlığından gelir
+        task = SimpleNamespace(
+            name="health_data.tasks.process_email_outbox", request=Context(enqueued_at=time.time() - 90)
+        )
+        start_task_telemetry(task=task)
+        with self.settings(TASK_LAG_WARNING_SECONDS=60), self.assertLogs("core.metrics", "WARNING"):
+            record_task_telemetry(task=task, retval={"claimed": 4, "sent": 3}, state="SUCCESS")
+
+        metrics = self.metrics(task)
+        self.assertAlmostEqual(metrics["task_last_queue_lag_seconds"] / 1_000_000, 90, delta=5)
+        self.assertEqual(metrics["task_queue_lag_seconds_total"], metrics["task_last_queue_lag_seconds"])
+        self.assertEqual(metrics["task_items_processed_total"], 4)
@@ -8,6 +8,8 @@ urlpatterns = [
     path("", views.home, name="home"),
     path("dashboard/", views.dashboard, name="dashboard"),
     path("notifications/", views.notification_list, name="notification_list"),
+    path("events/", views.event_stream, name="event_stream"),
+    path("metrics/", views.metrics, name="metrics"),
     path("notifications/<int:pk>/", views.notification_detail, name="notification_detail"),
     path(
         "notifications/mark-read/<int:pk>/",
@@ -1,19 +1,28 @@
 # Create your views here.
 
 import json
-from datetime import timedelta
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Avg, Count, Sum
-from django.http import JsonResponse
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.utils import timezone
+from django.urls import URLPattern, get_resolver
+from django.utils.crypto import constant_time_compare
 
-from health_data.models import DailyActivity, Exercise, Medication, Sleep
+from chronicle.celery import app as celery_app
+from health_data.counters import get_unread_count
 
+from .async_views import arender
+from .events import format_event, get_broker, user_channel
 from .forms import EmergencyContactForm
+from .metrics import REQUEST_METRICS, TASK_METRICS, render_prometheus
 from .models import EmergencyContact, HealthTip, Notification
+from .pagination import keyset_paginate
+from .snapshots import DAILY_GOALS, aget_dashboard_data
 
 
 def home(request):
@@ -24,88 +33,31 @@ def home(request):
 
 
 @login_required
-def dashboard(request):
+async def dashboard(request):
     """Ana dashboard sayfası"""
+    user = await request.auser()
     try:
-        today = timezone.now().date()
-        start_date = today - timedelta(days=7)
-
-        # Aktif ilaçlar
-        active_medications = Medication.objects.filter(
-            user=request.user, is_active=True, start_date__lte=today, end_date__gte=today
-        ).order_by("start_date")
-
-        # Son 7 günün egzersizleri
-        exercises = Exercise.objects.filter(user=request.user).order_by("-date")[:7]
-
-        # Son 7 günün uyku kayıtları
-        sleep_records = Sleep.objects.filter(user=request.user).order_by("-sleep_time")[:7]
-
-        # Son 7 günlük uyku verileri
-        sleep_data = Sleep.objects.filter(user=request.user, date__gte=start_date, date__lte=today).order_by("date")
-
-        # Eksik günleri doldur
-        all_dates = [(start_date + timedelta(days=x)) for x in range((today - start_date).days + 1)]
-        sleep_dict = {sleep.date: float(sleep.duration) for sleep in sleep_data}
-        sleep_labels = [date.strftime("%d.%m") for date in all_dates]
-        sleep_durations = [sleep_dict.get(date, 0) for date in all_dates]
-
-        # Egzersiz dağılımı
-        exercise_data = (
-            Exercise.objects.filter(user=request.user, date__gte=start_date, date__lte=today)
-            .values("exercise_type")
-            .annotate(count=Count("id"))
-        )
-
-        # Egzersiz türlerini Türkçe olarak al
-        exercise_type_map = dict(Exercise.EXERCISE_TYPES)
-        exercise_labels = [exercise_type_map.get(ex["exercise_type"], ex["exercise_type"]) for ex in exercise_data]
-        exercise_counts = [ex["count"] for ex in exercise_data]
-
-        # Günlük aktivite verileri
-        daily_activity, created = DailyActivity.objects.get_or_create(
-            user=request.user,
-            defaults={
-                "steps": 0,
-                "water_intake": 0,
-            },
-        )
-
-        # Günlük hedefler
-        daily_goals = {
-            "steps": 10000,
-            "water": 2.5,  # Litre
-            "sleep": 8,  # Saat
-        }
+        # Özet veriler önbellekteki dashboard özetinden okunur
+        snapshot, health_tip = await aget_dashboard_data(user.id)
 
-        # Özet veriler
         summary_data = {
-            "daily_steps": daily_activity.steps or 0,
-            "daily_water": float(daily_activity.water_intake or 0),
-            "calories_burned": Exercise.objects.filter(user=request.user, date=today).aggregate(
-                total=Sum("calories_burned")
-            )["total"]
-            or 0,
-            "avg_sleep": sleep_records.aggregate(avg=Avg("duration"))["avg"] or 0,
+            "daily_steps": snapshot["daily_steps"],
+            "daily_water": snapshot["daily_water"],
+            "calories_burned": snapshot["calories_burned"],
+            "avg_sleep": snapshot["avg_sleep"],
         }
 
-        # Sağlık ipucu
-        health_tip = HealthTip.objects.filter(is_active=True).order_by("?").first()
-
         context = {
-            "active_medications": active_medications,
-            "exercises": exercises,
-            "sleep_records": sleep_records,
-            "daily_goals": daily_goals,
+            "active_medications": snapshot["active_medications"],
+            "daily_goals": DAILY_GOALS,
             "summary_data": summary_data,
             "health_tip": health_tip,
-            "daily_activity": daily_activity,
-            "sleep_labels": json.dumps(sleep_labels),
-            "sleep_durations": json.dumps(sleep_durations),
-            "exercise_labels": json.dumps(exercise_labels),
-            "exercise_counts": json.dumps(exercise_counts),
+            "sleep_labels": json.dumps(snapshot["sleep_labels"]),
+            "sleep_durations": json.dumps(snapshot["sleep_durations"]),
+            "exercise_labels": json.dumps(snapshot["exercise_labels"]),
+            "exercise_counts": json.dumps(snapshot["exercise_counts"]),
         }
-        return render(request, "core/dashboard.html", context)
+        return await arender(request, "core/dashboard.html", context)
     except Exception as e:
         messages.error(request, f"Dashboard verileri yüklenirken bir hata oluştu: {str(e)}")
         return redirect("core:home")
@@ -114,10 +66,47 @@ def dashboard(request):
 @login_required
 def notification_list(request):
     """Bildirim listesi görünümü"""
-    notifications = Notification.objects.filter(user=request.user).order_by("-created_at")
+    notifications = keyset_paginate(request, Notification.objects.filter(user=request.user), ("-created_at", "-id"))
     return render(request, "core/notification_list.html", {"notifications": notifications})
 
 
+# Bağlantının proxy'ler tarafından kapatılmaması için boşta kalma süresi (saniye)
+EVENT_STREAM_KEEPALIVE = 15
+# Bağlantı koptuğunda tarayıcının yeniden bağlanma süresi (milisaniye)
+EVENT_STREAM_RETRY = 3000
+EVENT_STREAM_WSGI_RETRY = 30000
+
+
+@login_required
+async def event_stream(request):
+    """Okunmamış mesaj sayısı, yeni mesaj ve bildirimleri Server-Sent Events ile gönderir"""
+    user = await request.auser()
+
+    async def unread_count_event():
+        return format_event("unread_count", {"count": await sync_to_async(get_unread_count)(user.id)})
+
+    if not isinstance(request, ASGIRequest):
+        # WSGI altında uzun süreli bağlantı bir worker'ı kilitler; güncel durum gönderilip
+        # bağlantı kapatılır ve tarayıcı daha seyrek yeniden bağlanır
+        content = f"retry: {EVENT_STREAM_WSGI_RETRY}\n\n{await unread_count_event()}"
+        response = HttpResponse(content, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        return response
+
+    async def stream():
+        # Abone olduktan sonra sayaç okunur, böylece aradaki olaylar kaçırılmaz
+        async with get_broker().subscribe(user_channel(user.id)) as receive:
+            yield f"retry: {EVENT_STREAM_RETRY}\n\n{await unread_count_event()}"
+            while True:
+                payload = await receive(EVENT_STREAM_KEEPALIVE)
+                yield payload if payload is not None else ": keepalive\n\n"
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 @login_required
 def notification_detail(request, pk):
     """Bildirim detay görünümü"""
@@ -203,3 +192,32 @@ def emergency_contact_delete(request, pk):
         messages.success(request, "Acil durum kontağı başarıyla silindi.")
         return redirect("core:emergency_contact_list")
     return render(request, "core/emergency_contact_confirm_delete.html", {"contact": contact})
+
+
+def _view_names(patterns, namespace=None):
+    """URL yapılandırmasındaki tüm adlandırılmış görünümler (metrik etiketleri için)"""
+    for pattern in patterns:
+        if isinstance(pattern, URLPattern):
+            if pattern.name:
+                yield f"{namespace}:{pattern.name}" if namespace else pattern.name
+        else:
+            nested = pattern.namespace
+            if namespace and nested:
+                nested = f"{namespace}:{nested}"
+            yield from _view_names(pattern.url_patterns, nested or namespace)
+
+
+def metrics(request):
+    """Görünüm bazında istek ve görev bazında celery metriklerini Prometheus metin biçiminde döndürür"""
+    token = settings.METRICS_TOKEN
+    if token:
+        authorization = request.headers.get("Authorization", "")
+        if not constant_time_compare(authorization, f"Bearer {token}"):
+            raise PermissionDenied
+    elif not request.user.is_staff:
+        raise PermissionDenied
+
+    views = sorted(set(_view_names(get_resolver().url_patterns)))
+    tasks = sorted(name for name in celery_app.tasks if not name.startswith("celery."))
+    content = render_prometheus(REQUEST_METRICS, "view", views) + render_prometheus(TASK_METRICS, "task", tasks)
+    return HttpResponse(content, content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -6,11 +6,15 @@ from django.utils.html import format_html
 from .models import (
     Appointment,
     DailyActivity,
+    EmailOutbox,
     Exercise,
+    HealthRollup,
     HealthTip,
+    LabParameter,
     Medication,
     Message,
     MotivationVideo,
+    ScheduledReminder,
     Sleep,
 )
 
@@ -44,6 +48,23 @@ class MedicationAdmin(admin.ModelAdmin):
     date_hierarchy = "start_date"
 
 
+@admin.register(ScheduledReminder)
+class ScheduledReminderAdmin(admin.ModelAdmin):
+    list_display = ("medication", "due_at")
+    search_fields = ("medication__name", "medication__user__email")
+    date_hierarchy = "due_at"
+    raw_id_fields = ("medication",)
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "attempts", "next_attempt_at", "created_at", "sent_at")
+    list_filter = ("status", "created_at")
+    search_fields = ("subject", "recipients")
+    date_hierarchy = "created_at"
+    readonly_fields = ("created_at", "sent_at", "last_error")
+
+
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
     list_display = ("patient", "doctor", "date", "time", "department", "is_active")
@@ -87,6 +108,21 @@ class DailyActivityAdmin(admin.ModelAdmin):
     ordering = ("-date", "-created_at")
 
 
+@admin.register(HealthRollup)
+class HealthRollupAdmin(admin.ModelAdmin):
+    list_display = ("user", "period", "period_start", "exercise_duration", "sleep_count", "steps", "updated_at")
+    list_filter = ("period",)
+    search_fields = ("user__username", "user__email")
+    date_hierarchy = "period_start"
+    raw_id_fields = ("user",)
+
+
+@admin.register(LabParameter)
+class LabParameterAdmin(admin.ModelAdmin):
+    list_display = ("name", "unit", "reference_range")
+    search_fields = ("name",)
+
+
 @admin.register(HealthTip)
 class HealthTipAdmin(admin.ModelAdmin):
     list_display = ("title", "category", "is_active", "created_at")
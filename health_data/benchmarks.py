@@ -0,0 +1,383 @@
+import asyncio
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, timedelta
+from datetime import time as dt_time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .counters import unread_count_cache_key
+from .models import (
+    Appointment,
+    DailyActivity,
+    EmailOutbox,
+    Exercise,
+    HospitalRecord,
+    Medication,
+    MedicationReminderTime,
+    Message,
+    ScheduledReminder,
+    Sleep,
+    next_reminder_times,
+)
+from .rollups import rebuild_health_rollups
+from .tasks import check_medication_reminders, dispatch_due_reminders
+
+User = get_user_model()
+
+# Üretilen kullanıcılar bu önekle oluşturulur, böylece tekrar bulunup silinebilirler
+BENCHMARK_USER_PREFIX = "bench_"
+BENCHMARK_PASSWORD = "benchmark"
+BULK_BATCH_SIZE = 1000
+
+# Ölçülen senaryolar: görünümler (URL adı) ve hatırlatma görevleri
+VIEW_SCENARIOS = {
+    "dashboard": "core:dashboard",
+    "message_list": "health_data:message_list",
+    "hospital_record_list": "health_data:hospital_record_list",
+    "health_reports": "health_data:health_reports",
+}
+TASK_SCENARIOS = {
+    "check_medication_reminders": check_medication_reminders,
+    "dispatch_due_reminders": dispatch_due_reminders,
+}
+
+
+def benchmark_patients():
+    return User.objects.filter(username__startswith=f"{BENCHMARK_USER_PREFIX}patient_", is_doctor=False)
+
+
+def delete_benchmark_data():
+    """Üretilmiş kullanıcıları (ve cascade ile tüm verilerini) sil"""
+    deleted, _ = User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX).delete()
+    return deleted
+
+
+def generate_benchmark_data(patients=20, doctors=3, years=2, seed=1):
+    """Her hasta için birkaç yıllık egzersiz, uyku, ilaç, mesaj ve hastane kaydı geçmişi oluştur"""
+    rng = random.Random(seed)
+    today = date.today()
+    days = years * 365
+    password = make_password(BENCHMARK_PASSWORD)
+
+    users = User.objects.bulk_create(
+        [
+            User(
+                username=f"{BENCHMARK_USER_PREFIX}doctor_{i}",
+                email=f"{BENCHMARK_USER_PREFIX}doctor_{i}@example.com",
+                password=password,
+                is_doctor=True,
+            )
+            for i in range(doctors)
+        ]
+        + [
+            User(
+                username=f"{BENCHMARK_USER_PREFIX}patient_{i}",
+                email=f"{BENCHMARK_USER_PREFIX}patient_{i}@example.com",
+                password=password,
+            )
+            for i in range(patients)
+        ]
+    )
+    doctor_users, patient_users = users[:doctors], users[doctors:]
+
+    exercise_types = [value for value, _ in Exercise.EXERCISE_TYPES]
+    record_types = [value for value, _ in HospitalRecord.RECORD_TYPES]
+    rows = {model: [] for model in (Exercise, Sleep, Medication, Message, HospitalRecord, Appointment)}
+    daily_activities = []
+
+    for patient in patient_users:
+        for day in range(days):
+            current = today - timedelta(days=day)
+            rows[Sleep].append(
+                Sleep(
+                    user=patient,
+                    date=current,
+                    sleep_time=dt_time(rng.randint(21, 23), rng.choice((0, 30))),
+                    wake_time=dt_time(rng.randint(6, 8), rng.choice((0, 30))),
+                    quality=rng.randint(1, 5),
+                    duration=rng.choice((6, 6.5, 7, 7.5, 8, 8.5)),
+                )
+            )
+            if day % 2 == 0:
+                rows[Exercise].append(
+                    Exercise(
+                        user=patient,
+                        date=current,
+                        exercise_type=rng.choice(exercise_types),
+                        duration=rng.randint(15, 90),
+                        intensity=rng.randint(1, 10),
+                        calories_burned=rng.randint(50, 600),
+                    )
+                )
+            if day % 14 == 0:
+                rows[HospitalRecord].append(
+                    HospitalRecord(
+                        user=patient,
+                        record_type=rng.choice(record_types),
+                        date=current,
+                        title="Kontrol",
+                        description="-",
+                        results="-",
+                    )
+                )
+            if day % 3 == 0:
+                doctor = rng.choice(doctor_users)
+                sender, receiver = (doctor, patient) if day % 2 else (patient, doctor)
+                rows[Message].append(
+                    Message(sender=sender, receiver=receiver, subject="Kontrol", content="-", is_read=day > 30)
+                )
+            if day % 90 == 0:
+                rows[Appointment].append(
+                    Appointment(patient=patient, doctor=rng.choice(doctor_users), date=current, notification_sent=True)
+                )
+
+        for i in range(3):
+            start_date = today - timedelta(days=rng.randint(0, days))
+            rows[Medication].append(
+                Medication(
+                    user=patient,
+                    name=f"İlaç {i}",
+                    dosage="1 tablet",
+                    frequency="twice_daily",
+                    start_date=start_date,
+                    end_date=today + timedelta(days=rng.randint(0, 365)),
+                    # Saatler gün geneline yayılır, böylece her hatırlatma penceresinde ilaç bulunur
+                    reminder_times=[
+                        f"{minute // 60:02d}:{minute % 60:02d}" for minute in sorted(rng.sample(range(24 * 60), 2))
+                    ],
+                )
+            )
+        daily_activities.append(DailyActivity(user=patient, steps=rng.randint(1000, 15000), water_intake=2))
+
+    counts = {"users": len(users)}
+    with transaction.atomic():
+        for model, objects in rows.items():
+            model.objects.bulk_create(objects, batch_size=BULK_BATCH_SIZE)
+            counts[model._meta.model_name] = len(objects)
+        DailyActivity.objects.bulk_create(daily_activities, batch_size=BULK_BATCH_SIZE)
+
+        # bulk_create save() çağırmadığı için hatırlatma tabloları doğrudan doldurulur
+        medications = rows[Medication]
+        MedicationReminderTime.objects.bulk_create(
+            [
+                MedicationReminderTime(medication=medication, minute_of_day=minute)
+                for medication in medications
+                for minute in medication.get_reminder_minutes()
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        ScheduledReminder.objects.bulk_create(
+            [
+                ScheduledReminder(medication=medication, due_at=due_at)
+                for medication, due_at in next_reminder_times(medications)
+                if due_at
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        # Özet tabloları da sinyaller yerine tek seferde oluşturulur
+        counts["healthrollup"] = rebuild_health_rollups([user.id for user in patient_users])
+    return counts
+
+
+def summarize(latencies, elapsed):
+    """Gecikme listesinden (saniye) istek/saniye ve yüzdelik değerleri (ms) hesapla"""
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentiles[49] * 1000, 2),
+        "p95_ms": round(percentiles[94] * 1000, 2),
+        "p99_ms": round(percentiles[98] * 1000, 2),
+    }
+
+
+def login_cookies(users):
+    """Her kullanıcı için oturum açılmış çerezleri döndür"""
+    cookies = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        cookies.append(client.cookies)
+    return cookies
+
+
+def _split(total, concurrency):
+    return [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+
+
+def _check_response(url, response):
+    if response.status_code != 200:
+        raise RuntimeError(f"{url} returned {response.status_code}")
+
+
+def run_wsgi(url, cookies, concurrency, total):
+    """İstekleri WSGI gibi thread havuzunda, her thread'de senkron istemciyle gönder"""
+
+    def worker(index, count):
+        client = Client()
+        client.cookies = cookies[index % len(cookies)]
+        latencies = []
+        for _ in range(count):
+            started = time.perf_counter()
+            response = client.get(url)
+            latencies.append(time.perf_counter() - started)
+            _check_response(url, response)
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(worker, range(concurrency), _split(total, concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarize([latency for latencies in results for latency in latencies], elapsed)
+
+
+async def run_asgi(url, cookies, concurrency, total):
+    """İstekleri ASGI gibi tek olay döngüsünde eşzamanlı görevlerle gönder"""
+
+    async def worker(index, count):
+        client = AsyncClient()
+        client.cookies = cookies[index % len(cookies)]
+        latencies = []
+        for _ in range(count):
+            started = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - started)
+            _check_response(url, response)
+        return latencies
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(worker(i, count) for i, count in enumerate(_split(total, concurrency))))
+    elapsed = time.perf_counter() - started
+    return summarize([latency for latencies in results for latency in latencies], elapsed)
+
+
+def queries_per_request(url, cookies):
+    """Görünümün tek bir istekte çalıştırdığı sorgu sayısı (önbellekler ısındıktan sonra)"""
+    client = Client()
+    client.cookies = cookies[0]
+    client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        _check_response(url, client.get(url))
+    return len(queries)
+
+
+def run_view_scenario(url, cookies, concurrency, total, handler="wsgi"):
+    """Görünümü verilen istek işleyicisi altında yük testi yap (sorgu sayımı önbellekleri de ısıtır)"""
+    query_count = queries_per_request(url, cookies)
+    if handler == "asgi":
+        result = asyncio.run(run_asgi(url, cookies, concurrency, total))
+    else:
+        result = run_wsgi(url, cookies, concurrency, total)
+    result["queries_per_request"] = query_count
+    return result
+
+
+@contextmanager
+def restored_task_state():
+    """Blok içinde çalışan görevlerin yazdıklarını geri al: eklenen mesajlar ve emailler silinir,
+    hatırlatma kuyruğu eski haline getirilir ve etkilenen okunmamış mesaj sayaçları önbellekten silinir.
+
+    Eşzamanlı görevler ayrı bağlantılarda çalıştığı için tek bir işlemle geri alınamaz.
+    """
+    reminders = list(ScheduledReminder.objects.all())
+    last_ids = {model: model.objects.aggregate(last_id=Max("id"))["last_id"] or 0 for model in (Message, EmailOutbox)}
+    try:
+        yield
+    finally:
+        new_messages = Message.objects.filter(id__gt=last_ids[Message])
+        receivers = set(new_messages.values_list("receiver_id", flat=True))
+        with transaction.atomic():
+            # Mesajların silinme sinyali sayaçları da işlem sonunda azaltır
+            new_messages.delete()
+            EmailOutbox.objects.filter(id__gt=last_ids[EmailOutbox]).delete()
+            ScheduledReminder.objects.all().delete()
+            ScheduledReminder.objects.bulk_create(reminders, batch_size=BULK_BATCH_SIZE)
+        # Sayaçlar yine de silinir; bir sonraki okumada geri yüklenen veriden hesaplanır
+        cache.delete_many([unread_count_cache_key(user_id) for user_id in receivers])
+
+
+def run_task_scenario(task, iterations, concurrency=1):
+    """Görevi her turda `concurrency` eşzamanlı işçiyle çalıştır; her tur aynı veriyle başlar"""
+
+    def worker(_):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            task()
+            return time.perf_counter() - started, len(captured)
+
+    results = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(iterations):
+            with restored_task_state():
+                # Tüm kuyruk satırlarının zamanı gelmiş gibi davran
+                ScheduledReminder.objects.update(due_at=timezone.now() - timedelta(minutes=1))
+                results += executor.map(worker, range(concurrency))
+    result = summarize([latency for latency, _ in results], time.perf_counter() - started)
+    result["queries_per_request"] = round(statistics.mean(queries for _, queries in results), 1)
+    return result
+
+
+def build_benchmark_medications(count, seed=1):
+    """Veritabanına yazılmadan, gerçekçi dağılımda (haftalık, bitmiş, ileri tarihli) ilaç nesneleri oluştur"""
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    frequencies = [value for value, _ in Medication.FREQUENCY_CHOICES]
+    # Kullanıcıların çoğu varsayılan saatleri kullanır; geri kalanlar gün geneline dağılır
+    schedules = [["09:00"], ["09:00", "21:00"], ["09:00", "14:00", "21:00"], ["08:00", "12:00", "16:00", "20:00"]]
+    schedules += [
+        [f"{minute // 60:02d}:{minute % 60:02d}" for minute in sorted(rng.sample(range(24 * 60), 2))]
+        for _ in range(200)
+    ]
+    return [
+        Medication(
+            id=i + 1,
+            user_id=1,
+            frequency=rng.choice(frequencies),
+            start_date=today + timedelta(days=rng.randint(-365, 30)),
+            end_date=today + timedelta(days=rng.randint(-30, 365)) if rng.random() < 0.5 else None,
+            reminder_times=rng.choice(schedules),
+            is_active=rng.random() < 0.95,
+        )
+        for i in range(count)
+    ]
+
+
+def run_next_reminder_benchmark(count, baseline, seed=1):
+    """İlaç başına çalışan `baseline(medication, now)` ile toplu next_reminder_times hesabını karşılaştır.
+
+    Eski hesap başlangıç tarihini, haftalık sıklığı ve yarının bitiş tarihini dikkate almaz, günü de yerel
+    saate çevirmeden UTC'den alır. Bu yüzden sonuçlar bazı ilaçlarda bilerek farklıdır; bu ilaçların sayısı
+    `differing` olarak raporlanır.
+    """
+    medications = build_benchmark_medications(count, seed)
+    # Aynı an kullanılır, böylece iki sonuç birebir karşılaştırılabilir
+    now = timezone.now()
+
+    started = time.perf_counter()
+    per_object = [baseline(medication, now) for medication in medications]
+    per_object_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = [due_at for _, due_at in next_reminder_times(medications, now)]
+    batch_seconds = time.perf_counter() - started
+
+    return {
+        "medications": count,
+        "scheduled": sum(due_at is not None for due_at in batch),
+        "per_object_seconds": round(per_object_seconds, 3),
+        "batch_seconds": round(batch_seconds, 3),
+        "speedup": round(per_object_seconds / batch_seconds, 1),
+        "differing": sum(expected != due_at for expected, due_at in zip(per_object, batch)),
+    }
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Message
+
+# Sayaçlar paylaşılan önbellekte (Redis) tutulur ve saatlik mutabakat görevi tarafından düzeltilir;
+# süre yalnızca gözden kaçan bir sapmanın en fazla ne kadar yaşayacağını sınırlar
+UNREAD_COUNT_TIMEOUT = 60 * 60 * 24
+RECONCILE_BATCH_SIZE = 1000
+
+
+def unread_count_cache_key(user_id):
+    return f"unread_messages:{user_id}"
+
+
+def get_unread_count(user_id):
+    """Kullanıcının okunmamış mesaj sayısını önbellekten döndür (yoksa hesapla)"""
+    key = unread_count_cache_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Message.objects.filter(receiver_id=user_id, is_read=False).count()
+        cache.add(key, count, UNREAD_COUNT_TIMEOUT)
+    return max(count, 0)
+
+
+async def aget_unread_count(user_id):
+    """get_unread_count'un asenkron görünümler için sürümü"""
+    key = unread_count_cache_key(user_id)
+    count = await cache.aget(key)
+    if count is None:
+        count = await Message.objects.filter(receiver_id=user_id, is_read=False).acount()
+        await cache.aadd(key, count, UNREAD_COUNT_TIMEOUT)
+    return max(count, 0)
+
+
+def change_unread_count(user_id, delta):
+    """Sayacı işlem tamamlandıktan sonra atomik olarak artır/azalt (geri alınan işlemler sayacı bozmaz).
+
+    Sayaç henüz önbellekte yoksa ilk okumada hesaplanır.
+    """
+    key = unread_count_cache_key(user_id)
+
+    def apply():
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            pass
+
+    transaction.on_commit(apply)
+
+
+def increment_unread_counts(messages):
+    """Toplu oluşturulan (sinyal tetiklemeyen) mesajlar için alıcı sayaçlarını artır"""
+    deltas = {}
+    for message in messages:
+        if not message.is_read:
+            deltas[message.receiver_id] = deltas.get(message.receiver_id, 0) + 1
+    for user_id, delta in deltas.items():
+        change_unread_count(user_id, delta)
+
+
+def reconcile_unread_counts():
+    """Önbellekteki sayaçları veritabanındaki gerçek değerlerle karşılaştır, sapanları sil.
+
+    Silinen sayaç bir sonraki okumada veritabanından hesaplanır; böylece mutabakat sırasında gelen
+    artışlar eski bir değerle ezilmez. Düzeltilen sayaç sayısını döndürür.
+    """
+    users = get_user_model().objects.order_by("id")
+    last_id = 0
+    corrected = 0
+    while True:
+        batch = list(users.filter(id__gt=last_id).values_list("id", flat=True)[:RECONCILE_BATCH_SIZE])
+        if not batch:
+            break
+        keys = {user_id: unread_count_cache_key(user_id) for user_id in batch}
+        cached = cache.get_many(keys.values())
+        counts = dict(
+            Message.objects.filter(receiver_id__in=batch, is_read=False)
+            .values_list("receiver_id")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        drifted = [key for user_id, key in keys.items() if key in cached and cached[key] != counts.get(user_id, 0)]
+        cache.delete_many(drifted)
+        corrected += len(drifted)
+        last_id = batch[-1]
+    return corrected
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.urls import reverse
+
+from core.events import publish_event
+
+from .counters import get_unread_count
+
+
+def publish_new_messages(messages):
+    """Yeni mesajları ve güncel okunmamış mesaj sayısını alıcıların olay akışına gönder"""
+    for message in messages:
+        publish_event(
+            message.receiver_id,
+            "message",
+            {
+                "id": message.id,
+                "subject": message.subject,
+                "sender": message.sender.get_full_name() or message.sender.email,
+                "message_type": message.message_type,
+                "url": reverse("health_data:message_detail", args=[message.id]),
+            },
+        )
+
+    def publish_counts():
+        # Sayaçlar işlem tamamlandıktan sonra güncellendiği için sayı da o zaman okunur
+        for user_id in {message.receiver_id for message in messages}:
+            publish_event(user_id, "unread_count", {"count": get_unread_count(user_id)})
+
+    transaction.on_commit(publish_counts)
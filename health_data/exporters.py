@@ -0,0 +1,147 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+from .models import BloodTestResult, DailyActivity, Exercise, HospitalRecord, LabTestResult, Medication, Message, Sleep
+
+# Veritabanından bir seferde okunan ve tek parça olarak yazılan satır sayısı
+EXPORT_CHUNK_SIZE = 2000
+
+# tablo -> (model, sahip alan(lar)ı, dışa aktarılan alanlar)
+EXPORT_TABLES = {
+    "hospital_records": (
+        HospitalRecord,
+        ["user"],
+        ["id", "user_id", "record_type", "date", "title", "description", "results", "notes", "created_at"],
+    ),
+    "blood_test_results": (
+        BloodTestResult,
+        ["user"],
+        ["id", "hospital_record_id", "user_id", "date", "parameter", "value", "unit", "reference_range"]
+        + ["default_reference_range", "value_num", "ref_low", "ref_high", "is_abnormal"],
+    ),
+    "lab_test_results": (
+        LabTestResult,
+        ["hospital_record__user"],
+        ["id", "hospital_record_id", "test_name", "result", "interpretation"],
+    ),
+    "medications": (
+        Medication,
+        ["user"],
+        ["id", "user_id", "name", "dosage", "frequency", "custom_frequency", "start_date", "end_date"]
+        + ["reminder_times", "is_active", "notes", "created_at"],
+    ),
+    "exercises": (
+        Exercise,
+        ["user"],
+        ["id", "user_id", "date", "exercise_type", "duration", "intensity", "calories_burned", "notes"],
+    ),
+    "sleep": (
+        Sleep,
+        ["user"],
+        ["id", "user_id", "date", "sleep_time", "wake_time", "quality", "duration", "notes"],
+    ),
+    "daily_activities": (
+        DailyActivity,
+        ["user"],
+        ["id", "user_id", "date", "steps", "water_intake", "notes"],
+    ),
+    "messages": (
+        Message,
+        ["sender", "receiver"],
+        ["id", "sender_id", "receiver_id", "subject", "content", "message_type", "is_read", "created_at"]
+        + ["parent_message_id"],
+    ),
+}
+# Katalog alanları ilişkili tablodan okunur, dışa aktarımda metin olarak yer alır
+EXPORT_ANNOTATIONS = {
+    "blood_test_results": {
+        "parameter": F("lab_parameter__name"),
+        "unit": F("lab_parameter__unit"),
+        "default_reference_range": F("lab_parameter__reference_range"),
+    },
+}
+# biçim -> (içerik türü, dosya uzantısı)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "json": ("application/json", "json"),
+    "csv": ("text/csv", "csv"),
+}
+
+
+def export_queryset(table, users):
+    """Tablonun verilen kullanıcılara (id listesi veya queryset) ait satırları, alan sırasıyla"""
+    model, owners, fields = EXPORT_TABLES[table]
+    condition = Q()
+    for owner in owners:
+        condition |= Q(**{f"{owner}__in": users})
+    queryset = model.objects.filter(condition).annotate(**EXPORT_ANNOTATIONS.get(table, {}))
+    return queryset.order_by("id").values_list(*fields)
+
+
+def iter_rows(table, users):
+    fields = EXPORT_TABLES[table][2]
+    for values in export_queryset(table, users).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield dict(zip(fields, values))
+
+
+def _chunked(parts):
+    """Küçük parçaları EXPORT_CHUNK_SIZE'lık bloklar halinde birleştir (her satır ayrı yazılmaz)"""
+    chunk = []
+    for part in parts:
+        chunk.append(part)
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def _ndjson_parts(users, tables):
+    for table in tables:
+        for row in iter_rows(table, users):
+            yield json.dumps({"table": table, **row}, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def _json_parts(users, tables):
+    # {"tablo": [satırlar], ...} nesnesi parça parça yazılır
+    yield "{"
+    for index, table in enumerate(tables):
+        yield f"{',' if index else ''}{json.dumps(table)}: ["
+        for row_index, row in enumerate(iter_rows(table, users)):
+            yield ("," if row_index else "") + json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+        yield "]"
+    yield "}\n"
+
+
+class _Echo:
+    """csv.writer'ın yazdığı satırı geri döndüren sahte dosya"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_parts(users, table):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_TABLES[table][2])
+    for values in export_queryset(table, users).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        # Liste/sözlük alanları (ör. hatırlatma saatleri) JSON olarak yazılır
+        yield writer.writerow(
+            [json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value for value in values]
+        )
+
+
+def stream_export(users, file_format, tables):
+    """Kullanıcıların kayıtlarını tablo tablo okuyup metin parçaları üreten akış (bellek kullanımı sabit).
+
+    CSV tek bir tablo için üretilir; NDJSON satırları hangi tabloya ait olduklarını "table" alanında taşır.
+    """
+    if file_format == "csv":
+        if len(tables) != 1:
+            raise ValueError("CSV dışa aktarımı tek bir tablo için yapılabilir")
+        return _chunked(_csv_parts(users, tables[0]))
+    if file_format == "json":
+        return _chunked(_json_parts(users, tables))
+    return _chunked(_ndjson_parts(users, tables))
@@ -5,6 +5,7 @@ from django.contrib.auth import get_user_model
 from django.forms import inlineformset_factory
 from django.utils import timezone
 
+from .labs import lab_parameters
 from .models import (
     Appointment,
     BloodTestResult,
@@ -16,6 +17,8 @@ from .models import (
     Medication,
     Message,
     Sleep,
+    format_minute_of_day,
+    parse_reminder_time,
 )
 
 
@@ -91,14 +94,12 @@ class MedicationForm(forms.ModelForm):
         if not value:
             return []
         times = [t.strip() for t in value.split(",") if t.strip()]
-        # Basit saat formatı kontrolü
-        for t in times:
-            try:
-                hour, minute = map(int, t.split(":"))
-                assert 0 <= hour < 24 and 0 <= minute < 60
-            except Exception:
-                raise forms.ValidationError("Saatler HH:MM formatında olmalı (örn: 19:51)")
-        return times
+        # Saatleri doğrula, tekrarları at ve HH:MM biçiminde sırala
+        try:
+            minutes = sorted({parse_reminder_time(t) for t in times})
+        except ValueError:
+            raise forms.ValidationError("Saatler HH:MM formatında olmalı (örn: 19:51)")
+        return [format_minute_of_day(minute) for minute in minutes]
 
     def save(self, commit=True):
         instance = super().save(commit=False)
@@ -233,12 +234,33 @@ class HospitalRecordForm(forms.ModelForm):
         }
 
 
+class BloodTestResultForm(forms.ModelForm):
+    """Parametre adı ve birimi metin olarak girilir; katalogdaki kayda süreç içi önbellekten eşlenir"""
+
+    parameter = forms.CharField(label="Parametre", max_length=100)
+    unit = forms.CharField(label="Birim", max_length=20, required=False)
+
+    field_order = ["parameter", "value", "unit", "reference_range", "is_abnormal"]
+
+    class Meta:
+        model = BloodTestResult
+        fields = ["value", "reference_range", "is_abnormal"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Mevcut sonuçların parametreleri satır başına sorgu yapılmadan katalogdan okunur
+        if self.instance.lab_parameter_id:
+            lab_parameter = lab_parameters.by_id(self.instance.lab_parameter_id)
+            self.initial.setdefault("parameter", lab_parameter.name)
+            self.initial.setdefault("unit", lab_parameter.unit)
+
+    def save(self, commit=True):
+        self.instance.lab_parameter = lab_parameters.get(self.cleaned_data["parameter"], self.cleaned_data["unit"])
+        return super().save(commit)
+
+
 BloodTestResultFormSet: Type[forms.models.BaseInlineFormSet] = inlineformset_factory(
-    HospitalRecord,
-    BloodTestResult,
-    fields=["parameter", "value", "unit", "reference_range", "is_abnormal"],
-    extra=1,
-    can_delete=True,
+    HospitalRecord, BloodTestResult, form=BloodTestResultForm, extra=1, can_delete=True
 )
 
 LabTestResultFormSet: Type[forms.models.BaseInlineFormSet] = inlineformset_factory(
@@ -264,6 +286,28 @@ class DailyActivityForm(forms.ModelForm):
         }
 
 
+class DailyActivityImportForm(DailyActivityForm):
+    """İçe aktarılan günlük aktivite satırları; tarih dosyadan gelir"""
+
+    class Meta(DailyActivityForm.Meta):
+        fields = ["date", "steps", "water_intake", "notes"]
+
+
+class HealthDataImportForm(forms.Form):
+    """Giyilebilir cihaz dışa aktarımlarını (CSV/JSON) yükleme formu"""
+
+    kind = forms.ChoiceField(
+        label="Veri Türü",
+        choices=(("exercise", "Egzersiz"), ("sleep", "Uyku"), ("activity", "Günlük Aktivite")),
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    file = forms.FileField(
+        label="Dosya",
+        help_text="CSV (başlık satırlı), JSON dizi veya satır başına bir JSON nesnesi (NDJSON)",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".csv,.json,.ndjson,.jsonl"}),
+    )
+
+
 class AppointmentForm(forms.ModelForm):
     """Randevu formu"""
 
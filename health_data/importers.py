@@ -0,0 +1,219 @@
+import csv
+import datetime
+import json
+import re
+
+from django import forms
+from django.db import transaction
+
+from core.snapshots import invalidate_snapshot_section
+
+from .forms import DailyActivityImportForm, ExerciseForm, SleepForm
+from .models import DailyActivity, Exercise, Sleep
+from .rollups import refresh_health_rollups
+
+IMPORT_BATCH_SIZE = 1000
+# Bozuk büyük dosyalarda belleğin dolmaması için raporlanan hata sayısı sınırlıdır
+MAX_REPORTED_ERRORS = 50
+JSON_READ_SIZE = 64 * 1024
+# JSON dizisindeki elemanlar arasındaki boşluk ve virgüller
+JSON_SEPARATORS = re.compile(r"[\s,]*")
+
+# Her veri türü elle girişteki formla doğrulanır; aynı anahtara sahip mevcut kayıtlar güncellenir
+IMPORT_KINDS = {
+    "exercise": {
+        "form": ExerciseForm,
+        "model": Exercise,
+        "key": ("date", "exercise_type"),
+        "update_fields": ["duration", "intensity", "calories_burned", "notes"],
+        "section": "exercise",
+    },
+    "sleep": {
+        "form": SleepForm,
+        "model": Sleep,
+        "key": ("date",),
+        "update_fields": ["sleep_time", "wake_time", "quality", "duration", "notes"],
+        "section": "sleep",
+    },
+    "activity": {
+        "form": DailyActivityImportForm,
+        "model": DailyActivity,
+        "key": ("date",),
+        "update_fields": ["steps", "water_intake", "notes", "updated_at"],
+        "section": "daily_activity",
+    },
+}
+FILE_FORMATS = {"csv": "csv", "json": "json", "ndjson": "ndjson", "jsonl": "ndjson"}
+
+
+def detect_format(filename):
+    """Dosya uzantısından biçimi bul (desteklenmiyorsa None)"""
+    return FILE_FORMATS.get(filename.rsplit(".", 1)[-1].lower())
+
+
+def iter_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+def iter_ndjson(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_json_array(stream):
+    """JSON dizisini tamamını belleğe almadan eleman eleman oku"""
+    decoder = json.JSONDecoder()
+    buffer, position, started = "", 0, False
+    while True:
+        chunk = stream.read(JSON_READ_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            position = JSON_SEPARATORS.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("JSON dosyası bir dizi olmalı")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                # Eleman parçanın sonunda bölünmüş, devamı okunur
+                break
+            yield item
+        if not chunk:
+            if started:
+                raise ValueError("JSON dizisi kapanmamış")
+            return
+
+
+ROW_READERS = {"csv": iter_csv, "json": iter_json_array, "ndjson": iter_ndjson}
+
+
+class RowValidator:
+    """Satırları elle girişteki formun kurallarıyla doğrular; her satır için yeni bir form oluşturulur"""
+
+    def __init__(self, form_class):
+        self.form_class = form_class
+        # ISO biçimindeki tarih/saatler yerel biçimler denenmeden doğrudan çevrilir
+        self.iso_parsers = {
+            name: (datetime.date.fromisoformat if isinstance(field, forms.DateField) else datetime.time.fromisoformat)
+            for name, field in form_class.base_fields.items()
+            if isinstance(field, (forms.DateField, forms.TimeField))
+        }
+
+    def _parse_iso(self, row):
+        for name, parse in self.iso_parsers.items():
+            value = row.get(name)
+            if isinstance(value, str):
+                try:
+                    row[name] = parse(value)
+                except ValueError:
+                    # Form kendi (yerel) biçimlerini dener
+                    pass
+        return row
+
+    def validate(self, row, user):
+        """(kayıt, hatalar) döndür"""
+        if not isinstance(row, dict):
+            return None, ["Kayıt bir nesne olmalı"]
+
+        form = self.form_class(data=self._parse_iso(row))
+        if not form.is_valid():
+            return None, [f"{field}: {' '.join(errors)}" for field, errors in form.errors.items()]
+
+        instance = form.instance
+        instance.user = user
+        # Formun hesapladığı ama form alanı olmayan değerler (ör. uyku süresi)
+        for field, value in form.cleaned_data.items():
+            if field not in form.fields:
+                setattr(instance, field, value)
+        return instance, None
+
+
+def _write_batch(spec, user, batch, result):
+    """Grubu tek işlemde yaz; mevcut anahtarlara sahip kayıtlar birincil anahtar üzerinden güncellenir"""
+    model, key_fields = spec["model"], spec["key"]
+    with transaction.atomic():
+        existing = {}
+        rows = (
+            model.objects.filter(user=user, date__in={instance.date for instance in batch.values()})
+            .order_by("id")
+            .values("id", *key_fields)
+        )
+        for row in rows:
+            existing.setdefault(tuple(row[field] for field in key_fields), row["id"])
+
+        updated = 0
+        for key, instance in batch.items():
+            if key in existing:
+                instance.pk = existing[key]
+                updated += 1
+
+        # bulk_update her alan için CASE ifadesi ürettiğinden yavaştır; INSERT ... ON CONFLICT (id)
+        # yeni kayıtları ekler, mevcutları tek sorguda günceller
+        model.objects.bulk_create(
+            batch.values(),
+            batch_size=IMPORT_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=spec["update_fields"],
+        )
+
+    # Toplu yazma sinyalleri tetiklemez; yalnızca bu grubun günlerinin özetleri güncellenir
+    refresh_health_rollups(model.__name__, user.id, {instance.date for instance in batch.values()})
+    result["created"] += len(batch) - updated
+    result["updated"] += updated
+
+
+def import_health_data(user, kind, stream, file_format):
+    """Dosyadaki kayıtları akış halinde doğrulayıp gruplar halinde toplu olarak yaz ve özet döndür.
+
+    Aynı dosyada tekrar eden anahtarlardan sonuncusu geçerlidir. Okunamayan dosyada o ana kadar
+    yazılan gruplar korunur ve hata olarak raporlanır; aynı dosya tekrar içe aktarılabilir.
+    """
+    spec = IMPORT_KINDS[kind]
+    result = {"rows": 0, "created": 0, "updated": 0, "invalid": 0, "errors": []}
+
+    def report(number, errors):
+        if len(result["errors"]) < MAX_REPORTED_ERRORS:
+            result["errors"].append({"row": number, "errors": errors})
+
+    validator = RowValidator(spec["form"])
+    batch = {}
+    rows = ROW_READERS[file_format](stream)
+    while True:
+        try:
+            row = next(rows)
+        except StopIteration:
+            break
+        except (ValueError, csv.Error) as e:
+            # JSON/CSV sözdizimi veya kodlama hatası: dosyanın geri kalanı okunamaz
+            report(result["rows"] + 1, [f"Dosya okunamadı: {e}"])
+            break
+
+        result["rows"] += 1
+        instance, errors = validator.validate(row, user)
+        if errors:
+            result["invalid"] += 1
+            report(result["rows"], errors)
+            continue
+
+        batch[tuple(getattr(instance, field) for field in spec["key"])] = instance
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            _write_batch(spec, user, batch, result)
+            batch = {}
+    if batch:
+        _write_batch(spec, user, batch, result)
+
+    if result["created"] or result["updated"]:
+        invalidate_snapshot_section(user.id, spec["section"])
+    return result
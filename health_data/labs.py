@@ -0,0 +1,169 @@
+import re
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.apps import apps as django_apps
+from django.db.models import F
+
+LAB_BACKFILL_BATCH_SIZE = 1000
+# Süreç içi katalog kopyasının en uzun kullanım süresi (diğer süreçlerde yapılan değişiklikler için)
+LAB_CATALOGUE_TTL = 300
+
+NUMBER = r"([-−]?\d+(?:[.,]\d+)?)"
+# Sayıdan sonra gelebilen birim/açıklama metni ("mg/dL", "%", "(açlık)"); üs veya çarpan ("e9", "x 10^9"),
+# ikinci bir sayı ya da aralık ayracıyla başlayamaz
+UNIT = r"(?:\s*(?![eE][+-]?\d|[xX×*]\s*\d)[^\d\s.,+\-−–—].*)?"
+# "5.6", "5,6", "-5", "12 mg/dL"; metnin tamamı okunabilmeli
+VALUE_PATTERN = re.compile(rf"\s*{NUMBER}{UNIT}\s*", re.DOTALL)
+# "4.0-5.6", "4,0 – 5,6 mg/dL", "-2 - 2"
+RANGE_PATTERN = re.compile(rf"\s*{NUMBER}\s*[-–—]\s*{NUMBER}{UNIT}\s*", re.DOTALL)
+# "<5.7", "≤ 200" (yalnızca üst sınır) ve ">40", "≥ 40" (yalnızca alt sınır)
+UPPER_PATTERN = re.compile(rf"\s*(?:<=?|≤)\s*{NUMBER}{UNIT}\s*", re.DOTALL)
+LOWER_PATTERN = re.compile(rf"\s*(?:>=?|≥)\s*{NUMBER}{UNIT}\s*", re.DOTALL)
+# value_num, ref_low ve ref_high DecimalField(max_digits=12, decimal_places=4): en fazla 8 tam basamak
+MAX_LAB_VALUE = Decimal("1e8")
+
+
+def _to_decimal(text):
+    try:
+        value = Decimal(text.replace(",", ".").replace("−", "-"))
+    except InvalidOperation:
+        return None
+    return value if abs(value) < MAX_LAB_VALUE else None
+
+
+def parse_lab_value(text):
+    """Sonuç metnindeki sayıyı döndür.
+
+    Sayısal olmayan ("Pozitif"), sayıdan sonra birim dışında metin içeren ("1.2e9", "4.0-5.6"),
+    ölçüm sınırının ötesinde kalan ("<5", ">200") veya saklanamayacak kadar büyük sonuçlarda None döner.
+    """
+    match = VALUE_PATTERN.fullmatch(text or "")
+    return _to_decimal(match.group(1)) if match else None
+
+
+def parse_reference_range(text):
+    """Referans aralığı metnini (alt, üst) sınırlara çevir; bilinmeyen sınır None"""
+    text = text or ""
+    if match := RANGE_PATTERN.fullmatch(text):
+        return _to_decimal(match.group(1)), _to_decimal(match.group(2))
+    if match := UPPER_PATTERN.fullmatch(text):
+        return None, _to_decimal(match.group(1))
+    if match := LOWER_PATTERN.fullmatch(text):
+        return _to_decimal(match.group(1)), None
+    return None, None
+
+
+def lab_parameter_key(name, unit):
+    """Katalog eşleştirme anahtarı: ad büyük/küçük harf ve boşluk farkı gözetilmeden karşılaştırılır"""
+    return " ".join(name.split()).casefold(), unit.strip()
+
+
+class LabParameterCatalogue:
+    """Laboratuvar parametre kataloğunun süreç içi kopyası.
+
+    Katalog küçüktür ve nadiren değişir; tamamı ilk kullanımda tek sorguda okunur ve LAB_CATALOGUE_TTL
+    saniyede bir tazelenir. Bulunamayan bir kayıt için önce katalog yeniden okunur (başka bir süreç
+    eklemiş olabilir), yine yoksa eklenir. Yeniden okumadan sonra da bulunamayan aramalar katalog
+    tazelenene kadar hatırlanır; aynı aramalar her seferinde kataloğu yeniden okumaz.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._entries = None
+        self._loaded_at = 0.0
+        self._misses = set()
+
+    def _load(self):
+        LabParameter = django_apps.get_model("health_data", "LabParameter")
+        parameters = list(LabParameter.objects.all())
+        self._entries = (
+            {lab_parameter_key(parameter.name, parameter.unit): parameter for parameter in parameters},
+            {parameter.id: parameter for parameter in parameters},
+        )
+        self._loaded_at = time.monotonic()
+        return self._entries
+
+    def _find(self, lookup, match):
+        if self._entries is None or time.monotonic() - self._loaded_at >= LAB_CATALOGUE_TTL:
+            self._misses = set()
+        else:
+            found = match(self._entries)
+            if found or lookup in self._misses:
+                return found
+        found = match(self._load())
+        if not found:
+            self._misses.add(lookup)
+        return found
+
+    def get(self, name, unit=""):
+        """Ad ve birime karşılık gelen katalog kaydı (yoksa oluşturulur)"""
+        key = lab_parameter_key(name, unit)
+        parameter = self._find(("key", key), lambda entries: entries[0].get(key))
+        if parameter is None:
+            LabParameter = django_apps.get_model("health_data", "LabParameter")
+            # Kayıt sinyali süreç içi kataloğu temizler; sonraki arama yeni kaydı da okur
+            parameter, _ = LabParameter.objects.get_or_create(name=" ".join(name.split()), unit=key[1])
+        return parameter
+
+    def by_id(self, pk):
+        parameter = self._find(("id", pk), lambda entries: entries[1].get(pk))
+        if parameter is None:
+            raise django_apps.get_model("health_data", "LabParameter").DoesNotExist(pk)
+        return parameter
+
+    def by_name(self, name):
+        """Ada sahip tüm katalog kayıtları (farklı birimlerle kaydedilmiş olabilir)"""
+        name_key = lab_parameter_key(name, "")[0]
+        return self._find(
+            ("name", name_key),
+            lambda entries: [parameter for (key, _), parameter in entries[0].items() if key == name_key],
+        )
+
+
+lab_parameters = LabParameterCatalogue()
+
+
+def apply_lab_values(result, default_range=""):
+    """Sonucun sayısal alanlarını metinlerden doldur ve anormallik durumunu hesapla.
+
+    Sonuçta referans aralığı yoksa parametrenin varsayılan aralığı kullanılır. Sayısal olmayan veya
+    referans aralığı okunamayan sonuçlarda elle girilen is_abnormal korunur.
+    """
+    result.value_num = parse_lab_value(result.value)
+    result.ref_low, result.ref_high = parse_reference_range(result.reference_range or default_range)
+    if result.value_num is not None and (result.ref_low is not None or result.ref_high is not None):
+        result.is_abnormal = (result.ref_low is not None and result.value_num < result.ref_low) or (
+            result.ref_high is not None and result.value_num > result.ref_high
+        )
+    return result
+
+
+def backfill_lab_values(**filters):
+    """Kan testi sonuçlarının sayısal alanlarını ve kayıttan kopyalanan hasta/tarih alanlarını doldur.
+
+    Sonuçlar id sırasıyla gruplar halinde okunur (tablo açık bir imleçle gezilirken güncellenmez).
+    """
+    BloodTestResult = django_apps.get_model("health_data", "BloodTestResult")
+    results = (
+        BloodTestResult.objects.filter(**filters)
+        .order_by("id")
+        .annotate(
+            record_user_id=F("hospital_record__user_id"),
+            record_date=F("hospital_record__date"),
+            default_range=F("lab_parameter__reference_range"),
+        )
+        .only("id", "value", "reference_range", "is_abnormal")
+    )
+
+    updated, last_id = 0, 0
+    while batch := list(results.filter(id__gt=last_id)[:LAB_BACKFILL_BATCH_SIZE]):
+        for result in batch:
+            apply_lab_values(result, result.default_range)
+            result.user_id, result.date = result.record_user_id, result.record_date
+        BloodTestResult.objects.bulk_update(batch, ["value_num", "ref_low", "ref_high", "is_abnormal", "user", "date"])
+        updated += len(batch)
+        last_id = batch[-1].id
+    return updated
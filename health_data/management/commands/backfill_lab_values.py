@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from health_data.labs import backfill_lab_values
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-parses blood test values and reference ranges into numeric columns, recomputes abnormal flags "
+        "and copies patient/date from the hospital record"
+    )
+
+    def handle(self, *args, **options):
+        updated = backfill_lab_values()
+        self.stdout.write(self.style.SUCCESS(f"{updated} blood test result(s) updated"))
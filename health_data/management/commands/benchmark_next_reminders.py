@@ -0,0 +1,60 @@
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from health_data.benchmarks import run_next_reminder_benchmark
+
+
+def per_medication_next_reminder_time(medication, now):
+    """d9f32b5'teki Medication.get_next_reminder_time, karşılaştırma için olduğu gibi korunur.
+
+    Yalnızca iki değişiklik vardır: `self` yerine `medication` alınır ve iki hesap aynı anı kullansın diye
+    `now = timezone.now()` satırı kaldırılıp `now` parametre olarak verilir.
+    """
+    if not medication.reminder_times or not medication.is_active:
+        return None
+
+    if medication.end_date and now.date() > medication.end_date:
+        return None
+
+    # Bugünün hatırlatma saatlerini kontrol et
+    today_reminders = []
+    for reminder_time in medication.reminder_times:
+        hour, minute = map(int, reminder_time.split(":"))
+        reminder_datetime = timezone.make_aware(datetime.combine(now.date(), time(hour, minute)))
+        if reminder_datetime > now:
+            today_reminders.append(reminder_datetime)
+
+    if today_reminders:
+        return min(today_reminders)
+
+    # Bugün için hatırlatma kalmadıysa, yarının ilk hatırlatmasını döndür
+    tomorrow = now.date() + timedelta(days=1)
+    hour, minute = map(int, medication.reminder_times[0].split(":"))
+    return timezone.make_aware(datetime.combine(tomorrow, time(hour, minute)))
+
+
+class Command(BaseCommand):
+    help = "Compares per-medication and batch next reminder time computation on in-memory medications"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--medications", type=int, default=100_000, help="Number of medications")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **options):
+        if options["medications"] < 1:
+            raise CommandError("--medications must be at least 1")
+
+        result = run_next_reminder_benchmark(options["medications"], per_medication_next_reminder_time, options["seed"])
+        if options["json"]:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+
+        self.stdout.write(
+            f"medications={result['medications']} scheduled={result['scheduled']} "
+            f"per_object={result['per_object_seconds']}s batch={result['batch_seconds']}s "
+            f"speedup={result['speedup']}x differing={result['differing']}"
+        )
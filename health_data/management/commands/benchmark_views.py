@@ -0,0 +1,59 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from health_data.benchmarks import login_cookies, run_view_scenario
+
+DEFAULT_VIEWS = [
+    "core:dashboard",
+    "health_data:message_list",
+    "health_data:medication_list",
+    "health_data:exercise_list",
+    "health_data:sleep_list",
+    "health_data:appointment_list",
+]
+
+
+class Command(BaseCommand):
+    help = "Compares view latency under concurrent load between the WSGI and ASGI request handlers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", type=str, help="User the requests are made as")
+        parser.add_argument("--concurrency", type=int, default=10, help="Concurrent clients")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per view and handler")
+        parser.add_argument("--view", action="append", dest="views", help="URL name to benchmark (repeatable)")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **options):
+        concurrency = options["concurrency"]
+        total = options["requests"]
+        if total < 2 or concurrency < 1:
+            raise CommandError("--requests must be at least 2 and --concurrency at least 1")
+
+        try:
+            user = get_user_model().objects.get(username=options["username"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist')
+
+        # Tüm istemciler aynı oturumu kullanır
+        cookies = login_cookies([user])
+
+        results = []
+        for name in options["views"] or DEFAULT_VIEWS:
+            url = reverse(name)
+            for handler in ("wsgi", "asgi"):
+                result = run_view_scenario(url, cookies, concurrency, total, handler)
+                results.append({"view": name, "handler": handler, "concurrency": concurrency, **result})
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for result in results:
+            self.stdout.write(
+                f"{result['view']:<30} {result['handler']}  req/s={result['throughput']:<8} "
+                f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+                f"queries={result['queries_per_request']}"
+            )
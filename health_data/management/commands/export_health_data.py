@@ -0,0 +1,54 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from health_data.exporters import EXPORT_FORMATS, EXPORT_TABLES, stream_export
+
+
+class Command(BaseCommand):
+    help = "Streams the health records of one, several or all patients as NDJSON, JSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", action="append", dest="usernames", help="Patient to export (repeatable, default: all patients)"
+        )
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson", help="Output format")
+        parser.add_argument("--table", choices=EXPORT_TABLES, help="Export a single table (default: all tables)")
+        parser.add_argument(
+            "--output",
+            help="Output file (default: standard output); for CSV without --table, a directory with one file per table",
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options["usernames"]:
+            users = User.objects.filter(username__in=options["usernames"])
+            missing = set(options["usernames"]) - set(users.values_list("username", flat=True))
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+        else:
+            users = User.objects.filter(is_doctor=False)
+        # Kullanıcı listesi belleğe alınmaz; her tablo sorgusunda alt sorgu olarak kullanılır
+        users = users.values("id")
+
+        file_format, table = options["format"], options["table"]
+        tables = [table] if table else list(EXPORT_TABLES)
+        if file_format == "csv" and not table:
+            if not options["output"]:
+                raise CommandError("CSV export of all tables needs --output DIRECTORY")
+            os.makedirs(options["output"], exist_ok=True)
+            for name in tables:
+                self._write(users, file_format, [name], os.path.join(options["output"], f"{name}.csv"))
+        else:
+            self._write(users, file_format, tables, options["output"])
+
+    def _write(self, users, file_format, tables, path):
+        chunks = stream_export(users, file_format, tables)
+        if path is None:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+        with open(path, "w", encoding="utf-8", newline="") as output:
+            output.writelines(chunks)
+        self.stderr.write(self.style.SUCCESS(f"Wrote {path}"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from health_data.benchmarks import delete_benchmark_data, generate_benchmark_data
+
+
+class Command(BaseCommand):
+    help = "Creates benchmark patients and doctors with years of health data history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--patients", type=int, default=20, help="Number of patients")
+        parser.add_argument("--doctors", type=int, default=3, help="Number of doctors")
+        parser.add_argument("--years", type=int, default=2, help="Years of history per patient")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed for reproducible data")
+        parser.add_argument("--reset", action="store_true", help="Delete previously generated benchmark data first")
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            deleted = delete_benchmark_data()
+            self.stdout.write(f"Deleted {deleted} existing benchmark row(s)")
+
+        counts = generate_benchmark_data(
+            patients=options["patients"], doctors=options["doctors"], years=options["years"], seed=options["seed"]
+        )
+        for name, count in counts.items():
+            self.stdout.write(f"{name}: {count}")
+        self.stdout.write(self.style.SUCCESS("Benchmark data generated"))
@@ -0,0 +1,44 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from health_data.importers import FILE_FORMATS, IMPORT_KINDS, detect_format, import_health_data
+
+
+class Command(BaseCommand):
+    help = "Imports exercise, sleep or daily activity rows for a user from a CSV, JSON or NDJSON export"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", type=str, help="User the rows belong to")
+        parser.add_argument("path", type=str, help="File to import, or - for standard input")
+        parser.add_argument("--kind", choices=IMPORT_KINDS, required=True, help="Type of the rows in the file")
+        parser.add_argument(
+            "--format", choices=sorted(set(FILE_FORMATS.values())), help="File format (default: from extension)"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options["username"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist')
+
+        file_format = options["format"] or detect_format(options["path"])
+        if file_format is None:
+            raise CommandError("Could not detect the file format, use --format")
+
+        if options["path"] == "-":
+            result = import_health_data(user, options["kind"], sys.stdin, file_format)
+        else:
+            # utf-8-sig: bazı cihaz uygulamaları CSV dosyalarının başına BOM ekler
+            with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+                result = import_health_data(user, options["kind"], stream, file_format)
+
+        for error in result["errors"]:
+            self.stderr.write(f"row {error['row']}: {'; '.join(error['errors'])}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result['rows']} row(s) read: {result['created']} created, {result['updated']} updated, "
+                f"{result['invalid']} invalid"
+            )
+        )
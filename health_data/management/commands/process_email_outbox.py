@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from health_data.utils import OUTBOX_BATCH_SIZE, send_outbox_batch
+
+
+class Command(BaseCommand):
+    help = "Sends pending emails from the outbox in batches over a single SMTP connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Emails per batch", default=OUTBOX_BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches", default=None)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        max_batches = options["max_batches"]
+
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            metrics = send_outbox_batch(batch_size)
+            if not metrics["claimed"]:
+                break
+            batches += 1
+            self.stdout.write(
+                f"Batch {batches}: sent={metrics['sent']} retried={metrics['retried']} "
+                f"failed={metrics['failed']} duration_ms={metrics['duration_ms']}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {batches} outbox batch(es)"))
@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from health_data.rollups import rebuild_health_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the daily, weekly and monthly health rollups from raw exercise, sleep and activity rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", dest="usernames", help="Only rebuild this user (repeatable)")
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options["usernames"]:
+            users = get_user_model().objects.filter(username__in=options["usernames"])
+            user_ids = list(users.values_list("id", flat=True))
+            if len(user_ids) != len(set(options["usernames"])):
+                raise CommandError("Some of the given users do not exist")
+
+        created = rebuild_health_rollups(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"{created} rollup row(s) written"))
@@ -0,0 +1,117 @@
+import json
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from health_data.benchmarks import (
+    TASK_SCENARIOS,
+    VIEW_SCENARIOS,
+    benchmark_patients,
+    login_cookies,
+    run_task_scenario,
+    run_view_scenario,
+)
+
+COMPARED_METRICS = ("throughput", "p50_ms", "p95_ms", "p99_ms", "queries_per_request")
+
+
+def current_commit():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=settings.BASE_DIR, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+class Command(BaseCommand):
+    help = "Runs the benchmark scenarios against generated benchmark data and reports latency percentiles as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            choices=[*VIEW_SCENARIOS, *TASK_SCENARIOS],
+            help="Scenario to run (repeatable, default: all)",
+        )
+        parser.add_argument("--handler", choices=("wsgi", "asgi"), default="wsgi", help="Request handler for views")
+        parser.add_argument("--concurrency", type=int, default=10, help="Concurrent clients for view scenarios")
+        parser.add_argument(
+            "--task-concurrency", type=int, default=1, help="Concurrent workers running each task scenario"
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Requests per view scenario")
+        parser.add_argument("--task-iterations", type=int, default=20, help="Runs per task scenario")
+        parser.add_argument("--output", type=str, help="Write the JSON report to this file")
+        parser.add_argument("--compare", type=str, help="Earlier JSON report to compare against")
+
+    def handle(self, *args, **options):
+        concurrency, task_concurrency = options["concurrency"], options["task_concurrency"]
+        if options["requests"] < 2 or options["task_iterations"] < 2 or min(concurrency, task_concurrency) < 1:
+            raise CommandError(
+                "--requests and --task-iterations must be at least 2, --concurrency and --task-concurrency at least 1"
+            )
+
+        if task_concurrency > 1 and connection.vendor == "sqlite":
+            # SQLite aynı anda tek yazıcıya izin verir; eşzamanlı görevler "database is locked" hatası alır
+            raise CommandError("--task-concurrency above 1 needs a database with concurrent writers (e.g. PostgreSQL)")
+
+        # Her eşzamanlı istemci farklı bir hasta olarak oturum açar
+        patients = list(benchmark_patients().order_by("id")[:concurrency])
+        if not patients:
+            raise CommandError("No benchmark data found, run generate_benchmark_data first")
+        cookies = login_cookies(patients)
+
+        report = {
+            "commit": current_commit(),
+            "created_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "handler": options["handler"],
+            "concurrency": concurrency,
+            "task_concurrency": task_concurrency,
+            "patients": benchmark_patients().count(),
+            "scenarios": {},
+        }
+        for name in options["scenarios"] or [*VIEW_SCENARIOS, *TASK_SCENARIOS]:
+            if name in VIEW_SCENARIOS:
+                result = run_view_scenario(
+                    reverse(VIEW_SCENARIOS[name]), cookies, concurrency, options["requests"], options["handler"]
+                )
+            else:
+                result = run_task_scenario(TASK_SCENARIOS[name], options["task_iterations"], task_concurrency)
+            report["scenarios"][name] = result
+            self.stderr.write(
+                f"{name:<28} req/s={result['throughput']:<8} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                f"p99={result['p99_ms']}ms queries={result['queries_per_request']}"
+            )
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if options["compare"]:
+            self.compare(options["compare"], report)
+
+    def compare(self, path, report):
+        with open(path) as f:
+            baseline = json.load(f)
+
+        self.stderr.write(f"\nCompared to {baseline.get('commit') or path}:")
+        for name, result in report["scenarios"].items():
+            previous = baseline["scenarios"].get(name)
+            if previous is None:
+                continue
+            changes = []
+            for metric in COMPARED_METRICS:
+                before, after = previous.get(metric), result[metric]
+                if before:
+                    changes.append(f"{metric}={before}->{after} ({(after - before) / before * 100:+.1f}%)")
+            self.stderr.write(f"{name:<28} " + " ".join(changes))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def delete_medication_periodic_tasks(apps, schema_editor):
+    """İlaç başına oluşturulan eski Celery Beat görevlerini temizle"""
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+    PeriodicTask.objects.filter(name__startswith="medication_reminder_").delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("health_data", "0003_motivationvideo"),
+        ("django_celery_beat", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduledReminder",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("due_at", models.DateTimeField(db_index=True, verbose_name="Hatırlatma Zamanı")),
+                (
+                    "medication",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="scheduled_reminder",
+                        to="health_data.medication",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Zamanlanmış Hatırlatma",
+                "verbose_name_plural": "Zamanlanmış Hatırlatmalar",
+                "ordering": ["due_at"],
+            },
+        ),
+        migrations.RunPython(delete_medication_periodic_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:12
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_reminder_times(apps, schema_editor):
+    """Medication.reminder_times JSON alanındaki saatleri MedicationReminderTime tablosuna taşı"""
+    Medication = apps.get_model("health_data", "Medication")
+    MedicationReminderTime = apps.get_model("health_data", "MedicationReminderTime")
+
+    entries = []
+    for medication_id, reminder_times in Medication.objects.values_list("id", "reminder_times").iterator():
+        minutes = set()
+        for reminder_time in reminder_times or []:
+            try:
+                hour, minute = map(int, str(reminder_time).split(":"))
+            except ValueError:
+                # Geçersiz saat formatı, bu saati atla
+                continue
+            if 0 <= hour < 24 and 0 <= minute < 60:
+                minutes.add(hour * 60 + minute)
+        entries.extend(
+            MedicationReminderTime(medication_id=medication_id, minute_of_day=minute) for minute in sorted(minutes)
+        )
+
+    MedicationReminderTime.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("health_data", "0004_scheduledreminder"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MedicationReminderTime",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "minute_of_day",
+                    models.PositiveSmallIntegerField(
+                        validators=[django.core.validators.MaxValueValidator(1439)],
+                        verbose_name="Hatırlatma Saati (dakika)",
+                    ),
+                ),
+                (
+                    "medication",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reminder_time_entries",
+                        to="health_data.medication",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "İlaç Hatırlatma Saati",
+                "verbose_name_plural": "İlaç Hatırlatma Saatleri",
+                "ordering": ["minute_of_day"],
+                "indexes": [models.Index(fields=["minute_of_day", "medication"], name="medreminder_minute_med_idx")],
+                "unique_together": {("medication", "minute_of_day")},
+            },
+        ),
+        migrations.RunPython(copy_reminder_times, migrations.RunPython.noop),
+    ]
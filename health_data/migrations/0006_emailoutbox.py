@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:13
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("health_data", "0005_medicationremindertime"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailOutbox",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("subject", models.CharField(max_length=255, verbose_name="Konu")),
+                ("body", models.TextField(verbose_name="İçerik")),
+                ("html_body", models.TextField(blank=True, verbose_name="HTML İçerik")),
+                ("from_email", models.CharField(max_length=255, verbose_name="Gönderen")),
+                ("recipients", models.JSONField(default=list, verbose_name="Alıcılar")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Bekliyor"), ("sent", "Gönderildi"), ("failed", "Başarısız")],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="Durum",
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0, verbose_name="Deneme Sayısı")),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="Sonraki Deneme"),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="Son Hata")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True, verbose_name="Gönderilme Tarihi")),
+            ],
+            options={
+                "verbose_name": "Email Kuyruğu",
+                "verbose_name_plural": "Email Kuyruğu",
+                "ordering": ["next_attempt_at"],
+                "indexes": [models.Index(fields=["status", "next_attempt_at"], name="outbox_status_next_idx")],
+            },
+        ),
+    ]
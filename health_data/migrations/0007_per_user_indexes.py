@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("health_data", "0006_emailoutbox"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(fields=["date", "notification_sent", "is_active"], name="appointment_reminder_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(fields=["patient", "-date", "-time"], name="appointment_patient_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="exercise",
+            index=models.Index(fields=["user", "-date"], name="exercise_user_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="hospitalrecord",
+            index=models.Index(fields=["user", "record_type", "-date"], name="hospitalrecord_user_type_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="hospitalrecord",
+            index=models.Index(fields=["user", "-date", "-created_at"], name="hospitalrecord_user_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="hospitalrecord",
+            index=models.Index(fields=["-date", "-created_at"], name="hospitalrecord_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="medication",
+            index=models.Index(fields=["user", "-start_date"], name="medication_user_start_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(fields=["receiver", "is_read", "-created_at"], name="message_receiver_unread_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(fields=["receiver", "-created_at"], name="message_receiver_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(fields=["sender", "-created_at"], name="message_sender_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="sleep",
+            index=models.Index(fields=["user", "date"], name="sleep_user_date_idx"),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_thread_root(apps, schema_editor):
+    """Mevcut yanıtların konuşma kökünü parent_message zincirinden hesapla"""
+    Message = apps.get_model("health_data", "Message")
+    parents = dict(Message.objects.filter(parent_message__isnull=False).values_list("id", "parent_message_id"))
+
+    roots = {}
+    for message_id in parents:
+        # Zinciri köke kadar yürü (döngülere karşı ziyaret edilenleri takip et)
+        chain = []
+        current = message_id
+        while current in parents and current not in roots and current not in chain:
+            chain.append(current)
+            current = parents[current]
+        root = roots.get(current, current)
+        for item in chain:
+            roots[item] = root
+
+    Message.objects.bulk_update(
+        [Message(id=message_id, thread_root_id=root_id) for message_id, root_id in roots.items()],
+        ["thread_root"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("health_data", "0007_per_user_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="thread_root",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="thread_messages",
+                to="health_data.message",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(fields=["thread_root", "created_at"], name="message_thread_idx"),
+        ),
+        migrations.RunPython(backfill_thread_root, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    """Mevcut egzersiz, uyku ve aktivite kayıtlarından özetleri oluştur"""
+    from health_data.rollups import rebuild_health_rollups
+
+    rebuild_health_rollups(apps=apps)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("health_data", "0008_message_thread_root"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HealthRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "period",
+                    models.CharField(choices=[("day", "Gün"), ("week", "Hafta"), ("month", "Ay")], max_length=5),
+                ),
+                ("period_start", models.DateField(help_text="Dönemin ilk günü (hafta Pazartesi, ay 1. gün)")),
+                ("exercise_count", models.PositiveIntegerField(default=0)),
+                ("exercise_duration", models.PositiveIntegerField(default=0, help_text="Toplam süre (dakika)")),
+                ("exercise_calories", models.PositiveIntegerField(default=0)),
+                ("exercise_intensity_total", models.PositiveIntegerField(default=0)),
+                ("sleep_count", models.PositiveIntegerField(default=0)),
+                (
+                    "sleep_duration",
+                    models.DecimalField(decimal_places=1, default=0, help_text="Toplam süre (saat)", max_digits=7),
+                ),
+                ("sleep_quality_total", models.PositiveIntegerField(default=0)),
+                ("activity_days", models.PositiveIntegerField(default=0)),
+                ("steps", models.PositiveIntegerField(default=0)),
+                (
+                    "water_intake",
+                    models.DecimalField(decimal_places=1, default=0, help_text="Toplam su (L)", max_digits=7),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="health_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Sağlık Özeti",
+                "verbose_name_plural": "Sağlık Özetleri",
+                "ordering": ["period_start"],
+                "unique_together": {("user", "period", "period_start")},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("health_data", "0009_healthrollup"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="dailyactivity",
+            name="date",
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+    ]
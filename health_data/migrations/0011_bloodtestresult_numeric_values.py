@@ -0,0 +1,128 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:10
+
+import re
+from decimal import Decimal, InvalidOperation
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+# Göçler uygulama kodunu içe aktarmaz; ayrıştırma bu göç yazıldığı haliyle burada tutulur
+NUMBER = r"([-−]?\d+(?:[.,]\d+)?)"
+UNIT = r"(?:\s*(?![eE][+-]?\d|[xX×*]\s*\d)[^\d\s.,+\-−–—].*)?"
+VALUE_PATTERN = re.compile(rf"\s*{NUMBER}{UNIT}\s*", re.DOTALL)
+RANGE_PATTERN = re.compile(rf"\s*{NUMBER}\s*[-–—]\s*{NUMBER}{UNIT}\s*", re.DOTALL)
+UPPER_PATTERN = re.compile(rf"\s*(?:<=?|≤)\s*{NUMBER}{UNIT}\s*", re.DOTALL)
+LOWER_PATTERN = re.compile(rf"\s*(?:>=?|≥)\s*{NUMBER}{UNIT}\s*", re.DOTALL)
+MAX_LAB_VALUE = Decimal("1e8")
+BATCH_SIZE = 1000
+
+
+def to_decimal(text):
+    try:
+        value = Decimal(text.replace(",", ".").replace("−", "-"))
+    except InvalidOperation:
+        return None
+    return value if abs(value) < MAX_LAB_VALUE else None
+
+
+def parse_reference_range(text):
+    if match := RANGE_PATTERN.fullmatch(text):
+        return to_decimal(match.group(1)), to_decimal(match.group(2))
+    if match := UPPER_PATTERN.fullmatch(text):
+        return None, to_decimal(match.group(1))
+    if match := LOWER_PATTERN.fullmatch(text):
+        return to_decimal(match.group(1)), None
+    return None, None
+
+
+def backfill_lab_values(apps, schema_editor):
+    """Mevcut sonuçların sayısal değerlerini, referans sınırlarını ve hasta/tarih alanlarını doldur"""
+    BloodTestResult = apps.get_model("health_data", "BloodTestResult")
+    results = (
+        BloodTestResult.objects.order_by("id")
+        .annotate(record_user_id=F("hospital_record__user_id"), record_date=F("hospital_record__date"))
+        .only("id", "value", "reference_range", "is_abnormal")
+    )
+    last_id = 0
+    while batch := list(results.filter(id__gt=last_id)[:BATCH_SIZE]):
+        for result in batch:
+            match = VALUE_PATTERN.fullmatch(result.value)
+            result.value_num = to_decimal(match.group(1)) if match else None
+            result.ref_low, result.ref_high = parse_reference_range(result.reference_range)
+            if result.value_num is not None and (result.ref_low is not None or result.ref_high is not None):
+                result.is_abnormal = (result.ref_low is not None and result.value_num < result.ref_low) or (
+                    result.ref_high is not None and result.value_num > result.ref_high
+                )
+            result.user_id, result.date = result.record_user_id, result.record_date
+        BloodTestResult.objects.bulk_update(batch, ["value_num", "ref_low", "ref_high", "is_abnormal", "user", "date"])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("health_data", "0010_dailyactivity_date_default"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bloodtestresult",
+            name="value_num",
+            field=models.DecimalField(
+                blank=True, decimal_places=4, editable=False, max_digits=12, null=True, verbose_name="Sayısal Değer"
+            ),
+        ),
+        migrations.AddField(
+            model_name="bloodtestresult",
+            name="ref_low",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=4,
+                editable=False,
+                max_digits=12,
+                null=True,
+                verbose_name="Referans Alt Sınır",
+            ),
+        ),
+        migrations.AddField(
+            model_name="bloodtestresult",
+            name="ref_high",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=4,
+                editable=False,
+                max_digits=12,
+                null=True,
+                verbose_name="Referans Üst Sınır",
+            ),
+        ),
+        migrations.AddField(
+            model_name="bloodtestresult",
+            name="user",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="blood_test_results",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Hasta",
+            ),
+        ),
+        migrations.AddField(
+            model_name="bloodtestresult",
+            name="date",
+            field=models.DateField(editable=False, null=True, verbose_name="Tarih"),
+        ),
+        migrations.AlterField(
+            model_name="bloodtestresult",
+            name="is_abnormal",
+            field=models.BooleanField(
+                default=False,
+                help_text="Sayısal değer ve referans aralığı okunabildiğinde otomatik hesaplanır",
+                verbose_name="Anormal mi?",
+            ),
+        ),
+        migrations.RunPython(backfill_lab_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("health_data", "0011_bloodtestresult_numeric_values"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="bloodtestresult",
+            name="user",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="blood_test_results",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Hasta",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="bloodtestresult",
+            name="date",
+            field=models.DateField(editable=False, verbose_name="Tarih"),
+        ),
+        migrations.AddIndex(
+            model_name="bloodtestresult",
+            index=models.Index(fields=["parameter", "user", "date"], name="bloodtest_param_user_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="bloodtestresult",
+            index=models.Index(fields=["parameter", "value_num"], name="bloodtest_param_value_idx"),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+from collections import Counter, defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def lab_parameter_key(name, unit):
+    return " ".join(name.split()).casefold(), unit.strip()
+
+
+def intern_lab_parameters(apps, schema_editor):
+    """Sonuçlardaki parametre/birim metinlerini kataloğa taşı ve sonuçları kataloğa bağla.
+
+    Yazımı farklı aynı parametreler tek kayıtta birleşir; en sık görülen referans aralığı varsayılan
+    olur ve bu aralığa sahip sonuçlarda metin boşaltılır.
+    """
+    BloodTestResult = apps.get_model("health_data", "BloodTestResult")
+    LabParameter = apps.get_model("health_data", "LabParameter")
+
+    spellings, ranges = defaultdict(Counter), defaultdict(Counter)
+    rows = (
+        BloodTestResult.objects.order_by().values_list("parameter", "unit", "reference_range").annotate(n=Count("id"))
+    )
+    for name, unit, reference_range, count in rows:
+        key = lab_parameter_key(name, unit)
+        spellings[key][(name, unit)] += count
+        ranges[key][reference_range] += count
+
+    for key, pairs in spellings.items():
+        # En sık kullanılan yazım ve referans aralığı kataloğa alınır
+        name = pairs.most_common(1)[0][0][0]
+        default_range = ranges[key].most_common(1)[0][0]
+        parameter = LabParameter.objects.create(name=" ".join(name.split()), unit=key[1], reference_range=default_range)
+        condition = Q()
+        for name, unit in pairs:
+            condition |= Q(parameter=name, unit=unit)
+        BloodTestResult.objects.filter(condition).update(lab_parameter=parameter)
+        BloodTestResult.objects.filter(lab_parameter=parameter, reference_range=default_range).update(
+            reference_range=""
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("health_data", "0012_bloodtestresult_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LabParameter",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=100, verbose_name="Parametre")),
+                ("unit", models.CharField(blank=True, max_length=20, verbose_name="Birim")),
+                (
+                    "reference_range",
+                    models.CharField(blank=True, max_length=100, verbose_name="Varsayılan Referans Aralığı"),
+                ),
+            ],
+            options={
+                "verbose_name": "Laboratuvar Parametresi",
+                "verbose_name_plural": "Laboratuvar Parametreleri",
+                "ordering": ["name", "unit"],
+                "unique_together": {("name", "unit")},
+            },
+        ),
+        migrations.AddField(
+            model_name="bloodtestresult",
+            name="lab_parameter",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="results",
+                to="health_data.labparameter",
+                verbose_name="Parametre",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="bloodtestresult",
+            name="reference_range",
+            field=models.CharField(
+                blank=True,
+                help_text="Boş bırakılırsa parametrenin varsayılan aralığı kullanılır",
+                max_length=100,
+                verbose_name="Referans Aralığı",
+            ),
+        ),
+        migrations.RunPython(intern_lab_parameters, migrations.RunPython.noop),
+    ]
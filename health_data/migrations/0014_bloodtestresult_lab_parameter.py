@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("health_data", "0013_labparameter"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(model_name="bloodtestresult", name="bloodtest_param_user_date_idx"),
+        migrations.RemoveIndex(model_name="bloodtestresult", name="bloodtest_param_value_idx"),
+        migrations.RemoveField(model_name="bloodtestresult", name="parameter"),
+        migrations.RemoveField(model_name="bloodtestresult", name="unit"),
+        migrations.AlterField(
+            model_name="bloodtestresult",
+            name="lab_parameter",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="results",
+                to="health_data.labparameter",
+                verbose_name="Parametre",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bloodtestresult",
+            index=models.Index(fields=["lab_parameter", "user", "date"], name="bloodtest_param_user_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="bloodtestresult",
+            index=models.Index(fields=["lab_parameter", "value_num"], name="bloodtest_param_value_idx"),
+        ),
+    ]
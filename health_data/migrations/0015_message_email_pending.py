@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("health_data", "0014_bloodtestresult_lab_parameter"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="email_pending",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                condition=models.Q(("email_pending", True)), fields=["receiver", "id"], name="message_email_pending_idx"
+            ),
+        ),
+    ]
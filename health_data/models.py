@@ -1,18 +1,114 @@
+import logging
+from bisect import bisect_right
 from datetime import datetime, time, timedelta
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Q
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .labs import apply_lab_values, lab_parameters
+
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 # Create your models here.
 
 
+def parse_reminder_time(value):
+    """'HH:MM' formatındaki saati gün içindeki dakikaya çevir (geçersiz değerlerde ValueError)"""
+    hour, minute = map(int, str(value).split(":"))
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Geçersiz saat: {value}")
+    return hour * 60 + minute
+
+
+def format_minute_of_day(minute_of_day):
+    """Gün içindeki dakikayı 'HH:MM' formatına çevir"""
+    return f"{minute_of_day // 60:02d}:{minute_of_day % 60:02d}"
+
+
+def combine_minute_of_day(day, minute_of_day):
+    """Gün ve gün içindeki dakikadan yerel saat dilimine göre datetime oluştur"""
+    return timezone.make_aware(datetime.combine(day, time(minute_of_day // 60, minute_of_day % 60)))
+
+
+def next_reminder_times(medications, now=None):
+    """İlaçların bir sonraki hatırlatma zamanlarını tek geçişte hesapla; (ilaç, zaman) çiftleri üretir.
+
+    Aynı saat listesini paylaşan ilaçlar için saatler bir kez ayrıştırılır, aynı gün ve dakika için
+    saat dilimi dönüşümü de bir kez yapılır. Haftalık ilaçlar başlangıç gününün hafta gününde hatırlatılır.
+    """
+    now = timezone.localtime(now)
+    today = now.date()
+    current_minute = now.hour * 60 + now.minute
+    minutes_by_times = {}
+    instants = {}
+
+    for medication in medications:
+        if not medication.reminder_times or not medication.is_active:
+            yield medication, None
+            continue
+
+        # Eski kayıtlarda saatler metin dışı değerler de içerebilir
+        key = tuple(map(str, medication.reminder_times))
+        minutes = minutes_by_times.get(key)
+        if minutes is None:
+            minutes = minutes_by_times[key] = medication.get_reminder_minutes()
+        if not minutes:
+            # Saatlerin hiçbiri geçerli değil
+            yield medication, None
+            continue
+
+        step = 7 if medication.frequency == "weekly" else 1
+        if medication.start_date > today:
+            # İlaç henüz başlamadıysa ilk hatırlatma başlangıç gününün ilk saatidir
+            day, index = medication.start_date, 0
+        else:
+            day, index = today, bisect_right(minutes, current_minute)
+            offset = (today - medication.start_date).days % step
+            if offset:
+                day, index = today + timedelta(days=step - offset), 0
+            elif index == len(minutes):
+                # Bugün için hatırlatma kalmadıysa bir sonraki hatırlatma gününün ilk saati
+                day, index = today + timedelta(days=step), 0
+
+        if medication.end_date and day > medication.end_date:
+            yield medication, None
+            continue
+
+        instant_key = (day, minutes[index])
+        if instant_key not in instants:
+            instants[instant_key] = combine_minute_of_day(day, minutes[index])
+        yield medication, instants[instant_key]
+
+
+class MedicationQuerySet(models.QuerySet):
+    def active_on(self, day):
+        """Verilen gün kullanımda olan aktif ilaçlar"""
+        return self.filter(is_active=True, start_date__lte=day).filter(Q(end_date__isnull=True) | Q(end_date__gte=day))
+
+    def reminding_on(self, day):
+        """Verilen gün hatırlatılacak ilaçlar; haftalık ilaçlar yalnızca başlangıç gününün hafta gününde"""
+        # week_day: 1 = Pazar ... 7 = Cumartesi
+        return self.active_on(day).filter(~Q(frequency="weekly") | Q(start_date__week_day=day.isoweekday() % 7 + 1))
+
+    def with_reminder_between(self, start_minute, end_minute):
+        """Hatırlatma saati [start_minute, end_minute] aralığına düşen ilaçlar (gece yarısını aşabilir)"""
+        if start_minute <= end_minute:
+            condition = Q(reminder_time_entries__minute_of_day__range=(start_minute, end_minute))
+        else:
+            condition = Q(reminder_time_entries__minute_of_day__gte=start_minute) | Q(
+                reminder_time_entries__minute_of_day__lte=end_minute
+            )
+        return self.filter(condition).distinct()
+
+
 class Medication(models.Model):
     FREQUENCY_CHOICES = (
         ("daily", "Günde Bir"),
@@ -39,38 +135,44 @@ class Medication(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MedicationQuerySet.as_manager()
+
     class Meta:
         verbose_name = "İlaç"
         verbose_name_plural = "İlaçlar"
         ordering = ["-start_date"]
+        indexes = [models.Index(fields=["user", "-start_date"], name="medication_user_start_idx")]
 
     def __str__(self):
         return f"{self.name} - {self.user.username}"
 
-    def get_next_reminder_time(self):
+    def get_reminder_minutes(self):
+        """Hatırlatma saatlerini gün içindeki dakikalar olarak (sıralı) döndür; geçersiz saatler atlanır"""
+        minutes = set()
+        for reminder_time in self.reminder_times or []:
+            try:
+                minutes.add(parse_reminder_time(reminder_time))
+            except ValueError:
+                # Form doğrulamasından önce kaydedilmiş eski veriler (0005 göçü de bu saatleri atlar)
+                logger.warning(f"Geçersiz hatırlatma saati atlandı: {reminder_time!r} (İlaç ID: {self.id})")
+        return sorted(minutes)
+
+    def get_next_reminder_time(self, now=None):
         """Bir sonraki hatırlatma zamanını hesapla"""
-        if not self.reminder_times or not self.is_active:
-            return None
-
-        now = timezone.now()
-        if self.end_date and now.date() > self.end_date:
-            return None
+        _, reminder_time = next(next_reminder_times([self], now))
+        return reminder_time
 
-        # Bugünün hatırlatma saatlerini kontrol et
-        today_reminders = []
-        for reminder_time in self.reminder_times:
-            hour, minute = map(int, reminder_time.split(":"))
-            reminder_datetime = timezone.make_aware(datetime.combine(now.date(), time(hour, minute)))
-            if reminder_datetime > now:
-                today_reminders.append(reminder_datetime)
+    def sync_reminder_time_entries(self):
+        """reminder_times alanını indeksli MedicationReminderTime tablosuna yansıt"""
+        wanted = set(self.get_reminder_minutes())
+        existing = set(self.reminder_time_entries.values_list("minute_of_day", flat=True))
 
-        if today_reminders:
-            return min(today_reminders)
-
-        # Bugün için hatırlatma kalmadıysa, yarının ilk hatırlatmasını döndür
-        tomorrow = now.date() + timedelta(days=1)
-        hour, minute = map(int, self.reminder_times[0].split(":"))
-        return timezone.make_aware(datetime.combine(tomorrow, time(hour, minute)))
+        if existing - wanted:
+            self.reminder_time_entries.filter(minute_of_day__in=existing - wanted).delete()
+        if wanted - existing:
+            MedicationReminderTime.objects.bulk_create(
+                [MedicationReminderTime(medication=self, minute_of_day=minute) for minute in sorted(wanted - existing)]
+            )
 
     def save(self, *args, **kwargs):
         """Model kaydedilirken hatırlatma saatlerini otomatik ayarla ve hatırlatma görevi oluştur"""
@@ -89,12 +191,50 @@ class Medication(models.Model):
             self.reminder_times = ["10:00"]
 
         super().save(*args, **kwargs)
+        self.sync_reminder_time_entries()
+
+        # Hatırlatma kuyruğundaki bir sonraki zamanı güncelle (pasif ilaçlar kuyruktan çıkarılır)
+        from .tasks import schedule_next_reminder
+
+        schedule_next_reminder(self)
+
+
+class MedicationReminderTime(models.Model):
+    """İlacın her bir hatırlatma saati için bir satır (gün içindeki dakika olarak)"""
+
+    medication = models.ForeignKey(Medication, on_delete=models.CASCADE, related_name="reminder_time_entries")
+    minute_of_day = models.PositiveSmallIntegerField(
+        validators=[MaxValueValidator(24 * 60 - 1)], verbose_name="Hatırlatma Saati (dakika)"
+    )
+
+    class Meta:
+        verbose_name = "İlaç Hatırlatma Saati"
+        verbose_name_plural = "İlaç Hatırlatma Saatleri"
+        ordering = ["minute_of_day"]
+        unique_together = ["medication", "minute_of_day"]
+        indexes = [models.Index(fields=["minute_of_day", "medication"], name="medreminder_minute_med_idx")]
+
+    def __str__(self):
+        return f"{self.medication.name} - {self.time_display}"
+
+    @property
+    def time_display(self):
+        return format_minute_of_day(self.minute_of_day)
 
-        # İlaç aktifse ve başlangıç tarihi geçmişse hatırlatma görevi oluştur
-        if self.is_active and self.start_date <= timezone.now().date():
-            from .tasks import schedule_next_reminder
 
-            schedule_next_reminder(self)
+class ScheduledReminder(models.Model):
+    """İlaç hatırlatma kuyruğu: her aktif ilaç için bir sonraki hatırlatma zamanı"""
+
+    medication = models.OneToOneField(Medication, on_delete=models.CASCADE, related_name="scheduled_reminder")
+    due_at = models.DateTimeField(db_index=True, verbose_name="Hatırlatma Zamanı")
+
+    class Meta:
+        verbose_name = "Zamanlanmış Hatırlatma"
+        verbose_name_plural = "Zamanlanmış Hatırlatmalar"
+        ordering = ["due_at"]
+
+    def __str__(self):
+        return f"{self.medication.name} - {self.due_at}"
 
 
 class Exercise(models.Model):
@@ -123,6 +263,7 @@ class Exercise(models.Model):
         verbose_name = "Egzersiz"
         verbose_name_plural = "Egzersizler"
         ordering = ["-date"]
+        indexes = [models.Index(fields=["user", "-date"], name="exercise_user_date_idx")]
 
     def __str__(self):
         return f"{self.get_exercise_type_display()} - {self.user.username} - {self.date}"
@@ -149,11 +290,19 @@ class Sleep(models.Model):
         verbose_name = "Uyku Kaydı"
         verbose_name_plural = "Uyku Kayıtları"
         ordering = ["-date"]
+        indexes = [models.Index(fields=["user", "date"], name="sleep_user_date_idx")]
 
     def __str__(self):
         return f"{self.user.username} - {self.date}"
 
 
+class MessageQuerySet(models.QuerySet):
+    def conversation(self, message):
+        """Mesajın ait olduğu konuşmanın tamamı (kök mesaj ve thread_root'u ona işaret eden yanıtlar)"""
+        root_id = message.thread_root_id or message.id
+        return self.filter(Q(id=root_id) | Q(thread_root_id=root_id))
+
+
 class Message(models.Model):
     """Doktor-hasta mesajlaşma ve hatırlatma modeli"""
 
@@ -177,26 +326,93 @@ class Message(models.Model):
     parent_message = models.ForeignKey(
         "self", on_delete=models.SET_NULL, null=True, blank=True, related_name="health_replies"
     )
+    # Konuşmanın ilk mesajı (ilk mesaj için boş), konuşmayı tek indeksli sorguyla bulmak için
+    thread_root = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="thread_messages",
+        editable=False,
+        db_index=False,  # message_thread_idx bu alanla başlıyor
+    )
+    # Alıcıya henüz email bildirimi gönderilmedi; bekleyen mesajlar tek bir özet emailinde birleştirilir
+    email_pending = models.BooleanField(default=False, editable=False)
+
+    objects = MessageQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Mesaj"
         verbose_name_plural = "Mesajlar"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["receiver", "is_read", "-created_at"], name="message_receiver_unread_idx"),
+            models.Index(fields=["receiver", "-created_at"], name="message_receiver_created_idx"),
+            models.Index(fields=["sender", "-created_at"], name="message_sender_created_idx"),
+            models.Index(fields=["thread_root", "created_at"], name="message_thread_idx"),
+            models.Index(
+                fields=["receiver", "id"], condition=models.Q(email_pending=True), name="message_email_pending_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.sender.get_full_name()} -> {self.receiver.get_full_name()}: {self.subject}"
 
+    def save(self, *args, **kwargs):
+        # Yanıtlar, yanıtladıkları mesajın konuşmasına bağlanır
+        if self.parent_message_id and not self.thread_root_id:
+            parent = self.parent_message
+            self.thread_root_id = parent.thread_root_id or parent.id
+        super().save(*args, **kwargs)
+
     def mark_as_read(self):
         """Mesajı okundu olarak işaretle"""
+        from .counters import change_unread_count
+
+        # Aynı mesaj eşzamanlı okunduğunda sayaç iki kez azaltılmasın
+        updated = Message.objects.filter(pk=self.pk, is_read=False).update(is_read=True)
         self.is_read = True
-        self.save(update_fields=["is_read"])
+        if updated:
+            change_unread_count(self.receiver_id, -1)
+
+
+class EmailOutbox(models.Model):
+    """Gönderilmeyi bekleyen emailler; bir işçi tarafından gruplar halinde gönderilir"""
+
+    STATUS_CHOICES = (
+        ("pending", "Bekliyor"),
+        ("sent", "Gönderildi"),
+        ("failed", "Başarısız"),
+    )
+
+    subject = models.CharField(max_length=255, verbose_name="Konu")
+    body = models.TextField(verbose_name="İçerik")
+    html_body = models.TextField(blank=True, verbose_name="HTML İçerik")
+    from_email = models.CharField(max_length=255, verbose_name="Gönderen")
+    recipients = models.JSONField(default=list, verbose_name="Alıcılar")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending", verbose_name="Durum")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Deneme Sayısı")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Sonraki Deneme")
+    last_error = models.TextField(blank=True, verbose_name="Son Hata")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Gönderilme Tarihi")
+
+    class Meta:
+        verbose_name = "Email Kuyruğu"
+        verbose_name_plural = "Email Kuyruğu"
+        ordering = ["next_attempt_at"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"], name="outbox_status_next_idx")]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.get_status_display()})"
 
 
 class DailyActivity(models.Model):
     """Günlük aktivite takibi (adım sayısı, su tüketimi vb.)"""
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_activities")
-    date = models.DateField(auto_now_add=True)
+    # auto_now_add yerine varsayılan değer: içe aktarılan geçmiş günlerin tarihi korunur
+    date = models.DateField(default=timezone.localdate)
     steps = models.PositiveIntegerField(default=0, verbose_name="Adım Sayısı")
     water_intake = models.DecimalField(max_digits=4, decimal_places=1, default=0, verbose_name="Su Tüketimi (L)")
     notes = models.TextField(blank=True, null=True, verbose_name="Notlar")
@@ -216,6 +432,57 @@ class DailyActivity(models.Model):
         return reverse("health_data:daily_activity_detail", args=[str(self.id)])
 
 
+class HealthRollup(models.Model):
+    """Kullanıcının günlük, haftalık ve aylık egzersiz, uyku ve aktivite özeti (ham kayıtlardan türetilir)"""
+
+    PERIOD_CHOICES = (
+        ("day", "Gün"),
+        ("week", "Hafta"),
+        ("month", "Ay"),
+    )
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="health_rollups")
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField(help_text="Dönemin ilk günü (hafta Pazartesi, ay 1. gün)")
+    # Ortalamalar kolayca güncellenebilmesi için toplam ve sayı olarak tutulur
+    exercise_count = models.PositiveIntegerField(default=0)
+    exercise_duration = models.PositiveIntegerField(default=0, help_text="Toplam süre (dakika)")
+    exercise_calories = models.PositiveIntegerField(default=0)
+    exercise_intensity_total = models.PositiveIntegerField(default=0)
+    sleep_count = models.PositiveIntegerField(default=0)
+    sleep_duration = models.DecimalField(max_digits=7, decimal_places=1, default=0, help_text="Toplam süre (saat)")
+    sleep_quality_total = models.PositiveIntegerField(default=0)
+    activity_days = models.PositiveIntegerField(default=0)
+    steps = models.PositiveIntegerField(default=0)
+    water_intake = models.DecimalField(max_digits=7, decimal_places=1, default=0, help_text="Toplam su (L)")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Sağlık Özeti"
+        verbose_name_plural = "Sağlık Özetleri"
+        ordering = ["period_start"]
+        unique_together = ["user", "period", "period_start"]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.get_period_display()} - {self.period_start}"
+
+    @property
+    def avg_intensity(self):
+        return self.exercise_intensity_total / self.exercise_count if self.exercise_count else 0
+
+    @property
+    def avg_sleep_duration(self):
+        return float(self.sleep_duration) / self.sleep_count if self.sleep_count else 0
+
+    @property
+    def avg_sleep_quality(self):
+        return self.sleep_quality_total / self.sleep_count if self.sleep_count else 0
+
+    @property
+    def avg_steps(self):
+        return self.steps / self.activity_days if self.activity_days else 0
+
+
 class HealthTip(models.Model):
     """Sağlık ipuçları"""
 
@@ -265,6 +532,10 @@ class Appointment(models.Model):
         verbose_name = "Randevu"
         verbose_name_plural = "Randevular"
         ordering = ["date", "time"]
+        indexes = [
+            models.Index(fields=["date", "notification_sent", "is_active"], name="appointment_reminder_idx"),
+            models.Index(fields=["patient", "-date", "-time"], name="appointment_patient_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.patient.get_full_name()} - {self.doctor.get_full_name()} - {self.date} {self.time}"
@@ -299,27 +570,106 @@ class HospitalRecord(models.Model):
         verbose_name = _("Hastane Kaydı")
         verbose_name_plural = _("Hastane Kayıtları")
         ordering = ["-date", "-created_at"]
+        indexes = [
+            models.Index(fields=["user", "record_type", "-date"], name="hospitalrecord_user_type_idx"),
+            models.Index(fields=["user", "-date", "-created_at"], name="hospitalrecord_user_date_idx"),
+            models.Index(fields=["-date", "-created_at"], name="hospitalrecord_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.get_record_type_display()} - {self.date} - {self.title}"
 
 
+class LabParameter(models.Model):
+    """Kan testi parametre kataloğu; sonuçlar ad ve birimi her satırda tekrarlamak yerine buraya bağlanır"""
+
+    name = models.CharField(max_length=100, verbose_name=_("Parametre"))
+    unit = models.CharField(max_length=20, blank=True, verbose_name=_("Birim"))
+    reference_range = models.CharField(max_length=100, blank=True, verbose_name=_("Varsayılan Referans Aralığı"))
+
+    class Meta:
+        verbose_name = _("Laboratuvar Parametresi")
+        verbose_name_plural = _("Laboratuvar Parametreleri")
+        ordering = ["name", "unit"]
+        unique_together = ("name", "unit")
+
+    def __str__(self):
+        return f"{self.name} ({self.unit})" if self.unit else self.name
+
+
+class BloodTestResultQuerySet(models.QuerySet):
+    def trend(self, user_id, lab_parameters):
+        """Hastanın verilen parametre(ler)deki sonuçları tarih sırasıyla (parametre/hasta/tarih indeksi)"""
+        return self.filter(lab_parameter__in=lab_parameters, user_id=user_id).order_by("date", "id")
+
+    def above(self, lab_parameter, threshold):
+        """Parametrenin sayısal değeri eşiği aşan sonuçlar (ör. HbA1c > 7)"""
+        return self.filter(lab_parameter=lab_parameter, value_num__gt=threshold)
+
+
 class BloodTestResult(models.Model):
     """Kan testi sonuçları için detay model"""
 
     hospital_record = models.ForeignKey(HospitalRecord, on_delete=models.CASCADE, related_name="blood_test_results")
-    parameter = models.CharField(max_length=100, verbose_name=_("Parametre"))
+    lab_parameter = models.ForeignKey(
+        LabParameter,
+        on_delete=models.PROTECT,
+        related_name="results",
+        verbose_name=_("Parametre"),
+        db_index=False,  # bloodtest_param_user_date_idx bu alanla başlıyor
+    )
     value = models.CharField(max_length=50, verbose_name=_("Değer"))
-    unit = models.CharField(max_length=20, verbose_name=_("Birim"))
-    reference_range = models.CharField(max_length=100, verbose_name=_("Referans Aralığı"))
-    is_abnormal = models.BooleanField(default=False, verbose_name=_("Anormal mi?"))
+    reference_range = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name=_("Referans Aralığı"),
+        help_text=_("Boş bırakılırsa parametrenin varsayılan aralığı kullanılır"),
+    )
+    is_abnormal = models.BooleanField(
+        default=False,
+        verbose_name=_("Anormal mi?"),
+        help_text=_("Sayısal değer ve referans aralığı okunabildiğinde otomatik hesaplanır"),
+    )
+    # Aşağıdaki alanlar kaydederken metin alanlarından ve hastane kaydından doldurulur
+    value_num = models.DecimalField(
+        max_digits=12, decimal_places=4, null=True, blank=True, editable=False, verbose_name=_("Sayısal Değer")
+    )
+    ref_low = models.DecimalField(
+        max_digits=12, decimal_places=4, null=True, blank=True, editable=False, verbose_name=_("Referans Alt Sınır")
+    )
+    ref_high = models.DecimalField(
+        max_digits=12, decimal_places=4, null=True, blank=True, editable=False, verbose_name=_("Referans Üst Sınır")
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, editable=False, related_name="blood_test_results", verbose_name=_("Hasta")
+    )
+    date = models.DateField(editable=False, verbose_name=_("Tarih"))
+
+    objects = BloodTestResultQuerySet.as_manager()
 
     class Meta:
         verbose_name = _("Kan Testi Sonucu")
         verbose_name_plural = _("Kan Testi Sonuçları")
+        indexes = [
+            # Hastanın bir parametredeki eğilimi ve parametre/değer eşiğine göre hasta sorguları
+            models.Index(fields=["lab_parameter", "user", "date"], name="bloodtest_param_user_date_idx"),
+            models.Index(fields=["lab_parameter", "value_num"], name="bloodtest_param_value_idx"),
+        ]
 
     def __str__(self):
-        return f"{self.parameter}: {self.value} {self.unit}"
+        return f"{lab_parameters.by_id(self.lab_parameter_id)}: {self.value}"
+
+    @property
+    def effective_reference_range(self):
+        # Parametre sonuç başına sorgulanmaz, süreç içi katalogdan okunur
+        return self.reference_range or lab_parameters.by_id(self.lab_parameter_id).reference_range
+
+    def save(self, *args, **kwargs):
+        # Hasta ve tarih kayıttan kopyalanır; böylece eğilim sorguları birleştirme yapmadan indeksten okunur
+        self.user_id = self.hospital_record.user_id
+        self.date = self.hospital_record.date
+        apply_lab_values(self, lab_parameters.by_id(self.lab_parameter_id).reference_range)
+        super().save(*args, **kwargs)
 
 
 class LabTestResult(models.Model):
@@ -0,0 +1,156 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db.models import Count, Sum
+
+ROLLUP_BATCH_SIZE = 1000
+# Tam yeniden hesaplamada kullanıcılar gruplar halinde işlenir
+REBUILD_USER_BATCH_SIZE = 100
+
+# Kaynak model -> günlük özet alanları ve hesaplanışları
+ROLLUP_SOURCES = {
+    "Exercise": {
+        "exercise_count": Count("id"),
+        "exercise_duration": Sum("duration"),
+        "exercise_calories": Sum("calories_burned"),
+        "exercise_intensity_total": Sum("intensity"),
+    },
+    "Sleep": {
+        "sleep_count": Count("id"),
+        "sleep_duration": Sum("duration"),
+        "sleep_quality_total": Sum("quality"),
+    },
+    "DailyActivity": {
+        "activity_days": Count("id"),
+        "steps": Sum("steps"),
+        "water_intake": Sum("water_intake"),
+    },
+}
+ROLLUP_FIELDS = [field for fields in ROLLUP_SOURCES.values() for field in fields]
+
+
+def period_start(period, day):
+    """Günün ait olduğu dönemin ilk günü (hafta Pazartesi başlar)"""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def period_end(period, start):
+    """Dönemin son günü"""
+    if period == "week":
+        return start + timedelta(days=6)
+    if period == "month":
+        return (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return start
+
+
+def recent_period_starts(period, today, count):
+    """Bugünü içeren dönem dahil son count dönemin başlangıçları (eskiden yeniye)"""
+    starts = [period_start(period, today)]
+    while len(starts) < count:
+        starts.append(period_start(period, starts[-1] - timedelta(days=1)))
+    return starts[::-1]
+
+
+def sum_rollups(rollups):
+    """Özet satırlarını tek bir (kaydedilmemiş) özette topla; ortalamalar özelliklerden okunabilir"""
+    HealthRollup = rollups.model
+    totals = rollups.aggregate(**{field: Sum(field) for field in ROLLUP_FIELDS})
+    return HealthRollup(**{field: value or 0 for field, value in totals.items()})
+
+
+def _aggregate_days(apps, source, filters):
+    """Kaynak modelin kayıtlarını kullanıcı ve güne göre topla: {(user_id, gün): {alan: değer}}"""
+    model = apps.get_model("health_data", source)
+    aggregates = ROLLUP_SOURCES[source]
+    rows = model.objects.filter(**filters).order_by().values("user_id", "date").annotate(**aggregates)
+    return {(row["user_id"], row["date"]): {field: row[field] or 0 for field in aggregates} for row in rows}
+
+
+def _upsert(apps, rollups, fields):
+    HealthRollup = apps.get_model("health_data", "HealthRollup")
+    HealthRollup.objects.bulk_create(
+        rollups,
+        batch_size=ROLLUP_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["user", "period", "period_start"],
+        update_fields=[*fields, "updated_at"],
+    )
+
+
+def refresh_health_rollups(source, user_id, days, apps=django_apps):
+    """Kaynak modelde değişen günlerin ve bu günleri içeren hafta/ayların özetlerini yeniden hesapla.
+
+    Yalnızca kaynağın alanları güncellenir; hafta ve ay satırları ham kayıtlar yerine
+    güncel günlük özetlerden toplanır (dönem türü başına tek sorgu).
+    """
+    HealthRollup = apps.get_model("health_data", "HealthRollup")
+    fields = list(ROLLUP_SOURCES[source])
+    days = set(days)
+
+    totals = _aggregate_days(apps, source, {"user_id": user_id, "date__in": days})
+    _upsert(
+        apps,
+        [
+            HealthRollup(user_id=user_id, period="day", period_start=day, **totals.get((user_id, day), {}))
+            for day in days
+        ],
+        fields,
+    )
+
+    for period in ("week", "month"):
+        totals = {start: dict.fromkeys(fields, 0) for start in {period_start(period, day) for day in days}}
+        day_rows = HealthRollup.objects.filter(
+            user_id=user_id,
+            period="day",
+            period_start__range=(min(totals), period_end(period, max(totals))),
+        ).values_list("period_start", *fields)
+        for day, *values in day_rows:
+            bucket = totals.get(period_start(period, day))
+            if bucket is not None:
+                for field, value in zip(fields, values):
+                    bucket[field] += value
+        _upsert(
+            apps,
+            [
+                HealthRollup(user_id=user_id, period=period, period_start=start, **values)
+                for start, values in totals.items()
+            ],
+            fields,
+        )
+
+
+def rebuild_health_rollups(user_ids=None, apps=django_apps):
+    """Özetleri ham kayıtlardan baştan oluştur (toplu veri aktarımı veya ilk kurulum sonrası)"""
+    HealthRollup = apps.get_model("health_data", "HealthRollup")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    if user_ids is None:
+        user_ids = User.objects.order_by("id").values_list("id", flat=True)
+    user_ids = list(user_ids)
+
+    created = 0
+    for offset in range(0, len(user_ids), REBUILD_USER_BATCH_SIZE):
+        batch = user_ids[offset : offset + REBUILD_USER_BATCH_SIZE]
+        totals = defaultdict(dict)
+        for source in ROLLUP_SOURCES:
+            for (user_id, day), values in _aggregate_days(apps, source, {"user_id__in": batch}).items():
+                for period in ("day", "week", "month"):
+                    bucket = totals[(user_id, period, period_start(period, day))]
+                    for field, value in values.items():
+                        bucket[field] = bucket.get(field, 0) + value
+
+        HealthRollup.objects.filter(user_id__in=batch).delete()
+        HealthRollup.objects.bulk_create(
+            [
+                HealthRollup(user_id=user_id, period=period, period_start=start, **values)
+                for (user_id, period, start), values in totals.items()
+            ],
+            batch_size=ROLLUP_BATCH_SIZE,
+        )
+        created += len(totals)
+    return created
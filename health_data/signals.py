@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .counters import change_unread_count
+from .events import publish_new_messages
+from .labs import lab_parameters
+from .models import BloodTestResult, DailyActivity, Exercise, HospitalRecord, LabParameter, Message, Sleep
+from .rollups import refresh_health_rollups
+from .tasks import schedule_lab_parameter_backfill
+
+
+@receiver(post_save, sender=Message)
+def increment_unread_count(sender, instance, created, **kwargs):
+    """Yeni okunmamış mesajda alıcının sayacını artır"""
+    if created and not instance.is_read:
+        change_unread_count(instance.receiver_id, 1)
+        publish_new_messages([instance])
+
+
+@receiver(post_delete, sender=Message)
+def decrement_unread_count(sender, instance, **kwargs):
+    """Okunmamış mesaj silindiğinde alıcının sayacını azalt"""
+    if not instance.is_read:
+        change_unread_count(instance.receiver_id, -1)
+
+
+@receiver(pre_delete, sender=Message)
+def reroot_thread(sender, instance, **kwargs):
+    """Konuşmanın ilk mesajı silinirken kalan yanıtları en eski yanıta bağla (konuşma dağılmasın)"""
+    if instance.thread_root_id:
+        return
+    replies = Message.objects.filter(thread_root=instance)
+    new_root_id = replies.order_by("created_at", "id").values_list("id", flat=True).first()
+    if new_root_id is None:
+        return
+    replies.exclude(id=new_root_id).update(thread_root_id=new_root_id)
+    Message.objects.filter(id=new_root_id).update(thread_root=None)
+
+
+@receiver(pre_save, sender=Exercise)
+@receiver(pre_save, sender=Sleep)
+@receiver(pre_save, sender=DailyActivity)
+def remember_rollup_date(sender, instance, **kwargs):
+    """Kaydın tarihi değişirse eski günün özeti de güncellensin diye önceki tarihi sakla"""
+    instance._rollup_previous_date = (
+        sender.objects.filter(pk=instance.pk).values_list("date", flat=True).first() if instance.pk else None
+    )
+
+
+@receiver([post_save, post_delete], sender=Exercise)
+@receiver([post_save, post_delete], sender=Sleep)
+@receiver([post_save, post_delete], sender=DailyActivity)
+def refresh_rollups(sender, instance, **kwargs):
+    """Değişen günün ve içinde bulunduğu hafta/ayın özetlerini güncelle"""
+    days = {instance.date, getattr(instance, "_rollup_previous_date", None)} - {None}
+    refresh_health_rollups(sender.__name__, instance.user_id, days)
+
+
+@receiver(post_save, sender=HospitalRecord)
+def sync_blood_test_results(sender, instance, created, **kwargs):
+    """Kaydın hastası veya tarihi değiştiyse sonuçlara kopyalanan alanları güncelle"""
+    if not created:
+        BloodTestResult.objects.filter(hospital_record=instance).exclude(
+            user_id=instance.user_id, date=instance.date
+        ).update(user_id=instance.user_id, date=instance.date)
+
+
+@receiver([post_save, post_delete], sender=LabParameter)
+def refresh_lab_parameter(sender, instance, created=False, **kwargs):
+    """Süreç içi kataloğu yenile; varsayılan aralık değiştiyse ona bağlı sonuçları arka planda yeniden hesapla"""
+    lab_parameters.clear()
+    if kwargs["signal"] is post_save and not created:
+        # Görev değişiklik kaydedildikten sonra kuyruğa eklenir, böylece yeni aralığı okur
+        transaction.on_commit(lambda: schedule_lab_parameter_backfill(instance.id))
@@ -1,88 +1,103 @@
-import json
 import logging
-from datetime import time, timedelta
+from datetime import timedelta
 
 from celery import shared_task
+from django.db import transaction
+from django.db.models import Q
 
 # from django.template.loader import render_to_string
 from django.utils import timezone
-from django_celery_beat.models import CrontabSchedule, PeriodicTask
 
-from .models import Appointment, Medication, Message
-from .utils import send_medication_reminder_email
+from .counters import increment_unread_counts, reconcile_unread_counts
+from .events import publish_new_messages
+from .labs import backfill_lab_values
+from .models import Appointment, Medication, Message, ScheduledReminder, next_reminder_times
+from .utils import (
+    OUTBOX_BATCH_SIZE,
+    build_medication_reminder_email,
+    queue_emails,
+    send_medication_reminder_email,
+    send_message_digest_email,
+    send_message_notification_email,
+    send_outbox_batch,
+)
 
 # Logger'ı yapılandır
 logger = logging.getLogger(__name__)
 
+# Hatırlatma kuyruğu tek seferde bu kadar satır işlenir
+REMINDER_SWEEP_BATCH_SIZE = 500
+# check_medication_reminders'ın çalışma aralığı (dakika), beat zamanlamasıyla aynı olmalı
+REMINDER_CHECK_WINDOW = 5
+MINUTES_PER_DAY = 24 * 60
+# Bu süreden daha eski hatırlatmalar gönderilmeden bir sonraki zamana ertelenir
+REMINDER_EXPIRY = timedelta(minutes=5)
+# Aynı alıcıya bu süre içinde gelen mesajlar tek emailde birleştirilir (saniye)
+MESSAGE_DIGEST_DELAY = 60
+MESSAGE_DIGEST_LIMIT = 20
+# Bu süre içinde başlayacak randevular için hatırlatma gönderilir
+APPOINTMENT_REMINDER_WINDOW = timedelta(hours=24)
+
 
 @shared_task
 def check_appointments():
-    """Yaklaşan randevuları kontrol et ve bildirim gönder"""
-    # Şu andan 24 saat sonrasına kadar olan randevuları kontrol et
-    now = timezone.now()
-    tomorrow = now + timedelta(days=1)
-
-    # Bildirim gönderilecek randevuları bul
-    appointments = Appointment.objects.filter(date__range=[now, tomorrow], notification_sent=False, is_active=True)
-
-    for appointment in appointments:
-        # Randevuya kalan süreyi hesapla
-        time_until = appointment.date - now
-        hours_until = time_until.total_seconds() / 3600
-
-        # Eğer randevuya 24 saat veya daha az kaldıysa bildirim gönder
-        if hours_until <= 24:
-            send_appointment_notification(appointment)
-            appointment.notification_sent = True
-            appointment.save()
-
-
-def send_appointment_notification(appointment):
-    """Randevu bildirimi gönder"""
-    # Mesaj içeriğini hazırla
-    # context = {
-    #     "appointment": appointment,
-    #     "patient_name": appointment.patient.get_full_name() or appointment.patient.email,
-    #     "doctor_name": appointment.doctor.get_full_name() or appointment.doctor.email,
-    #     "appointment_date": appointment.date.strftime("%d.%m.%Y %H:%M"),
-    # }
-
-    # E-posta bildirimi gönder
-    # subject = f"Randevu Hatırlatması: {appointment.date.strftime('%d.%m.%Y %H:%M')}"
-    # message = render_to_string("health_data/email/appointment_reminder.html", context)
-
-    # Hastaya bildirim gönder
-    # TODO
-    # send_mail(
-    #     subject=subject,
-    #     message=message,
-    #     from_email=settings.DEFAULT_FROM_EMAIL,
-    #     recipient_list=[appointment.patient.email],
-    #     html_message=message,
-    #     fail_silently=True,
-    # )
-
-    # # Doktora bildirim gönder
-    # send_mail(
-    #     subject=subject,
-    #     message=message,
-    #     from_email=settings.DEFAULT_FROM_EMAIL,
-    #     recipient_list=[appointment.doctor.email],
-    #     html_message=message,
-    #     fail_silently=True,
-    # )
-
-    # Uygulama içi mesaj gönder
-    Message.objects.create(
+    """Önümüzdeki 24 saat içindeki randevular için hatırlatma mesajı gönder"""
+    now = timezone.localtime()
+    until = now + APPOINTMENT_REMINDER_WINDOW
+    # Randevu zamanı tarih + saat olarak veritabanında karşılaştırılır; tarih aralığı indeksi daraltır
+    window = (
+        Q(date=now.date(), time__gte=now.time())
+        | Q(date__gt=now.date(), date__lt=until.date())
+        | Q(date=until.date(), time__lte=until.time())
+    )
+    sent = 0
+
+    while True:
+        with transaction.atomic():
+            # Aynı anda çalışan işçiler aynı randevuları almasın; mesajlar ve işaretleme birlikte kaydedilir
+            appointments = list(
+                Appointment.objects.select_for_update(skip_locked=True, of=("self",))
+                .filter(window, date__range=(now.date(), until.date()), notification_sent=False, is_active=True)
+                .select_related("patient", "doctor")
+                .order_by("date", "time", "id")[:REMINDER_SWEEP_BATCH_SIZE]
+            )
+            if not appointments:
+                break
+
+            reminder_messages = Message.objects.bulk_create(
+                [build_appointment_message(appointment) for appointment in appointments]
+            )
+            Appointment.objects.filter(id__in=[appointment.id for appointment in appointments]).update(
+                notification_sent=True, updated_at=timezone.now()
+            )
+            increment_unread_counts(reminder_messages)
+            publish_new_messages(reminder_messages)
+        sent += len(appointments)
+
+        if len(appointments) < REMINDER_SWEEP_BATCH_SIZE:
+            break
+
+    logger.info(f"Randevu hatırlatmaları gönderildi: {sent} adet")
+    return sent
+
+
+def build_appointment_message(appointment):
+    """Randevu için hatırlatma mesajını oluştur (kaydetmez)"""
+    patient_name = appointment.patient.get_full_name() or appointment.patient.email
+    doctor_name = appointment.doctor.get_full_name() or appointment.doctor.email
+    appointment_date = appointment.date.strftime("%d.%m.%Y")
+    appointment_time = appointment.time.strftime("%H:%M")
+
+    return Message(
         sender=appointment.doctor,
         receiver=appointment.patient,
-        subject=f"Randevu Hatırlatması: {appointment.date.strftime('%d.%m.%Y %H:%M')}",
-        content=f"Sayın {appointment.patient.get_full_name() or appointment.patient.email},\n\n"
-        f"{appointment.date.strftime('%d.%m.%Y %H:%M')} tarihindeki randevunuzu hatırlatmak isteriz.\n\n"
+        subject=f"Randevu Hatırlatması: {appointment_date} {appointment_time}",
+        content=f"Sayın {patient_name},\n\n"
+        f"{appointment_date} {appointment_time} tarihindeki randevunuzu hatırlatmak isteriz.\n\n"
         f"Randevu Detayları:\n"
-        f"Doktor: {appointment.doctor.get_full_name() or appointment.doctor.email}\n"
-        f"Tarih: {appointment.date.strftime('%d.%m.%Y')}\n"
-        f"Saat: {appointment.date.strftime('%H:%M')}\n"
+        f"Doktor: {doctor_name}\n"
+        f"Tarih: {appointment_date}\n"
+        f"Saat: {appointment_time}\n"
         f"Not: {appointment.notes or 'Belirtilmemiş'}\n\n"
         f"Sağlıklı günler dileriz.",
     )
@@ -91,78 +106,31 @@ def send_appointment_notification(appointment):
 @shared_task
 def check_medication_reminders():
     """Aktif ilaçlar için hatırlatma kontrolü yapar ve gerekirse email gönderir."""
-    now = timezone.now()
-    current_time = now.time()
-    current_date = now.date()
-
-    # Aktif ilaçları al
-    active_medications = Medication.objects.filter(
-        is_active=True,
-        start_date__lte=current_date,
-        end_date__gte=current_date,
+    now = timezone.localtime()
+    current_minute = now.hour * 60 + now.minute
+    window_start = (current_minute - REMINDER_CHECK_WINDOW + 1) % MINUTES_PER_DAY
+
+    # Son çalıştırmadan bu yana saati gelen ilaçları hatırlatma saati indeksi üzerinden bul
+    medications = list(
+        Medication.objects.reminding_on(now.date())
+        .with_reminder_between(window_start, current_minute)
+        .select_related("user")
     )
-
-    for medication in active_medications:
-        # İlacın hatırlatma saatlerini kontrol et
-        for reminder_time_str in medication.reminder_times:
-            try:
-                # String formatındaki saati datetime.time objesine çevir
-                hour, minute = map(int, reminder_time_str.split(":"))
-                reminder_time = time(hour, minute)
-
-                # Eğer şu anki saat, hatırlatma saatine yakınsa (5 dakika tolerans)
-                if (
-                    abs(
-                        (current_time.hour * 60 + current_time.minute)
-                        - (reminder_time.hour * 60 + reminder_time.minute)
-                    )
-                    <= 5
-                ):
-                    # Email gönder
-                    send_medication_reminder_email(medication, medication.user)
-            except (ValueError, TypeError):
-                # Geçersiz saat formatı, bu saati atla
-                continue
+    return deliver_medication_reminders(medications)
 
 
 @shared_task
 def send_medication_reminder(medication_id):
     """İlaç hatırlatması gönder"""
     try:
-        medication = Medication.objects.get(id=medication_id)
+        medication = Medication.objects.select_related("user").get(id=medication_id)
         if not medication.is_active:
             logger.info(f"İlaç aktif değil, hatırlatma gönderilmedi: {medication.name} (ID: {medication_id})")
             return
 
-        # Hatırlatma mesajı oluştur
-        message = Message.objects.create(
-            sender=medication.user,  # Sistem mesajı olarak kullanıcının kendisinden geliyor gibi göster
-            receiver=medication.user,
-            subject=f"İlaç Hatırlatması: {medication.name}",
-            content=f"{medication.name} ilacınızı almanın zamanı geldi.\n"
-            f"Doz: {medication.dosage}\n"
-            f"Kullanım Sıklığı: {medication.get_frequency_display()}\n"
-            f"Notlar: {medication.notes or 'Belirtilmemiş'}",
-            message_type="reminder",
-            related_medication=medication,
-        )
-        logger.info(f"İlaç hatırlatma mesajı oluşturuldu: {medication.name} (ID: {medication_id}) {message}")
-
-        # Email bildirimi gönder
-        try:
-            send_medication_reminder_email(medication, medication.user)
-            logger.info(
-                f"İlaç hatırlatma emaili başarıyla gönderildi: {medication.name} "
-                f"(Kullanıcı: {medication.user.email}, ID: {medication_id})"
-            )
-        except Exception as e:
-            logger.error(
-                f"İlaç hatırlatma emaili gönderilemedi: {medication.name} "
-                f"(Kullanıcı: {medication.user.email}, ID: {medication_id}, Hata: {str(e)})",
-                exc_info=True,
-            )
+        deliver_medication_reminder(medication)
 
-        # Bir sonraki hatırlatma için görev oluştur
+        # Bir sonraki hatırlatma için kuyruğu güncelle
         schedule_next_reminder(medication)
         logger.info(f"Bir sonraki hatırlatma zamanlandı: {medication.name} (ID: {medication_id})")
 
@@ -174,38 +142,240 @@ def send_medication_reminder(medication_id):
         )
 
 
-def schedule_next_reminder(medication):
-    """Bir sonraki hatırlatma için Celery Beat görevi oluştur"""
-    next_reminder = medication.get_next_reminder_time()
-    if not next_reminder:
+def build_reminder_message(medication):
+    """İlaç için hatırlatma mesajını oluştur (kaydetmez)"""
+    return Message(
+        sender=medication.user,  # Sistem mesajı olarak kullanıcının kendisinden geliyor gibi göster
+        receiver=medication.user,
+        subject=f"İlaç Hatırlatması: {medication.name}",
+        content=f"{medication.name} ilacınızı almanın zamanı geldi.\n"
+        f"Doz: {medication.dosage}\n"
+        f"Kullanım Sıklığı: {medication.get_frequency_display()}\n"
+        f"Notlar: {medication.notes or 'Belirtilmemiş'}",
+        message_type="reminder",
+        related_medication=medication,
+    )
+
+
+def deliver_medication_reminder(medication):
+    """Hatırlatma mesajını oluştur ve email bildirimini gönder"""
+    message = build_reminder_message(medication)
+    message.save()
+    logger.info(f"İlaç hatırlatma mesajı oluşturuldu: {medication.name} (ID: {medication.id}) {message}")
+
+    # Email bildirimi gönder
+    try:
+        send_medication_reminder_email(medication, medication.user)
+        logger.info(
+            f"İlaç hatırlatma emaili kuyruğa eklendi: {medication.name} "
+            f"(Kullanıcı: {medication.user.email}, ID: {medication.id})"
+        )
+    except Exception as e:
+        logger.error(
+            f"İlaç hatırlatma emaili kuyruğa eklenemedi: {medication.name} "
+            f"(Kullanıcı: {medication.user.email}, ID: {medication.id}, Hata: {str(e)})",
+            exc_info=True,
+        )
+
+
+def deliver_medication_reminders(medications):
+    """Hatırlatma mesajlarını toplu olarak oluştur ve emailleri tek bağlantı üzerinden gönder"""
+    if not medications:
+        return 0
+
+    reminder_messages = Message.objects.bulk_create([build_reminder_message(medication) for medication in medications])
+    increment_unread_counts(reminder_messages)
+    publish_new_messages(reminder_messages)
+
+    # Emailler kuyruğa eklenir, process_email_outbox tek bağlantı üzerinden gönderir
+    queue_emails([build_medication_reminder_email(medication, medication.user) for medication in medications])
+
+    logger.info(f"İlaç hatırlatmaları gönderildi: {len(medications)} mesaj, {len(medications)} email kuyruğa eklendi")
+    return len(medications)
+
+
+@shared_task
+def dispatch_due_reminders():
+    """Hatırlatma kuyruğunda zamanı gelen tüm ilaç hatırlatmalarını toplu olarak gönder"""
+    now = timezone.now()
+    sent = 0
+
+    while True:
+        with transaction.atomic():
+            # Aynı anda çalışan işçiler aynı satırları almasın
+            entries = list(
+                ScheduledReminder.objects.select_for_update(skip_locked=True, of=("self",))
+                .filter(due_at__lte=now)
+                .select_related("medication__user")
+                .order_by("due_at")[:REMINDER_SWEEP_BATCH_SIZE]
+            )
+            if not entries:
+                break
+
+            due_medications = []
+            to_update = []
+            to_delete = []
+            next_times = next_reminder_times(entry.medication for entry in entries)
+            for entry, (medication, next_reminder) in zip(entries, next_times):
+                # Süresi geçmiş hatırlatmaları (ör. işçi kapalıyken kaçırılanlar) ve kuyruk güncellenmeden
+                # pasifleşen veya bitmiş ilaçları gönderme
+                due_day = timezone.localdate(entry.due_at)
+                if (
+                    entry.due_at >= now - REMINDER_EXPIRY
+                    and medication.is_active
+                    and not (medication.end_date and medication.end_date < due_day)
+                ):
+                    due_medications.append(medication)
+
+                if next_reminder:
+                    entry.due_at = next_reminder
+                    to_update.append(entry)
+                else:
+                    to_delete.append(entry.id)
+
+            ScheduledReminder.objects.bulk_update(to_update, ["due_at"])
+            ScheduledReminder.objects.filter(id__in=to_delete).delete()
+
+        # Emailler kilitler bırakıldıktan sonra gönderilir
+        sent += deliver_medication_reminders(due_medications)
+
+        if len(entries) < REMINDER_SWEEP_BATCH_SIZE:
+            break
+
+    logger.info(f"Zamanı gelen ilaç hatırlatmaları gönderildi: {sent} adet")
+    return sent
+
+
+@shared_task
+def process_email_outbox(max_batches=10):
+    """Email kuyruğunu gruplar halinde boşalt"""
+    totals = {"claimed": 0, "sent": 0, "retried": 0, "failed": 0}
+    for _ in range(max_batches):
+        metrics = send_outbox_batch()
+        for key in totals:
+            totals[key] += metrics[key]
+        if metrics["claimed"] < OUTBOX_BATCH_SIZE:
+            break
+
+    if totals["claimed"]:
+        logger.info(
+            f"Email kuyruğu işlendi: gönderilen={totals['sent']} tekrar_denenecek={totals['retried']} "
+            f"başarısız={totals['failed']}"
+        )
+    return totals
+
+
+@shared_task
+def backfill_lab_parameter_results(lab_parameter_id):
+    """Varsayılan referans aralığı değişen parametrenin kendi aralığı olmayan sonuçlarını yeniden hesapla"""
+    updated = backfill_lab_values(lab_parameter_id=lab_parameter_id, reference_range="")
+    logger.info(f"Laboratuvar sonuçları yeniden hesaplandı: parametre ID {lab_parameter_id}, {updated} sonuç")
+    return updated
+
+
+def schedule_lab_parameter_backfill(lab_parameter_id):
+    """Parametre sonuçlarının yeniden hesaplanmasını arka plana al"""
+    try:
+        backfill_lab_parameter_results.delay(lab_parameter_id)
+    except Exception as e:
+        # Celery'ye ulaşılamazsa sonuçlar doğrudan yeniden hesaplanır
+        logger.error(
+            f"Laboratuvar sonuçlarının hesaplanması zamanlanamadı: parametre ID {lab_parameter_id}, Hata: {str(e)}"
+        )
+        backfill_lab_parameter_results(lab_parameter_id)
+
+
+def schedule_message_notification(message):
+    """Yeni mesaj bildirimini arka plana al; kısa sürede gelen mesajlar tek emailde birleştirilir.
+
+    Mesaj email_pending işaretiyle kaydedilir. Alıcının daha eski bekleyen bir mesajı varsa onun için
+    zamanlanmış özet bu mesajı da gönderir, yeni bir görev zamanlanmaz.
+    """
+    if Message.objects.filter(receiver_id=message.receiver_id, email_pending=True, id__lt=message.id).exists():
         return
 
-    # Mevcut görevi sil
-    task_name = f"medication_reminder_{medication.id}"
-    PeriodicTask.objects.filter(name=task_name).delete()
-
-    # Yeni görev için zamanlama oluştur
-    schedule, _ = CrontabSchedule.objects.get_or_create(
-        hour=next_reminder.hour,
-        minute=next_reminder.minute,
-        day_of_week="*",
-        day_of_month="*",
-        month_of_year="*",
-        timezone=timezone.get_current_timezone_name(),
-    )
+    try:
+        send_message_digest.apply_async(args=[message.receiver_id], countdown=MESSAGE_DIGEST_DELAY)
+    except Exception as e:
+        # Celery'ye ulaşılamazsa bekleyen bildirimleri doğrudan email kuyruğuna ekle
+        logger.error(f"Mesaj bildirimi zamanlanamadı: ID {message.id}, Hata: {str(e)}")
+        send_message_digest(message.receiver_id)
+
+
+@shared_task
+def send_message_digest(receiver_id):
+    """Alıcıya bildirimi bekleyen okunmamış mesajlar için tek bir bildirim emaili gönder"""
+    pending = Message.objects.filter(receiver_id=receiver_id, email_pending=True)
+    with transaction.atomic():
+        # Email kuyruğa eklenirken mesajların işareti de kaldırılır; ikisi birlikte kaydedilir
+        claimed = list(pending.select_for_update().order_by("id").values_list("id", flat=True))
+        if not claimed:
+            return 0
+        Message.objects.filter(id__in=claimed).update(email_pending=False)
+        unread = list(
+            Message.objects.filter(id__in=claimed, is_read=False)
+            .select_related("sender", "receiver")
+            .order_by("created_at")[:MESSAGE_DIGEST_LIMIT]
+        )
+        if len(unread) == 1:
+            send_message_notification_email(unread[0])
+        elif unread:
+            send_message_digest_email(unread[0].receiver, unread)
+
+    # Özet hazırlanırken gelen mesajlar, bu özeti beklediği için kendi görevini zamanlamamış olabilir
+    if pending.exists():
+        send_message_digest.apply_async(args=[receiver_id], countdown=MESSAGE_DIGEST_DELAY)
+
+    if unread:
+        logger.info(f"Mesaj bildirimi kuyruğa eklendi: Alıcı ID {receiver_id}, {len(unread)} mesaj")
+    return len(unread)
+
+
+@shared_task
+def reconcile_unread_message_counts():
+    """Okunmamış mesaj sayaçlarını veritabanıyla eşitle"""
+    corrected = reconcile_unread_counts()
+    logger.info(f"Okunmamış mesaj sayaçları eşitlendi: {corrected} sayaç düzeltildi")
+    return corrected
 
-    # Yeni görevi oluştur
-    PeriodicTask.objects.create(
-        name=task_name,
-        task="health_data.tasks.send_medication_reminder",
-        crontab=schedule,
-        args=json.dumps([medication.id]),
-        enabled=True,
-        one_off=True,  # Görev sadece bir kez çalışsın
-        expires=next_reminder + timedelta(minutes=5),  # 5 dakika sonra görevi iptal et
+
+@shared_task
+def bootstrap_reminder_schedule():
+    """Hatırlatma kuyruğunda kaydı olmayan aktif ilaçları tek geçişte toplu olarak kuyruğa ekle"""
+    today = timezone.localdate()
+    # Kuyruktaki kayıtlara dokunulmaz; yalnızca eksik olanlar (ör. veri aktarımı sonrası) eklenir
+    medications = (
+        Medication.objects.filter(is_active=True, scheduled_reminder__isnull=True)
+        .exclude(end_date__lt=today)
+        .only("id", "reminder_times", "frequency", "is_active", "start_date", "end_date")
+        .order_by()
     )
 
-    # Celery Beat'i yeniden yükle
-    from django.core.cache import cache
+    created = 0
+    batch = []
+    for medication, due_at in next_reminder_times(medications.iterator(chunk_size=REMINDER_SWEEP_BATCH_SIZE)):
+        if due_at:
+            batch.append(ScheduledReminder(medication_id=medication.id, due_at=due_at))
+        if len(batch) >= REMINDER_SWEEP_BATCH_SIZE:
+            created += len(ScheduledReminder.objects.bulk_create(batch, ignore_conflicts=True))
+            batch = []
+    if batch:
+        created += len(ScheduledReminder.objects.bulk_create(batch, ignore_conflicts=True))
+
+    # Pasif veya süresi dolmuş ilaçların kuyruk kayıtlarını temizle
+    removed, _ = ScheduledReminder.objects.filter(
+        Q(medication__is_active=False) | Q(medication__end_date__lt=today)
+    ).delete()
+
+    logger.info(f"Hatırlatma kuyruğu tamamlandı: {created} eklendi, {removed} silindi")
+    return created
+
+
+def schedule_next_reminder(medication):
+    """Bir sonraki hatırlatma zamanını hatırlatma kuyruğuna yaz"""
+    next_reminder = medication.get_next_reminder_time()
+    if not next_reminder:
+        ScheduledReminder.objects.filter(medication=medication).delete()
+        return
 
-    cache.delete("django_celery_beat_schedule")
+    ScheduledReminder.objects.update_or_create(medication=medication, defaults={"due_at": next_reminder})
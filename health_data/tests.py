@@ -1 +1,1457 @@
-# Create your tests here.
+import importlib
+import io
+import json
+import re
+import smtplib
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Notification
+
+from .counters import get_unread_count, reconcile_unread_counts, unread_count_cache_key
+from .exporters import EXPORT_TABLES
+from .forms import BloodTestResultFormSet
+from .importers import import_health_data, iter_json_array
+from .labs import backfill_lab_values, lab_parameters, parse_lab_value, parse_reference_range
+from .models import (
+    Appointment,
+    BloodTestResult,
+    DailyActivity,
+    EmailOutbox,
+    Exercise,
+    HealthRollup,
+    HospitalRecord,
+    LabParameter,
+    Medication,
+    MedicationReminderTime,
+    Message,
+    ScheduledReminder,
+    Sleep,
+    next_reminder_times,
+    parse_reminder_time,
+)
+from .rollups import rebuild_health_rollups
+from .tasks import (
+    MESSAGE_DIGEST_DELAY,
+    backfill_lab_parameter_results,
+    bootstrap_reminder_schedule,
+    check_appointments,
+    check_medication_reminders,
+    deliver_medication_reminders,
+    dispatch_due_reminders,
+    process_email_outbox,
+    schedule_message_notification,
+    schedule_next_reminder,
+    send_medication_reminder,
+    send_message_digest,
+)
+from .utils import (
+    OUTBOX_LEASE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_RETRY_DELAY,
+    build_medication_reminder_email,
+    queue_emails,
+    send_outbox_batch,
+)
+from .views import HOSPITAL_RECORD_GROUPS
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN çıktısı SQLite'a özgü")
+class QueryPlanTests(TestCase):
+    """Kullanıcıya özel listelerin tam tablo taraması yapmadığını sorgu planı üzerinden doğrular"""
+
+    TABLES = (
+        "health_data_medication",
+        "health_data_exercise",
+        "health_data_sleep",
+        "health_data_message",
+        "health_data_appointment",
+        "health_data_hospitalrecord",
+        "health_data_bloodtestresult",
+        "core_notification",
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+        cls.doctor = User.objects.create_user(
+            username="doktor", email="doktor@example.com", password="parola", is_doctor=True
+        )
+        today = date.today()
+        hba1c = LabParameter.objects.create(name="HbA1c", unit="%", reference_range="4.0-5.6")
+        for day in range(10):
+            Exercise.objects.create(
+                user=cls.user,
+                date=today - timedelta(days=day),
+                exercise_type="walking",
+                duration=30,
+                intensity=5,
+                calories_burned=100,
+            )
+            Sleep.objects.create(
+                user=cls.user,
+                date=today - timedelta(days=day),
+                sleep_time=time(23, 0),
+                wake_time=time(7, 0),
+                quality=4,
+                duration=8,
+            )
+            Message.objects.create(sender=cls.doctor, receiver=cls.user, subject="Konu", content="İçerik")
+            Message.objects.create(sender=cls.user, receiver=cls.doctor, subject="Konu", content="İçerik")
+            record = HospitalRecord.objects.create(
+                user=cls.user,
+                record_type="blood_test",
+                date=today - timedelta(days=day),
+                title="Kan testi",
+                description="-",
+                results="-",
+            )
+            BloodTestResult.objects.create(hospital_record=record, lab_parameter=hba1c, value=f"5.{day}")
+            Notification.objects.create(user=cls.user, notification_type="system", title="Bildirim", message="-")
+        Medication.objects.create(
+            user=cls.user, name="İlaç", dosage="1", frequency="daily", start_date=today, end_date=today
+        )
+        Appointment.objects.create(patient=cls.user, doctor=cls.doctor, date=today + timedelta(days=1))
+
+    def setUp(self):
+        cache.clear()
+        lab_parameters.clear()
+        self.client.force_login(self.user)
+
+    def get_query_plans(self, url):
+        """Görünümün çalıştırdığı sorgular için (tablo, plan satırları) listesi döndür"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query["sql"]
+                if not sql.startswith("SELECT") or not any(f'"{table}"' in sql for table in self.TABLES):
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                plans.append((sql, [row[-1] for row in cursor.fetchall()]))
+        return plans
+
+    def assertUsesIndexes(self, url, expected_index):
+        plans = self.get_query_plans(url)
+        self.assertTrue(plans, f"{url} için izlenen tablolara sorgu yapılmadı")
+
+        for sql, details in plans:
+            for detail in details:
+                # "SCAN tablo" (USING INDEX olmadan) tam tablo taraması demektir
+                self.assertIsNone(
+                    re.fullmatch(r"SCAN (health_data_\w+|core_notification)", detail),
+                    f"{url} tam tablo taraması yapıyor:\n{sql}\n{details}",
+                )
+        used = " ".join(detail for _, details in plans for detail in details)
+        self.assertIn(expected_index, used, f"{url} beklenen indeksi kullanmıyor: {expected_index}")
+
+    def test_medication_list(self):
+        self.assertUsesIndexes(reverse("health_data:medication_list"), "medication_user_start_idx")
+
+    def test_exercise_list(self):
+        self.assertUsesIndexes(reverse("health_data:exercise_list"), "exercise_user_date_idx")
+
+    def test_sleep_list(self):
+        self.assertUsesIndexes(reverse("health_data:sleep_list"), "sleep_user_date_idx")
+
+    def test_message_list(self):
+        self.assertUsesIndexes(reverse("health_data:message_list"), "message_sender_created_idx")
+        self.assertUsesIndexes(reverse("health_data:message_list"), "message_receiver_created_idx")
+
+    def test_message_detail(self):
+        message = Message.objects.filter(receiver=self.user).earliest("id")
+        self.assertUsesIndexes(reverse("health_data:message_detail", args=[message.id]), "message_thread_idx")
+
+    def test_appointment_list(self):
+        self.assertUsesIndexes(reverse("health_data:appointment_list"), "appointment_patient_date_idx")
+
+    def test_hospital_record_list(self):
+        self.assertUsesIndexes(reverse("health_data:hospital_record_list"), "hospitalrecord_user_")
+
+    def test_lab_trend(self):
+        url = reverse("health_data:lab_trend") + "?parameter=HbA1c"
+        self.assertUsesIndexes(url, "bloodtest_param_user_date_idx")
+        self.assertEqual(len(self.get_query_plans(url)), 1)
+
+    def test_notification_list(self):
+        self.assertUsesIndexes(reverse("core:notification_list"), "notification_user_created_idx")
+
+    def test_dashboard(self):
+        self.assertUsesIndexes(reverse("core:dashboard"), "sleep_user_date_idx")
+
+
+class HospitalRecordListQueryCountTests(TestCase):
+    """Hastane kayıtları listesinin sorgu sayısı kayıt sayısından bağımsız olmalı"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+        cls.doctor = User.objects.create_user(
+            username="doktor", email="doktor@example.com", password="parola", is_doctor=True
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def create_records(self, user, count):
+        record_types = [record_type for record_type, _ in HospitalRecord.RECORD_TYPES]
+        HospitalRecord.objects.bulk_create(
+            HospitalRecord(
+                user=user,
+                record_type=record_types[i % len(record_types)],
+                date=date.today() - timedelta(days=i),
+                title=f"Kayıt {i}",
+                description="-",
+                results="-",
+            )
+            for i in range(count)
+        )
+
+    def assertListQueries(self, user, expected_total):
+        self.client.force_login(user)
+        url = reverse("health_data:hospital_record_list")
+        # Okunmamış mesaj sayacını önbelleğe al
+        self.client.get(url)
+
+        # Oturum, kullanıcı, tür sayıları ve sayfa sorguları
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context["records"]), min(expected_total, 20))
+        self.assertEqual(sum(count for _, count in response.context["record_type_summary"]), expected_total)
+        grouped = sum(len(response.context[group]) for group in HOSPITAL_RECORD_GROUPS.values())
+        self.assertEqual(grouped, len(response.context["records"]))
+
+    def test_patient_query_count_is_constant(self):
+        self.create_records(self.user, 5)
+        self.assertListQueries(self.user, 5)
+        self.create_records(self.user, 200)
+        self.assertListQueries(self.user, 205)
+
+    def test_doctor_query_count_is_constant(self):
+        self.create_records(self.user, 150)
+        self.create_records(self.doctor, 150)
+        self.assertListQueries(self.doctor, 300)
+
+
+class AsyncListViewTests(TestCase):
+    """Asenkron liste görünümleri yalnızca kullanıcının kayıtlarını sayfa sayfa göstermeli"""
+
+    COUNT = 25
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+        cls.other = User.objects.create_user(username="diger", email="diger@example.com", password="parola")
+        cls.doctor = User.objects.create_user(
+            username="doktor", email="doktor@example.com", password="parola", is_doctor=True
+        )
+        today = date.today()
+        for user in (cls.user, cls.other):
+            days = [today - timedelta(days=i) for i in range(cls.COUNT)]
+            Medication.objects.bulk_create(
+                Medication(user=user, name=f"İlaç {i}", dosage="1", frequency="daily", start_date=day)
+                for i, day in enumerate(days)
+            )
+            Exercise.objects.bulk_create(
+                Exercise(user=user, date=day, exercise_type="walking", duration=30, intensity=5, calories_burned=100)
+                for day in days
+            )
+            Sleep.objects.bulk_create(
+                Sleep(user=user, date=day, sleep_time=time(23), wake_time=time(7), quality=4, duration=8)
+                for day in days
+            )
+            Appointment.objects.bulk_create(Appointment(patient=user, doctor=cls.doctor, date=day) for day in days)
+            Message.objects.bulk_create(
+                Message(sender=cls.doctor, receiver=user, subject=f"Konu {i}", content="-") for i in range(cls.COUNT)
+            )
+            HospitalRecord.objects.bulk_create(
+                HospitalRecord(
+                    user=user, record_type="blood_test", date=day, title="Kayıt", description="-", results="-"
+                )
+                for day in days
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    async def assertPaginated(self, url_name, context_name, owner_field="user_id"):
+        url = reverse(url_name)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 302)
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        first = response.context[context_name]
+        self.assertEqual(len(first), 20)
+        self.assertTrue(first.has_next)
+
+        response = await self.async_client.get(f"{url}?{first.next_query}")
+        second = response.context[context_name]
+        self.assertEqual(len(second), self.COUNT - 20)
+        self.assertFalse(second.has_next)
+
+        objects = list(first) + list(second)
+        self.assertEqual(len({obj.id for obj in objects}), self.COUNT)
+        self.assertEqual({getattr(obj, owner_field) for obj in objects}, {self.user.id})
+        return response
+
+    async def test_medication_list(self):
+        await self.assertPaginated("health_data:medication_list", "medications")
+
+    async def test_exercise_list(self):
+        await self.assertPaginated("health_data:exercise_list", "exercises")
+
+    async def test_sleep_list(self):
+        await self.assertPaginated("health_data:sleep_list", "sleeps")
+
+    async def test_appointment_list(self):
+        await self.assertPaginated("health_data:appointment_list", "appointments", "patient_id")
+
+    async def test_message_list(self):
+        response = await self.assertPaginated("health_data:message_list", "received_messages", "receiver_id")
+        self.assertEqual(response.context["unread_count"], self.COUNT)
+        self.assertEqual(len(response.context["sent_messages"]), 0)
+
+    async def test_hospital_record_list(self):
+        response = await self.assertPaginated("health_data:hospital_record_list", "records")
+        self.assertEqual(response.context["record_type_summary"], [("Kan Testi", self.COUNT)])
+        self.assertEqual(len(response.context["blood_tests"]), self.COUNT - 20)
+
+        # Doktorlar tüm hastaların kayıtlarını görür
+        await self.async_client.aforce_login(self.doctor)
+        response = await self.async_client.get(reverse("health_data:hospital_record_list"))
+        self.assertEqual(response.context["record_type_summary"], [("Kan Testi", 2 * self.COUNT)])
+
+
+class AppointmentListQueryCountTests(TestCase):
+    """Randevu listesinin sorgu sayısı randevu sayısından bağımsız olmalı"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+        cls.doctors = [
+            User.objects.create_user(
+                username=f"doktor{i}", email=f"doktor{i}@example.com", password="parola", is_doctor=True
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def assertListQueries(self, count):
+        Appointment.objects.bulk_create(
+            Appointment(patient=self.user, doctor=self.doctors[i % 3], date=date.today() - timedelta(days=i))
+            for i in range(count)
+        )
+        self.client.force_login(self.user)
+        url = reverse("health_data:appointment_list")
+        # Okunmamış mesaj sayacını önbelleğe al
+        self.client.get(url)
+
+        # Oturum, kullanıcı ve doktorlarıyla birlikte sayfa sorgusu
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context["appointments"]), min(Appointment.objects.count(), 20))
+
+    def test_query_count_is_constant(self):
+        self.assertListQueries(5)
+        self.assertListQueries(30)
+
+
+class MessageViewQueryCountTests(TestCase):
+    """Mesaj görünümlerinde mesaj başına ek kullanıcı sorgusu yapılmamalı"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="hasta", email="hasta@example.com", password="parola", first_name="Ayşe"
+        )
+        cls.doctors = [
+            User.objects.create_user(
+                username=f"doktor{i}", email=f"doktor{i}@example.com", password="parola", is_doctor=True
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def create_conversation(self, count):
+        for i in range(count):
+            doctor = self.doctors[i % len(self.doctors)]
+            Message.objects.create(sender=doctor, receiver=self.user, subject=f"Konu {i}", content="İçerik")
+            Message.objects.create(sender=self.user, receiver=doctor, subject=f"Yanıt {i}", content="İçerik")
+
+    def test_message_list_query_count_is_constant(self):
+        url = reverse("health_data:message_list")
+        self.create_conversation(2)
+        self.client.get(url)  # Okunmamış mesaj sayacını önbelleğe al
+
+        # Oturum, kullanıcı, gelen ve giden mesaj sayfaları
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+        self.create_conversation(15)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context["received_messages"]), 17)
+
+    def test_message_detail_query_count_is_constant(self):
+        message = Message.objects.create(
+            sender=self.doctors[0], receiver=self.user, subject="Konu", content="İçerik", is_read=True
+        )
+        url = reverse("health_data:message_detail", args=[message.id])
+        self.client.get(url)  # Okunmamış mesaj sayacını önbelleğe al
+
+        for doctor in self.doctors:
+            Message.objects.create(sender=doctor, receiver=self.user, subject="Re", content="-", parent_message=message)
+        # Oturum, kullanıcı, mesaj ve yanıtlar
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+        for i in range(10):
+            Message.objects.create(
+                sender=self.doctors[i % 3], receiver=self.user, subject="Re", content="-", parent_message=message
+            )
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context["replies"]), 13)
+
+    def test_message_detail_renders_whole_thread_in_one_query(self):
+        doctor = self.doctors[0]
+        root = Message.objects.create(sender=self.user, receiver=doctor, subject="Konu", content="-", is_read=True)
+        reply = Message.objects.create(
+            sender=doctor, receiver=self.user, subject="Re", content="-", parent_message=root, is_read=True
+        )
+        nested = Message.objects.create(
+            sender=self.user, receiver=doctor, subject="Re", content="-", parent_message=reply
+        )
+        other = Message.objects.create(sender=doctor, receiver=self.user, subject="Başka", content="-", is_read=True)
+        self.assertEqual([reply.thread_root_id, nested.thread_root_id], [root.id, root.id])
+
+        url = reverse("health_data:message_detail", args=[reply.id])
+        self.client.get(url)  # Okunmamış mesaj sayacını önbelleğe al
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual([item.id for item in response.context["replies"]], [root.id, nested.id])
+        self.assertNotIn(other.id, [item.id for item in response.context["replies"]])
+
+    def test_deleting_the_root_keeps_the_thread_together(self):
+        doctor = self.doctors[0]
+        root = Message.objects.create(sender=self.user, receiver=doctor, subject="Konu", content="-", is_read=True)
+        first = Message.objects.create(
+            sender=doctor, receiver=self.user, subject="Re", content="-", parent_message=root, is_read=True
+        )
+        second = Message.objects.create(
+            sender=self.user, receiver=doctor, subject="Re", content="-", parent_message=first, is_read=True
+        )
+        third = Message.objects.create(
+            sender=doctor, receiver=self.user, subject="Re", content="-", parent_message=root, is_read=True
+        )
+
+        response = self.client.post(reverse("health_data:message_delete", args=[root.id]))
+        self.assertRedirects(response, reverse("health_data:message_list"))
+
+        # En eski yanıt konuşmanın yeni ilk mesajı olur
+        self.assertEqual(
+            dict(Message.objects.values_list("id", "thread_root_id")),
+            {first.id: None, second.id: first.id, third.id: first.id},
+        )
+        response = self.client.get(reverse("health_data:message_detail", args=[third.id]))
+        self.assertEqual([item.id for item in response.context["replies"]], [first.id, second.id])
+
+        # Sonraki yanıtlar yeni köke bağlanır
+        reply = Message.objects.create(
+            sender=doctor, receiver=self.user, subject="Re", content="-", parent_message_id=second.id
+        )
+        self.assertEqual(reply.thread_root_id, first.id)
+
+    def test_message_detail_is_only_visible_to_participants(self):
+        message = Message.objects.create(sender=self.doctors[0], receiver=self.doctors[1], subject="Gizli", content="-")
+        url = reverse("health_data:message_detail", args=[message.id])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        message.refresh_from_db()
+        self.assertFalse(message.is_read)
+
+        self.client.force_login(self.doctors[0])
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class UnreadCountTests(TestCase):
+    """Okunmamış mesaj sayacı gönderme, okuma ve silmeyle birlikte güncellenmeli, sapmalar düzeltilmeli"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+        cls.doctor = User.objects.create_user(
+            username="doktor", email="doktor@example.com", password="parola", is_doctor=True
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def badge(self):
+        # Mesajları hasta gönderir (form yalnızca doktorları alıcı olarak listeler), rozet doktorundur
+        self.client.force_login(self.doctor)
+        return self.client.get(reverse("core:notification_list")).context["unread_message_count"]
+
+    def send(self, subject="Konu"):
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("health_data:message_send"), {"receiver": self.doctor.id, "subject": subject, "content": "-"}
+            )
+        self.assertEqual(response.status_code, 302)
+        return Message.objects.get(subject=subject)
+
+    def test_sending_and_reading_update_the_badge(self):
+        self.assertEqual(self.badge(), 0)
+        first = self.send("Birinci")
+        second = self.send("İkinci")
+        # Sayaç önbellekte artırılır, veritabanından yeniden hesaplanmaz
+        self.assertEqual(cache.get(unread_count_cache_key(self.doctor.id)), 2)
+        self.assertEqual(self.badge(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse("health_data:message_detail", args=[first.id]))
+        self.assertEqual(self.badge(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(self.badge(), 0)
+
+    def test_rolled_back_messages_do_not_change_the_counter(self):
+        self.assertEqual(get_unread_count(self.user.id), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Message.objects.create(sender=self.doctor, receiver=self.user, subject="Konu", content="-")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(get_unread_count(self.user.id), 0)
+
+    def test_reconcile_corrects_drift(self):
+        Message.objects.create(sender=self.doctor, receiver=self.user, subject="Konu", content="-")
+        self.assertEqual(get_unread_count(self.user.id), 1)
+        self.assertEqual(get_unread_count(self.doctor.id), 0)
+
+        cache.set(unread_count_cache_key(self.user.id), 5)
+        self.assertEqual(reconcile_unread_counts(), 1)
+        self.assertEqual(get_unread_count(self.user.id), 1)
+        self.assertEqual(cache.get(unread_count_cache_key(self.doctor.id)), 0)
+
+
+class MessageDigestTests(TestCase):
+    """Kısa sürede gelen mesajlar tek emailde birleşmeli, sonradan gelen mesajlar da bildirilmeli"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+        cls.doctor = User.objects.create_user(
+            username="doktor", email="doktor@example.com", password="parola", is_doctor=True
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def send(self, subject, minutes_ago=0):
+        message = Message.objects.create(
+            sender=self.user, receiver=self.doctor, subject=subject, content="-", email_pending=True
+        )
+        Message.objects.filter(id=message.id).update(created_at=timezone.now() - timedelta(minutes=minutes_ago))
+        schedule_message_notification(message)
+        return message
+
+    @mock.patch.object(send_message_digest, "apply_async")
+    def test_messages_are_coalesced_and_later_ones_still_notified(self, scheduled):
+        self.send("Birinci", minutes_ago=3)
+        self.send("İkinci", minutes_ago=3)
+        # İkinci mesaj bekleyen özete eklenir, yeni görev zamanlanmaz
+        self.assertEqual(scheduled.call_count, 1)
+        self.assertEqual(scheduled.call_args.kwargs["countdown"], MESSAGE_DIGEST_DELAY)
+        self.assertEqual(send_message_digest(self.doctor.id), 2)
+        self.assertEqual(list(EmailOutbox.objects.values_list("subject", flat=True)), ["2 Yeni Mesajınız Var"])
+
+        # Özetten MESSAGE_DIGEST_DELAY'den uzun süre sonra gelen mesaj kendi bildirimini alır
+        self.send("Üçüncü")
+        self.assertEqual(scheduled.call_count, 2)
+        self.assertEqual(send_message_digest(self.doctor.id), 1)
+        self.assertEqual(EmailOutbox.objects.filter(subject="Yeni Mesaj: Üçüncü").count(), 1)
+
+        # Bekleyen mesaj kalmadığında görev email göndermez
+        self.assertEqual(send_message_digest(self.doctor.id), 0)
+        self.assertEqual(EmailOutbox.objects.count(), 2)
+        self.assertFalse(Message.objects.filter(email_pending=True).exists())
+
+    @mock.patch.object(send_message_digest, "apply_async")
+    def test_read_messages_are_not_emailed(self, scheduled):
+        first = self.send("Birinci")
+        self.send("İkinci")
+        first.mark_as_read()
+        self.assertEqual(send_message_digest(self.doctor.id), 1)
+        self.assertEqual(list(EmailOutbox.objects.values_list("subject", flat=True)), ["Yeni Mesaj: İkinci"])
+
+    def test_unreachable_broker_sends_immediately(self):
+        with mock.patch.object(send_message_digest, "apply_async", side_effect=OSError("bağlantı yok")):
+            self.send("Birinci")
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+        self.assertFalse(Message.objects.filter(email_pending=True).exists())
+
+
+class EmailOutboxTests(TestCase):
+    """Email kuyruğu tek bağlantıyla göndermeli, geçici hatalarda artan aralıklarla tekrar denemeli"""
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def queue(self, count):
+        return EmailOutbox.objects.bulk_create(
+            [
+                EmailOutbox(
+                    subject=f"Konu {i}",
+                    body="-",
+                    html_body="<p>-</p>",
+                    from_email="a@example.com",
+                    recipients=[f"hasta{i}@example.com"],
+                    next_attempt_at=self.now,
+                )
+                for i in range(count)
+            ]
+        )
+
+    def at(self, delta):
+        # Kuyruk işlemleri ileri bir zamanda çalışıyormuş gibi
+        return mock.patch("health_data.utils.timezone.now", return_value=self.now + delta)
+
+    def test_success(self):
+        self.queue(3)
+        self.assertEqual(process_email_outbox(), {"claimed": 3, "sent": 3, "retried": 0, "failed": 0})
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), [f"hasta{i}@example.com" for i in range(3)])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+        self.assertEqual(set(EmailOutbox.objects.values_list("status", "attempts")), {("sent", 1)})
+        self.assertEqual(process_email_outbox()["claimed"], 0)
+
+    def test_transient_failure_is_retried_with_backoff(self):
+        first, second = self.queue(2)
+        send_messages = EmailBackend.send_messages
+
+        def flaky(backend, messages):
+            if messages[0].to == first.recipients:
+                raise smtplib.SMTPServerDisconnected("bağlantı koptu")
+            return send_messages(backend, messages)
+
+        with mock.patch.object(EmailBackend, "send_messages", flaky), self.at(timedelta()):
+            metrics = send_outbox_batch()
+        self.assertEqual([metrics[key] for key in ("claimed", "sent", "retried", "failed")], [2, 1, 1, 0])
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.attempts, first.last_error), ("pending", 1, "bağlantı koptu"))
+        self.assertEqual(first.next_attempt_at, self.now + OUTBOX_RETRY_DELAY)
+
+        # Bekleme süresi dolmadan tekrar denenmez, sonraki hatada süre iki katına çıkar
+        with self.at(OUTBOX_RETRY_DELAY / 2):
+            self.assertEqual(send_outbox_batch()["claimed"], 0)
+        with (
+            mock.patch.object(EmailBackend, "open", side_effect=OSError("sunucuya ulaşılamadı")),
+            self.at(OUTBOX_RETRY_DELAY),
+        ):
+            self.assertEqual(send_outbox_batch()["retried"], 1)
+        first.refresh_from_db()
+        self.assertEqual(first.attempts, 2)
+        self.assertEqual(first.next_attempt_at, self.now + OUTBOX_RETRY_DELAY * 3)
+
+        with self.at(OUTBOX_RETRY_DELAY * 3):
+            self.assertEqual(send_outbox_batch()["sent"], 1)
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.attempts), ("sent", 3))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_gives_up_after_max_attempts(self):
+        (item,) = self.queue(1)
+        EmailOutbox.objects.filter(id=item.id).update(attempts=OUTBOX_MAX_ATTEMPTS - 1)
+        with mock.patch.object(EmailBackend, "send_messages", side_effect=smtplib.SMTPDataError(554, "red")):
+            self.assertEqual(send_outbox_batch()["failed"], 1)
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.attempts), ("failed", OUTBOX_MAX_ATTEMPTS))
+        with self.at(timedelta(days=1)):
+            self.assertEqual(send_outbox_batch()["claimed"], 0)
+
+    def test_claimed_emails_are_released_when_the_lease_expires(self):
+        self.queue(2)
+        # İşçi emailleri aldıktan sonra göndermeden öldü
+        with self.at(timedelta()), mock.patch.object(EmailBackend, "open", side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                send_outbox_batch()
+        self.assertEqual(set(EmailOutbox.objects.values_list("status", "attempts")), {("pending", 0)})
+
+        with self.at(OUTBOX_LEASE - timedelta(seconds=1)):
+            self.assertEqual(send_outbox_batch()["claimed"], 0)
+        with self.at(OUTBOX_LEASE):
+            self.assertEqual(send_outbox_batch()["sent"], 2)
+        self.assertEqual(len(mail.outbox), 2)
+
+
+class CheckAppointmentsTests(TestCase):
+    """Randevu hatırlatmaları tarih + saate göre seçilmeli ve yalnızca bir kez gönderilmeli"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+        cls.doctor = User.objects.create_user(
+            username="doktor", email="doktor@example.com", password="parola", is_doctor=True
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def create_appointment(self, delta, **kwargs):
+        starts_at = timezone.localtime() + delta
+        return Appointment.objects.create(
+            patient=self.user, doctor=self.doctor, date=starts_at.date(), time=starts_at.time(), **kwargs
+        )
+
+    def test_only_appointments_within_next_24_hours_are_reminded(self):
+        due = [self.create_appointment(timedelta(hours=hours)) for hours in (1, 12, 23)]
+        past = self.create_appointment(timedelta(hours=-1))
+        later = self.create_appointment(timedelta(hours=25))
+        inactive = self.create_appointment(timedelta(hours=2), is_active=False)
+
+        # Savepoint, kilitli seçim, toplu mesaj, toplu işaretleme ve savepoint bırakma
+        with self.assertNumQueries(5):
+            self.assertEqual(check_appointments(), 3)
+
+        reminded = set(Appointment.objects.filter(notification_sent=True).values_list("id", flat=True))
+        self.assertEqual(reminded, {appointment.id for appointment in due})
+        self.assertNotIn(past.id, reminded)
+        self.assertNotIn(later.id, reminded)
+        self.assertNotIn(inactive.id, reminded)
+
+        message = Message.objects.get(subject__contains=due[0].time.strftime("%H:%M"))
+        self.assertEqual((message.sender, message.receiver), (self.doctor, self.user))
+
+        # İkinci çalıştırma aynı randevular için tekrar mesaj göndermemeli
+        self.assertEqual(check_appointments(), 0)
+        self.assertEqual(Message.objects.count(), 3)
+
+
+class BootstrapReminderScheduleTests(TestCase):
+    """Kuyruk başlatma yalnızca eksik kayıtları toplu eklemeli, mevcut kayıtlara dokunmamalı"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+
+    def create_medications(self, count, **kwargs):
+        # bulk_create save() çağırmaz; veri aktarımı sonrası kuyrukta kaydı olmayan ilaçları taklit eder
+        today = timezone.localdate()
+        defaults = {"dosage": "1", "frequency": "daily", "start_date": today, "reminder_times": ["08:00", "20:00"]}
+        return Medication.objects.bulk_create(
+            [Medication(user=self.user, name=f"İlaç {i}", **{**defaults, **kwargs}) for i in range(count)]
+        )
+
+    def test_missing_reminders_are_created_in_bulk(self):
+        missing = self.create_medications(5)
+        ended = self.create_medications(2, end_date=timezone.localdate() - timedelta(days=1))
+        existing = Medication.objects.create(
+            user=self.user, name="Kayıtlı", dosage="1", frequency="daily", start_date=timezone.localdate()
+        )
+        pinned_due_at = timezone.now() - timedelta(seconds=30)
+        ScheduledReminder.objects.filter(medication=existing).update(due_at=pinned_due_at)
+        ScheduledReminder.objects.create(medication=ended[0], due_at=timezone.now())
+
+        # Eksik seçim, toplu ekleme ve eski kayıtların silinmesi; ilaç sayısından bağımsız
+        with self.assertNumQueries(3):
+            self.assertEqual(bootstrap_reminder_schedule(), 5)
+
+        scheduled = dict(ScheduledReminder.objects.values_list("medication_id", "due_at"))
+        self.assertEqual(set(scheduled), {medication.id for medication in missing} | {existing.id})
+        self.assertEqual(scheduled[missing[0].id], missing[0].get_next_reminder_time())
+        # Zamanı gelmiş ama henüz gönderilmemiş hatırlatma ileri kaydırılmamalı
+        self.assertEqual(scheduled[existing.id], pinned_due_at)
+
+        self.assertEqual(bootstrap_reminder_schedule(), 0)
+
+
+class ReminderDispatchTests(TestCase):
+    """Kuyruktan yalnızca zamanı gelen hatırlatmalar gönderilmeli ve bir sonraki zamana kaydırılmalı"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+
+    def setUp(self):
+        cache.clear()
+
+    def create_medication(self, name, due_in=None, **kwargs):
+        medication = Medication.objects.create(
+            user=self.user, name=name, dosage="1", frequency="twice_daily", start_date=timezone.localdate()
+        )
+        if kwargs:
+            # Sinyalleri ve yeniden zamanlamayı atlayarak (ör. veri aktarımı) değiştirilmiş ilaç
+            Medication.objects.filter(id=medication.id).update(**kwargs)
+            medication.refresh_from_db()
+        if due_in is not None:
+            ScheduledReminder.objects.filter(medication=medication).update(due_at=timezone.now() + due_in)
+        return medication
+
+    def scheduled(self):
+        return dict(ScheduledReminder.objects.values_list("medication_id", "due_at"))
+
+    def test_due_reminders_are_sent_and_rescheduled(self):
+        due = self.create_medication("Zamanı gelen", due_in=timedelta(minutes=-1))
+        future = self.create_medication("İleride", due_in=timedelta(hours=1))
+        expired = self.create_medication("Kaçırılan", due_in=timedelta(minutes=-30))
+        inactive = self.create_medication("Pasif", due_in=timedelta(minutes=-1), is_active=False)
+        ended = self.create_medication(
+            "Bitmiş", due_in=timedelta(minutes=-1), end_date=timezone.localdate() - timedelta(days=1)
+        )
+        future_due_at = self.scheduled()[future.id]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(dispatch_due_reminders(), 1)
+        if connection.features.has_select_for_update_skip_locked:
+            self.assertTrue(any("SKIP LOCKED" in query["sql"] for query in queries))
+
+        self.assertEqual(list(Message.objects.values_list("related_medication_id", flat=True)), [due.id])
+        self.assertEqual(list(EmailOutbox.objects.values_list("recipients", flat=True)), [[self.user.email]])
+
+        scheduled = self.scheduled()
+        self.assertEqual(scheduled[due.id], due.get_next_reminder_time())
+        self.assertGreater(scheduled[due.id], timezone.now())
+        # Süresi geçmiş hatırlatma gönderilmeden ileri kaydırılır
+        self.assertEqual(scheduled[expired.id], expired.get_next_reminder_time())
+        self.assertEqual(scheduled[future.id], future_due_at)
+        self.assertNotIn(inactive.id, scheduled)
+        self.assertNotIn(ended.id, scheduled)
+
+        self.assertEqual(dispatch_due_reminders(), 0)
+
+    def test_schedule_next_reminder(self):
+        medication = self.create_medication("İlaç")
+        self.assertEqual(self.scheduled(), {medication.id: medication.get_next_reminder_time()})
+
+        medication.is_active = False
+        medication.save()
+        self.assertEqual(self.scheduled(), {})
+
+        medication.is_active = True
+        medication.save()
+        self.assertIn(medication.id, self.scheduled())
+
+        medication.end_date = timezone.localdate() - timedelta(days=1)
+        schedule_next_reminder(medication)
+        self.assertEqual(self.scheduled(), {})
+
+    def test_send_medication_reminder_task(self):
+        medication = self.create_medication("İlaç", due_in=timedelta(minutes=-1))
+        send_medication_reminder(medication.id)
+        self.assertEqual(Message.objects.filter(related_medication=medication).count(), 1)
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+        self.assertEqual(self.scheduled()[medication.id], medication.get_next_reminder_time())
+
+        Medication.objects.filter(id=medication.id).update(is_active=False)
+        send_medication_reminder(medication.id)
+        self.assertEqual(Message.objects.count(), 1)
+
+
+class ReminderBatchTests(TestCase):
+    """Hatırlatma mesajları ve emailleri ilaç sayısından bağımsız sayıda sorguyla yazılmalı"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f"hasta{index}", email=f"hasta{index}@example.com", password="parola")
+            for index in range(4)
+        ]
+        for index in range(12):
+            Medication.objects.create(
+                user=cls.users[index % len(cls.users)],
+                name=f"İlaç {index}",
+                dosage="1",
+                frequency="daily",
+                start_date=timezone.localdate(),
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_deliver_medication_reminders_in_bulk(self):
+        for count in (3, 12):
+            Message.objects.all().delete()
+            EmailOutbox.objects.all().delete()
+            cache.clear()
+            self.assertEqual(get_unread_count(self.users[0].id), 0)
+            medications = list(Medication.objects.select_related("user").order_by("id")[:count])
+            # Mesajlar için bir, email kuyruğu için bir toplu ekleme
+            with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(2):
+                self.assertEqual(deliver_medication_reminders(medications), count)
+
+            self.assertEqual(
+                sorted(Message.objects.values_list("related_medication_id", flat=True)), [m.id for m in medications]
+            )
+            self.assertEqual(
+                sorted(EmailOutbox.objects.values_list("recipients", flat=True)),
+                sorted([medication.user.email] for medication in medications),
+            )
+            # Önbellekteki sayaç artırılır (veritabanından yeniden sayılmaz)
+            with self.assertNumQueries(0):
+                self.assertEqual(
+                    get_unread_count(self.users[0].id), sum(m.user_id == self.users[0].id for m in medications)
+                )
+
+    def test_deliver_without_medications(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(deliver_medication_reminders([]), 0)
+
+    def test_queue_emails_in_single_insert(self):
+        medications = Medication.objects.select_related("user")
+        emails = [build_medication_reminder_email(medication, medication.user) for medication in medications]
+        with self.assertNumQueries(1):
+            queued = queue_emails(emails)
+        self.assertEqual(len(queued), 12)
+        self.assertEqual(EmailOutbox.objects.count(), 12)
+        self.assertEqual(mail.outbox, [])
+
+
+class NextReminderTimesTests(TestCase):
+    """Toplu hesaplama bitiş tarihini, haftalık sıklığı ve ileri başlangıcı dikkate almalı"""
+
+    def test_next_reminder_times(self):
+        # 2026-01-07 Çarşamba, yerel saat 10:30
+        now = timezone.make_aware(datetime(2026, 1, 7, 10, 30))
+        today = now.date()
+
+        def medication(**kwargs):
+            defaults = {"frequency": "twice_daily", "start_date": today, "reminder_times": ["21:00", "09:00"]}
+            return Medication(**{**defaults, **kwargs})
+
+        cases = [
+            (medication(), datetime(2026, 1, 7, 21, 0)),
+            (medication(reminder_times=["09:00"]), datetime(2026, 1, 8, 9, 0)),
+            (medication(reminder_times=["09:00"], end_date=today), None),
+            (medication(end_date=today - timedelta(days=1)), None),
+            (medication(is_active=False), None),
+            (medication(start_date=date(2026, 1, 10)), datetime(2026, 1, 10, 9, 0)),
+            # Haftalık: başlangıç Pazartesi ise bir sonraki Pazartesi, aynı gün ise kalan saat
+            (medication(frequency="weekly", start_date=date(2026, 1, 5)), datetime(2026, 1, 12, 9, 0)),
+            (medication(frequency="weekly", start_date=date(2025, 12, 31)), datetime(2026, 1, 7, 21, 0)),
+            (
+                medication(frequency="weekly", start_date=date(2025, 12, 31), reminder_times=["09:00"]),
+                datetime(2026, 1, 14, 9, 0),
+            ),
+            (medication(frequency="weekly", start_date=date(2026, 1, 5), end_date=date(2026, 1, 11)), None),
+        ]
+
+        medications = [case for case, _ in cases]
+        expected = [timezone.make_aware(value) if value else None for _, value in cases]
+        self.assertEqual([due_at for _, due_at in next_reminder_times(medications, now)], expected)
+        self.assertEqual([case.get_next_reminder_time(now) for case in medications], expected)
+
+
+class MalformedReminderTimesTests(TestCase):
+    """Eski kayıtlardaki geçersiz hatırlatma saatleri atlanmalı, hesaplamaları ve görevleri bozmamalı"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+
+    def setUp(self):
+        cache.clear()
+
+    def create_medications(self, *reminder_times, **kwargs):
+        # bulk_create form doğrulamasını ve save()'i atlar; eski verileri taklit eder
+        defaults = {"dosage": "1", "frequency": "daily", "start_date": timezone.localdate()}
+        return Medication.objects.bulk_create(
+            [
+                Medication(user=self.user, name=f"İlaç {i}", reminder_times=times, **{**defaults, **kwargs})
+                for i, times in enumerate(reminder_times)
+            ]
+        )
+
+    def test_parsing(self):
+        self.assertEqual(parse_reminder_time("09:30"), 570)
+        for value in ("24:00", "09:60", "9", "ab:cd", "09:00:00", "", None):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_reminder_time(value)
+
+        medication = Medication(id=1, frequency="daily", start_date=date(2026, 1, 7))
+        medication.reminder_times = ["21:00", "25:00", 9, "sabah", "09:00"]
+        with self.assertLogs("health_data.models", "WARNING") as logs:
+            self.assertEqual(medication.get_reminder_minutes(), [540, 1260])
+        self.assertEqual(len(logs.output), 3)
+
+        now = timezone.make_aware(datetime(2026, 1, 7, 10, 30))
+        medication.reminder_times = ["sabah", {"saat": 9}]
+        with self.assertLogs("health_data.models", "WARNING"):
+            self.assertEqual(list(next_reminder_times([medication], now)), [(medication, None)])
+
+    def test_tasks_skip_invalid_times(self):
+        valid, partly_valid, invalid = self.create_medications(["08:00"], ["25:00", "20:00"], ["sabah"])
+        with self.assertLogs("health_data.models", "WARNING"):
+            self.assertEqual(bootstrap_reminder_schedule(), 2)
+        scheduled = dict(ScheduledReminder.objects.values_list("medication_id", "due_at"))
+        self.assertEqual(set(scheduled), {valid.id, partly_valid.id})
+        self.assertEqual(timezone.localtime(scheduled[partly_valid.id]).time(), time(20, 0))
+
+        # save() geçersiz saatleri indeksli tabloya yazmaz
+        with self.assertLogs("health_data.models", "WARNING"):
+            partly_valid.save()
+        self.assertEqual(list(partly_valid.reminder_time_entries.values_list("minute_of_day", flat=True)), [1200])
+
+    def test_weekly_medications_are_reminded_on_their_weekday(self):
+        now = timezone.localtime()
+        today = now.date()
+        reminder_time = [f"{now.hour:02d}:{now.minute:02d}"]
+        daily = Medication.objects.create(
+            user=self.user, name="Günlük", dosage="1", frequency="daily", start_date=today, reminder_times=reminder_time
+        )
+        weekly = [
+            Medication.objects.create(
+                user=self.user,
+                name=f"Haftalık {days}",
+                dosage="1",
+                frequency="weekly",
+                start_date=today - timedelta(days=days),
+                reminder_times=reminder_time,
+            )
+            for days in (7, 3)
+        ]
+
+        reminded = set(Medication.objects.reminding_on(today).values_list("id", flat=True))
+        self.assertEqual(reminded, {daily.id, weekly[0].id})
+        self.assertEqual(check_medication_reminders(), 2)
+        self.assertEqual(set(Message.objects.values_list("related_medication_id", flat=True)), {daily.id, weekly[0].id})
+
+    def test_migration_skips_invalid_times(self):
+        migration = importlib.import_module("health_data.migrations.0005_medicationremindertime")
+        (medication,) = self.create_medications(["08:00", "8", None, "23:59", "08:00"])
+        migration.copy_reminder_times(apps, None)
+        self.assertEqual(
+            list(MedicationReminderTime.objects.filter(medication=medication).values_list("minute_of_day", flat=True)),
+            [480, 1439],
+        )
+
+
+class HealthRollupTests(TestCase):
+    """Özetler kayıt değiştikçe güncel kalmalı ve baştan hesaplanan özetlerle aynı olmalı"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+
+    def setUp(self):
+        cache.clear()
+
+    def add_exercise(self, day, duration=30, intensity=4):
+        return Exercise.objects.create(
+            user=self.user,
+            date=day,
+            exercise_type="walking",
+            duration=duration,
+            intensity=intensity,
+            calories_burned=duration * 5,
+        )
+
+    def rollups(self):
+        return {
+            (rollup.period, rollup.period_start): rollup
+            for rollup in HealthRollup.objects.filter(user=self.user).exclude(exercise_count=0, sleep_count=0)
+        }
+
+    def test_rollups_follow_writes(self):
+        # 2026-03-30 Pazartesi ve 2026-04-01 Çarşamba: aynı hafta, farklı aylar
+        monday, wednesday = date(2026, 3, 30), date(2026, 4, 1)
+        first = self.add_exercise(monday, duration=30, intensity=4)
+        self.add_exercise(wednesday, duration=60, intensity=8)
+        Sleep.objects.create(
+            user=self.user, date=wednesday, sleep_time=time(23, 0), wake_time=time(7, 0), quality=4, duration=8
+        )
+
+        rollups = self.rollups()
+        self.assertEqual(rollups[("day", monday)].exercise_duration, 30)
+        self.assertEqual(rollups[("week", monday)].exercise_duration, 90)
+        self.assertEqual(rollups[("week", monday)].avg_intensity, 6)
+        self.assertEqual(rollups[("month", date(2026, 3, 1))].exercise_duration, 30)
+        self.assertEqual(rollups[("month", date(2026, 4, 1))].exercise_duration, 60)
+        self.assertEqual(rollups[("month", date(2026, 4, 1))].avg_sleep_duration, 8)
+
+        # Tarihi değişen kayıt eski günden ve aydan düşülmeli
+        first.date = wednesday
+        first.save()
+        rollups = self.rollups()
+        self.assertNotIn(("day", monday), rollups)
+        self.assertNotIn(("month", date(2026, 3, 1)), rollups)
+        self.assertEqual(rollups[("month", date(2026, 4, 1))].exercise_duration, 90)
+
+        first.delete()
+        self.assertEqual(self.rollups()[("week", monday)].exercise_duration, 60)
+
+        # Artımlı güncellenen özetler baştan hesaplananlarla aynı olmalı
+        DailyActivity.objects.create(user=self.user, steps=5000, water_intake=2)
+        fields = ["period", "period_start", "exercise_duration", "sleep_quality_total", "steps", "water_intake"]
+        incremental = set(
+            HealthRollup.objects.exclude(exercise_count=0, sleep_count=0, activity_days=0).values_list(*fields)
+        )
+        rebuild_health_rollups([self.user.id])
+        self.assertEqual(set(HealthRollup.objects.values_list(*fields)), incremental)
+
+    def test_health_reports(self):
+        today = timezone.localdate()
+        for day in range(400):
+            self.add_exercise(today - timedelta(days=day))
+        self.client.force_login(self.user)
+
+        # Oturum, kullanıcı, okunmamış sayısı, 30 günlük özet ve eğilim satırları; geçmiş uzunluğundan bağımsız
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("health_data:health_reports"), {"period": "month"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["summary"].exercise_count, 30)
+        self.assertEqual(len(response.context["trend_data"]["labels"]), 24)
+        self.assertEqual(response.context["trend_data"]["exercise_duration"][-1], today.day * 30)
+
+
+class HealthDataImportTests(TestCase):
+    """İçe aktarma form kurallarıyla doğrulamalı, mevcut günleri güncellemeli ve özetleri tazelemeli"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_csv_import_validates_and_dedupes(self):
+        Sleep.objects.create(
+            user=self.user, date=date(2026, 1, 1), sleep_time=time(22, 0), wake_time=time(6, 0), quality=2, duration=8
+        )
+        csv_data = (
+            "date,sleep_time,wake_time,quality\n"
+            "2026-01-01,23:00,07:30,4\n"
+            "2026-01-02,23:30,06:30,9\n"  # geçersiz kalite
+            "02/01/2026,00:30,08:00,3\n"  # yerel tarih biçimi
+            "2026-01-02,01:00,08:00,5\n"  # aynı gün tekrar: sonuncusu geçerli
+        )
+        result = import_health_data(self.user, "sleep", io.StringIO(csv_data), "csv")
+
+        self.assertEqual((result["rows"], result["created"], result["updated"], result["invalid"]), (4, 1, 1, 1))
+        self.assertEqual(result["errors"][0]["row"], 2)
+        self.assertIn("quality", result["errors"][0]["errors"][0])
+
+        sleeps = {sleep.date: sleep for sleep in Sleep.objects.filter(user=self.user)}
+        self.assertEqual(len(sleeps), 2)
+        # Süre SleepForm.clean ile hesaplanır
+        self.assertEqual(sleeps[date(2026, 1, 1)].duration, Decimal("8.5"))
+        self.assertEqual(sleeps[date(2026, 1, 2)].quality, 5)
+        rollup = HealthRollup.objects.get(user=self.user, period="month", period_start=date(2026, 1, 1))
+        self.assertEqual((rollup.sleep_count, rollup.sleep_quality_total), (2, 9))
+
+        # Aynı dosyanın tekrar içe aktarılması kayıt çoğaltmamalı
+        result = import_health_data(self.user, "sleep", io.StringIO(csv_data), "csv")
+        self.assertEqual((result["created"], result["updated"]), (0, 2))
+        self.assertEqual(Sleep.objects.filter(user=self.user).count(), 2)
+
+    def test_json_array_is_read_across_chunk_boundaries(self):
+        rows = [{"date": f"2026-02-{day:02d}", "steps": day * 1000, "water_intake": 1.5} for day in range(1, 11)]
+        data = json.dumps(rows, indent=2)
+        with mock.patch("health_data.importers.JSON_READ_SIZE", 7):
+            self.assertEqual(list(iter_json_array(io.StringIO(data))), rows)
+            self.assertEqual(list(iter_json_array(io.StringIO(" [ ] "))), [])
+            with self.assertRaises(ValueError):
+                list(iter_json_array(io.StringIO(data[:-3])))
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+    def test_upload_endpoint(self):
+        # Yükleme diskteki geçici dosyadan akış halinde okunur
+        self.client.force_login(self.user)
+        rows = [
+            {"date": "2026-03-01", "exercise_type": "running", "duration": 40, "intensity": 7, "calories_burned": 400},
+            {"date": "2026-03-01", "exercise_type": "yoga", "duration": 30, "intensity": 11},
+        ]
+        upload = SimpleUploadedFile("export.json", json.dumps(rows).encode(), content_type="application/json")
+        response = self.client.post(reverse("health_data:health_data_import"), {"kind": "exercise", "file": upload})
+
+        self.assertEqual(response.status_code, 200)
+        result = response.context["result"]
+        self.assertEqual((result["created"], result["invalid"]), (1, 1))
+        self.assertEqual(Exercise.objects.get(user=self.user).exercise_type, "running")
+
+        upload = SimpleUploadedFile("export.xml", b"<xml/>")
+        response = self.client.post(reverse("health_data:health_data_import"), {"kind": "exercise", "file": upload})
+        self.assertIsNone(response.context["result"])
+        self.assertTrue(response.context["form"].errors)
+
+
+class HealthDataExportTests(TestCase):
+    """Dışa aktarma yalnızca hastanın kayıtlarını parça parça akıtmalı"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+        cls.doctor = User.objects.create_user(
+            username="doktor", email="doktor@example.com", password="parola", is_doctor=True
+        )
+        cls.other = User.objects.create_user(username="diger", email="diger@example.com", password="parola")
+        for day in range(1, 6):
+            Exercise.objects.create(
+                user=cls.user, date=date(2026, 4, day), exercise_type="walking", duration=30, intensity=4
+            )
+        Exercise.objects.create(user=cls.other, date=date(2026, 4, 1), exercise_type="yoga", duration=20, intensity=3)
+        Sleep.objects.create(
+            user=cls.user, date=date(2026, 4, 1), sleep_time=time(23, 0), wake_time=time(7, 0), quality=4, duration=8
+        )
+        Message.objects.create(sender=cls.doctor, receiver=cls.user, subject="Kontrol", content="Şekerinizi ölçün")
+
+    def test_ndjson_stream(self):
+        self.client.force_login(self.user)
+        with mock.patch("health_data.exporters.EXPORT_CHUNK_SIZE", 2):
+            response = self.client.get(reverse("health_data:health_data_export"))
+            chunks = list(response.streaming_content)
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        self.assertIn("attachment;", response["Content-Disposition"])
+        self.assertGreater(len(chunks), 1)
+        rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+        tables = [row["table"] for row in rows]
+        self.assertEqual((tables.count("exercises"), tables.count("sleep"), tables.count("messages")), (5, 1, 1))
+        self.assertTrue(all(row["user_id"] == self.user.id for row in rows if "user_id" in row))
+        self.assertEqual(rows[-1]["content"], "Şekerinizi ölçün")
+
+    def test_csv_and_invalid_parameters(self):
+        self.client.force_login(self.user)
+        url = reverse("health_data:health_data_export")
+        response = self.client.get(url, {"format": "csv", "table": "sleep"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        sleep = Sleep.objects.get(user=self.user)
+        self.assertEqual(
+            lines,
+            [",".join(EXPORT_TABLES["sleep"][2]), f"{sleep.id},{self.user.id},2026-04-01,23:00:00,07:00:00,4,8.0,"],
+        )
+
+        self.assertEqual(self.client.get(url, {"format": "csv"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"format": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"table": "users"}).status_code, 400)
+
+    async def test_asgi_stream_is_not_buffered(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("health_data:health_data_export"), {"format": "json"})
+        # Senkron üreteç ASGI altında asenkron akışa çevrilir (aksi halde Django tamamını belleğe toplar)
+        self.assertTrue(response.is_async)
+        data = json.loads(b"".join([chunk async for chunk in response.streaming_content]))
+        self.assertEqual(list(data), list(EXPORT_TABLES))
+        self.assertEqual(len(data["exercises"]), 5)
+
+    def test_command_exports_all_patients(self):
+        output = io.StringIO()
+        call_command("export_health_data", "--table", "exercises", stdout=output)
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(sorted({row["user_id"] for row in rows}), [self.user.id, self.other.id])
+
+        output = io.StringIO()
+        call_command("export_health_data", "--user", "hasta", "--format", "json", stdout=output)
+        data = json.loads(output.getvalue())
+        self.assertEqual([message["sender_id"] for message in data["messages"]], [self.doctor.id])
+
+
+class BloodTestResultValueTests(TestCase):
+    """Sonuç metinleri sayısal alanlara çevrilmeli, anormallik hesaplanmalı ve eğilim API'si hastaya özel olmalı"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="hasta", email="hasta@example.com", password="parola")
+        cls.other = User.objects.create_user(username="diger", email="diger@example.com", password="parola")
+        cls.doctor = User.objects.create_user(
+            username="doktor", email="doktor@example.com", password="parola", is_doctor=True
+        )
+        cls.hba1c = LabParameter.objects.create(name="HbA1c", unit="%", reference_range="4,0 - 5,6")
+
+    def setUp(self):
+        lab_parameters.clear()
+
+    def create_record(self, day, user=None):
+        return HospitalRecord.objects.create(
+            user=user or self.user, record_type="blood_test", date=day, title="Kan testi", description="-", results="-"
+        )
+
+    def create_result(self, day, value, user=None, **kwargs):
+        return BloodTestResult.objects.create(
+            hospital_record=self.create_record(day, user), lab_parameter=self.hba1c, value=value, **kwargs
+        )
+
+    def test_parsing(self):
+        self.assertEqual(parse_lab_value("5,8"), Decimal("5.8"))
+        self.assertIsNone(parse_lab_value("Negatif"))
+        self.assertEqual(parse_reference_range("70 – 100 mg/dL"), (Decimal("70"), Decimal("100")))
+        self.assertEqual(parse_reference_range("<5.7"), (None, Decimal("5.7")))
+        self.assertEqual(parse_reference_range("≥ 40"), (Decimal("40"), None))
+        self.assertEqual(parse_reference_range("Negatif"), (None, None))
+
+    def test_parsing_requires_the_whole_text(self):
+        self.assertEqual(parse_lab_value("-5"), Decimal("-5"))
+        self.assertEqual(parse_lab_value("7 (açlık)"), Decimal("7"))
+        # Üs, çarpan veya ikinci bir sayı içeren metinler kısmen okunmaz
+        for text in ("1.2e9", "1,2 x 10^9/L", "1.2×10⁹", "4.0-5.6", "5 6"):
+            self.assertIsNone(parse_lab_value(text), text)
+        # DecimalField(12, 4) en fazla 8 tam basamak saklayabilir
+        self.assertEqual(parse_lab_value("99999999.5"), Decimal("99999999.5"))
+        self.assertIsNone(parse_lab_value("100000000"))
+
+        self.assertEqual(parse_reference_range("-2 - 2"), (Decimal("-2"), Decimal("2")))
+        self.assertEqual(parse_reference_range("-5 – -1 mmol/L"), (Decimal("-5"), Decimal("-1")))
+        self.assertEqual(parse_reference_range("≤ -1"), (None, Decimal("-1")))
+        self.assertEqual(parse_reference_range("1e3-2e3"), (None, None))
+        self.assertEqual(parse_reference_range("0 - 1000000000"), (Decimal("0"), None))
+
+        # Okunamayan veya çok büyük değerler kaydı engellemez, elle girilen anormallik korunur
+        large = self.create_result(date(2026, 1, 10), "250000000", is_abnormal=True)
+        exponent = self.create_result(date(2026, 2, 10), "1.2e9")
+        self.assertEqual((large.value_num, large.is_abnormal), (None, True))
+        self.assertEqual((exponent.value_num, exponent.is_abnormal), (None, False))
+
+    def test_censored_values_are_not_stored_as_exact(self):
+        # "<5" ölçüm sınırının altında kalan herhangi bir değerdir; 5 olarak saklanıp karşılaştırılmaz
+        for text in ("<5", "< 0.5 mg/dL", ">200", "≥ 1000", "<=5"):
+            self.assertIsNone(parse_lab_value(text), text)
+        below = self.create_result(date(2026, 1, 10), "<5", is_abnormal=True)
+        above = self.create_result(date(2026, 2, 10), ">200")
+        self.assertEqual(
+            [(below.value_num, below.is_abnormal), (above.value_num, above.is_abnormal)], [(None, True), (None, False)]
+        )
+        self.assertFalse(BloodTestResult.objects.above(self.hba1c, 6).exists())
+
+    def test_abnormality_and_record_fields(self):
+        high = self.create_result(date(2026, 1, 10), "6.1")
+        normal = self.create_result(date(2026, 2, 10), "5.6", is_abnormal=True)
+        qualitative = self.create_result(date(2026, 3, 10), "Pozitif", reference_range="Negatif", is_abnormal=True)
+        self.assertEqual(
+            (high.value_num, high.ref_low, high.ref_high), (Decimal("6.1"), Decimal("4.0"), Decimal("5.6"))
+        )
+        # Sınırlar dahildir; sayısal olmayan sonuçta elle girilen değer korunur
+        self.assertEqual([high.is_abnormal, normal.is_abnormal, qualitative.is_abnormal], [True, False, True])
+        self.assertEqual(
+            list(BloodTestResult.objects.above(self.hba1c, 6).values_list("user", flat=True)), [self.user.id]
+        )
+
+        record = high.hospital_record
+        record.user, record.date = self.other, date(2026, 1, 11)
+        record.save()
+        high.refresh_from_db()
+        self.assertEqual((high.user_id, high.date), (self.other.id, date(2026, 1, 11)))
+
+        BloodTestResult.objects.filter(pk=normal.pk).update(value_num=None, is_abnormal=True)
+        self.assertEqual(backfill_lab_values(), 3)
+        normal.refresh_from_db()
+        self.assertEqual((normal.value_num, normal.is_abnormal), (Decimal("5.6"), False))
+
+        # Varsayılan aralık değişince bu aralığı kullanan sonuçlar işlem sonunda arka planda yeniden hesaplanır
+        self.hba1c.reference_range = "4.0-5.5"
+        with mock.patch(
+            "health_data.tasks.backfill_lab_parameter_results.delay", wraps=backfill_lab_parameter_results.delay
+        ) as delay:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.hba1c.save()
+            normal.refresh_from_db()
+            self.assertEqual(normal.ref_high, Decimal("5.6"))
+            for callback in callbacks:
+                callback()
+        delay.assert_called_once_with(self.hba1c.id)
+        normal.refresh_from_db()
+        self.assertEqual((normal.ref_high, normal.is_abnormal), (Decimal("5.5"), True))
+
+    def test_catalogue_lookups_do_not_query_per_result(self):
+        result = self.create_result(date(2026, 1, 10), "6.1")
+        result = BloodTestResult.objects.get(pk=result.pk)
+        lab_parameters.by_id(self.hba1c.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(str(result), f"{self.hba1c}: 6.1")
+            self.assertEqual(result.effective_reference_range, "4,0 - 5,6")
+
+        # Bulunamayan aramalar katalog tazelenene kadar yeniden okuma yapmaz
+        with self.assertNumQueries(2):
+            self.assertEqual(lab_parameters.by_name("Ferritin"), [])
+            self.assertRaises(LabParameter.DoesNotExist, lab_parameters.by_id, 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(lab_parameters.by_name("Ferritin"), [])
+            self.assertRaises(LabParameter.DoesNotExist, lab_parameters.by_id, 0)
+
+        # Yeni kayıt süreç içi kataloğu temizler, kayıt hemen bulunur
+        ferritin = LabParameter.objects.create(name="Ferritin", unit="ng/mL")
+        self.assertEqual(lab_parameters.by_name("ferritin"), [ferritin])
+        # Başka bir süreçteki değişiklik (sinyal bu süreçte çalışmaz) katalog süresi dolunca görülür
+        LabParameter.objects.filter(pk=ferritin.pk).update(name="Ferritin (serum)")
+        with self.assertNumQueries(0):
+            self.assertEqual(lab_parameters.by_name("Ferritin"), [ferritin])
+        with mock.patch("health_data.labs.LAB_CATALOGUE_TTL", 0), self.assertNumQueries(1):
+            self.assertEqual(lab_parameters.by_name("Ferritin"), [])
+
+    def test_trend_endpoint(self):
+        self.create_result(date(2026, 2, 1), "6.2")
+        self.create_result(date(2026, 1, 1), "5.4")
+        self.create_result(date(2026, 1, 1), "9.0", user=self.other)
+        url = reverse("health_data:lab_trend")
+
+        self.client.force_login(self.user)
+        data = self.client.get(url, {"parameter": "hba1c"}).json()
+        self.assertEqual(
+            [(point["date"], point["value"]) for point in data["points"]], [("2026-01-01", 5.4), ("2026-02-01", 6.2)]
+        )
+        self.assertEqual([point["is_abnormal"] for point in data["points"]], [False, True])
+        self.assertEqual(self.client.get(url, {"parameter": "HbA1c", "patient": self.other.id}).status_code, 403)
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+        self.client.force_login(self.doctor)
+        data = self.client.get(url, {"parameter": "HbA1c", "patient": self.other.id}).json()
+        self.assertEqual([point["value"] for point in data["points"]], [9.0])
+
+    def test_formset_interns_parameters(self):
+        record = self.create_record(date(2026, 5, 1))
+        existing = BloodTestResult.objects.create(hospital_record=record, lab_parameter=self.hba1c, value="5.0")
+        data = {
+            "blood_test_results-TOTAL_FORMS": "3",
+            "blood_test_results-INITIAL_FORMS": "1",
+            "blood_test_results-0-id": existing.id,
+            "blood_test_results-0-parameter": "HbA1c",
+            "blood_test_results-0-unit": "%",
+            "blood_test_results-0-value": "5.9",
+            "blood_test_results-1-parameter": " hba1c ",
+            "blood_test_results-1-unit": "%",
+            "blood_test_results-1-value": "5.1",
+            "blood_test_results-2-parameter": "Ferritin",
+            "blood_test_results-2-unit": "ng/mL",
+            "blood_test_results-2-value": "8",
+            "blood_test_results-2-reference_range": "13-150",
+        }
+        with self.assertNumQueries(1):
+            # Mevcut sonuçların parametreleri katalogdan okunur (katalog tek sorguda yüklenir)
+            formset = BloodTestResultFormSet(data, instance=record)
+            self.assertEqual(formset.forms[0].initial["parameter"], "HbA1c")
+        self.assertTrue(formset.is_valid(), formset.errors)
+        formset.save()
+
+        results = {result.value: result for result in record.blood_test_results.select_related("lab_parameter")}
+        self.assertEqual(results["5.1"].lab_parameter, self.hba1c)
+        self.assertEqual((results["5.9"].ref_high, results["5.9"].is_abnormal), (Decimal("5.6"), True))
+        ferritin = results["8"].lab_parameter
+        self.assertEqual((ferritin.name, ferritin.unit, results["8"].is_abnormal), ("Ferritin", "ng/mL", True))
+        self.assertEqual(LabParameter.objects.count(), 2)
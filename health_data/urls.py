@@ -6,7 +6,7 @@ app_name = "health_data"
 
 urlpatterns = [
     # Hastane Kayıtları
-    path("", views.HospitalRecordListView.as_view(), name="hospital_record_list"),
+    path("", views.hospital_record_list, name="hospital_record_list"),
     path("create/", views.HospitalRecordCreateView.as_view(), name="hospital_record_create"),
     path("<int:pk>/", views.HospitalRecordDetailView.as_view(), name="hospital_record_detail"),
     path("<int:pk>/update/", views.HospitalRecordUpdateView.as_view(), name="hospital_record_update"),
@@ -47,4 +47,11 @@ urlpatterns = [
     # Sağlık ipuçları
     path("health-tips/", views.health_tips, name="health_tips"),
     path("health-tips/<int:pk>/", views.health_tip_detail, name="health_tip_detail"),
+    # Dosyadan içe aktarma
+    path("import/", views.health_data_import, name="health_data_import"),
+    # Akış halinde dışa aktarma
+    path("export/", views.health_data_export, name="health_data_export"),
+    # Sağlık raporları
+    path("reports/", views.health_reports, name="health_reports"),
+    path("reports/lab-trend/", views.lab_trend, name="lab_trend"),
 ]
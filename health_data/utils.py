@@ -1,76 +1,200 @@
+import logging
+import time
+from datetime import timedelta
+
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
 from django.template.loader import render_to_string
+from django.utils import timezone
 from django.utils.html import strip_tags
 
+from core.metrics import add_task_emails
 
-def send_medication_reminder_email(medication, user):
-    """İlaç hatırlatma emaili gönderir."""
-    subject = f"İlaç Hatırlatması: {medication.name}"
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Email kuyruğu ayarları
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = timedelta(minutes=1)  # Her başarısız denemede iki katına çıkar
+OUTBOX_LEASE = timedelta(minutes=5)  # Alınan emaillerin diğer işçilere görünmeyeceği süre
+
+
+def build_email(subject, template_name, context, recipient):
+    """HTML template'inden email oluşturur (göndermez)."""
+    html_message = render_to_string(template_name, context)
+    plain_message = strip_tags(html_message)  # HTML olmayan versiyon
+
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=plain_message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[recipient],
+    )
+    email.attach_alternative(html_message, "text/html")
+    return email
 
-    # Email template'i için context
+
+def queue_emails(emails):
+    """Emailleri gönderim kuyruğuna ekler; gönderim arka planda yapılır."""
+    outbox = []
+    for email in emails:
+        html_body = next((content for content, mimetype in email.alternatives if mimetype == "text/html"), "")
+        outbox.append(
+            EmailOutbox(
+                subject=email.subject,
+                body=email.body,
+                html_body=html_body,
+                from_email=email.from_email,
+                recipients=list(email.to),
+            )
+        )
+    add_task_emails(len(outbox))
+    return EmailOutbox.objects.bulk_create(outbox)
+
+
+def build_medication_reminder_email(medication, user):
+    """İlaç hatırlatma emailini oluşturur (göndermez)."""
     context = {
         "user": user,
         "medication": medication,
         "reminder_times": medication.reminder_times,
     }
+    return build_email(
+        f"İlaç Hatırlatması: {medication.name}", "health_data/email/medication_reminder.html", context, user.email
+    )
 
-    # HTML template'i render et
-    html_message = render_to_string("health_data/email/medication_reminder.html", context)
-    plain_message = strip_tags(html_message)  # HTML olmayan versiyon
 
-    # Email gönder
-    send_mail(
-        subject=subject,
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        html_message=html_message,
-        fail_silently=False,
-    )
+def send_medication_reminder_email(medication, user):
+    """İlaç hatırlatma emailini gönderim kuyruğuna ekler."""
+    queue_emails([build_medication_reminder_email(medication, user)])
 
 
 def send_appointment_reminder_email(appointment):
-    """Randevu hatırlatma emaili gönderir."""
-    subject = f"Randevu Hatırlatması: {appointment.doctor.get_full_name()}"
-
+    """Randevu hatırlatma emailini gönderim kuyruğuna ekler."""
     context = {
         "appointment": appointment,
         "patient": appointment.patient,
         "doctor": appointment.doctor,
     }
-
-    html_message = render_to_string("health_data/email/appointment_reminder.html", context)
-    plain_message = strip_tags(html_message)
-
-    send_mail(
-        subject=subject,
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[appointment.patient.email],
-        html_message=html_message,
-        fail_silently=False,
+    email = build_email(
+        f"Randevu Hatırlatması: {appointment.doctor.get_full_name()}",
+        "health_data/email/appointment_reminder.html",
+        context,
+        appointment.patient.email,
     )
+    queue_emails([email])
 
 
 def send_message_notification_email(message):
-    """Yeni mesaj bildirimi emaili gönderir."""
-    subject = f"Yeni Mesaj: {message.subject}"
-
+    """Yeni mesaj bildirimi emailini gönderim kuyruğuna ekler."""
     context = {
         "message": message,
         "receiver": message.receiver,
         "sender": message.sender,
     }
+    email = build_email(
+        f"Yeni Mesaj: {message.subject}",
+        "health_data/email/message_notification.html",
+        context,
+        message.receiver.email,
+    )
+    queue_emails([email])
 
-    html_message = render_to_string("health_data/email/message_notification.html", context)
-    plain_message = strip_tags(html_message)
 
-    send_mail(
-        subject=subject,
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[message.receiver.email],
-        html_message=html_message,
-        fail_silently=False,
+def send_message_digest_email(receiver, messages):
+    """Kısa sürede gelen birden fazla mesaj için tek bir özet emailini gönderim kuyruğuna ekler."""
+    context = {
+        "receiver": receiver,
+        "messages": messages,
+    }
+    email = build_email(
+        f"{len(messages)} Yeni Mesajınız Var",
+        "health_data/email/message_digest.html",
+        context,
+        receiver.email,
+    )
+    queue_emails([email])
+
+
+def _claim_outbox_batch(batch_size):
+    """Gönderilecek bir grup emaili kilitleyip diğer işçilerden gizler."""
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if batch:
+            EmailOutbox.objects.filter(id__in=[item.id for item in batch]).update(next_attempt_at=now + OUTBOX_LEASE)
+    return batch
+
+
+def _mark_failed(item, error, now):
+    item.attempts += 1
+    item.last_error = error
+    if item.attempts >= OUTBOX_MAX_ATTEMPTS:
+        item.status = "failed"
+    else:
+        item.next_attempt_at = now + OUTBOX_RETRY_DELAY * 2 ** (item.attempts - 1)
+
+
+def send_outbox_batch(batch_size=OUTBOX_BATCH_SIZE):
+    """Kuyruktaki bir grup emaili tek SMTP bağlantısı üzerinden gönderir ve grup metriklerini döndürür."""
+    started = time.monotonic()
+    batch = _claim_outbox_batch(batch_size)
+    metrics = {"claimed": len(batch), "sent": 0, "retried": 0, "failed": 0}
+    if not batch:
+        metrics["duration_ms"] = 0
+        return metrics
+
+    now = timezone.now()
+    processed = set()
+    try:
+        with get_connection() as connection:
+            for item in batch:
+                email = EmailMultiAlternatives(
+                    subject=item.subject,
+                    body=item.body,
+                    from_email=item.from_email,
+                    to=item.recipients,
+                    connection=connection,
+                )
+                if item.html_body:
+                    email.attach_alternative(item.html_body, "text/html")
+                try:
+                    email.send(fail_silently=False)
+                except Exception as e:
+                    _mark_failed(item, str(e), now)
+                else:
+                    item.status = "sent"
+                    item.attempts += 1
+                    item.sent_at = timezone.now()
+                processed.add(item.id)
+    except Exception as e:
+        # SMTP bağlantısı kurulamadı, gönderilemeyen emailler daha sonra tekrar denenecek
+        logger.error(f"SMTP bağlantısı kurulamadı: {str(e)}")
+        for item in batch:
+            if item.id not in processed:
+                _mark_failed(item, str(e), now)
+
+    EmailOutbox.objects.bulk_update(batch, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"])
+
+    for item in batch:
+        if item.status == "sent":
+            metrics["sent"] += 1
+        elif item.status == "failed":
+            metrics["failed"] += 1
+        else:
+            metrics["retried"] += 1
+    metrics["duration_ms"] = round((time.monotonic() - started) * 1000)
+
+    logger.info(
+        "Email kuyruğu grubu işlendi: "
+        f"alınan={metrics['claimed']} gönderilen={metrics['sent']} tekrar_denenecek={metrics['retried']} "
+        f"başarısız={metrics['failed']} süre_ms={metrics['duration_ms']}"
     )
+    return metrics
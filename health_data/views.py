@@ -1,30 +1,46 @@
 # Create your views here.
 
-from datetime import datetime, timedelta
+import asyncio
+import io
+from datetime import timedelta
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.core.exceptions import PermissionDenied
-from django.db.models import Avg, Sum
-from django.http import HttpResponseForbidden
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q
+from django.http import HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse_lazy
-from django.views.generic import CreateView, DeleteView, DetailView, ListView, UpdateView
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.views.generic import CreateView, DeleteView, DetailView, UpdateView
 
+from core.async_views import aiterate, arender
+from core.models import Notification
+from core.pagination import akeyset_paginate
+
+from .counters import aget_unread_count
+from .exporters import EXPORT_FORMATS, EXPORT_TABLES, stream_export
 from .forms import (
     AppointmentForm,
     DailyActivityForm,
     ExerciseForm,
+    HealthDataImportForm,
     HospitalRecordForm,
     MedicationForm,
     MessageForm,
     SleepForm,
 )
+from .importers import detect_format, import_health_data
+from .labs import lab_parameters
 from .models import (
     Appointment,
+    BloodTestResult,
     DailyActivity,
     Exercise,
+    HealthRollup,
     HealthTip,
     HospitalRecord,
     Medication,
@@ -32,7 +48,11 @@ from .models import (
     MotivationVideo,
     Sleep,
 )
-from .utils import send_message_notification_email
+from .rollups import recent_period_starts, sum_rollups
+from .tasks import schedule_message_notification
+
+# Rapor grafiğinde gösterilen dönem sayısı
+REPORT_PERIODS = {"day": 30, "week": 26, "month": 24}
 
 
 def is_doctor(user):
@@ -41,10 +61,11 @@ def is_doctor(user):
 
 # Medication Views
 @login_required
-def medication_list(request):
+async def medication_list(request):
     """İlaç listesi görünümü"""
-    medications = Medication.objects.filter(user=request.user).order_by("-start_date")
-    return render(request, "health_data/medication_list.html", {"medications": medications})
+    user = await request.auser()
+    medications = await akeyset_paginate(request, Medication.objects.filter(user=user), ("-start_date", "-id"))
+    return await arender(request, "health_data/medication_list.html", {"medications": medications})
 
 
 @login_required
@@ -98,10 +119,11 @@ def medication_delete(request, pk):
 
 # Exercise Views
 @login_required
-def exercise_list(request):
+async def exercise_list(request):
     """Egzersiz listesi görünümü"""
-    exercises = Exercise.objects.filter(user=request.user).order_by("-date")
-    return render(request, "health_data/exercise_list.html", {"exercises": exercises})
+    user = await request.auser()
+    exercises = await akeyset_paginate(request, Exercise.objects.filter(user=user), ("-date", "-id"))
+    return await arender(request, "health_data/exercise_list.html", {"exercises": exercises})
 
 
 @login_required
@@ -155,10 +177,11 @@ def exercise_delete(request, pk):
 
 # Sleep Views
 @login_required
-def sleep_list(request):
+async def sleep_list(request):
     """Uyku kayıtları listesi"""
-    sleeps = Sleep.objects.filter(user=request.user).order_by("-sleep_time")
-    return render(request, "health_data/sleep_list.html", {"sleeps": sleeps})
+    user = await request.auser()
+    sleeps = await akeyset_paginate(request, Sleep.objects.filter(user=user), ("-date", "-sleep_time", "-id"))
+    return await arender(request, "health_data/sleep_list.html", {"sleeps": sleeps})
 
 
 @login_required
@@ -221,6 +244,7 @@ def update_daily_activity(request):
             # Use update_or_create to handle the unique constraint
             daily_activity, created = DailyActivity.objects.update_or_create(
                 user=request.user,
+                date=timezone.localdate(),
                 defaults={
                     "steps": form.cleaned_data["steps"],
                     "water_intake": form.cleaned_data["water_intake"],
@@ -231,18 +255,22 @@ def update_daily_activity(request):
             return redirect("core:dashboard")
     else:
         # Get existing record or initialize empty form
-        daily_activity = DailyActivity.objects.filter(user=request.user).first()
+        daily_activity = DailyActivity.objects.filter(user=request.user, date=timezone.localdate()).first()
         form = DailyActivityForm(instance=daily_activity if daily_activity else None)
 
     return render(request, "health_data/daily_activity_form.html", {"form": form})
 
 
 @login_required
-def appointment_list(request):
+async def appointment_list(request):
     """Randevu listesi"""
-    appointments = Appointment.objects.filter(patient=request.user).order_by("-date", "-time")
+    user = await request.auser()
+    # Şablon her randevunun doktorunu gösterir
+    appointments = await akeyset_paginate(
+        request, Appointment.objects.filter(patient=user).select_related("doctor"), ("-date", "-time", "-id")
+    )
 
-    return render(request, "health_data/appointment_list.html", {"appointments": appointments})
+    return await arender(request, "health_data/appointment_list.html", {"appointments": appointments})
 
 
 @login_required
@@ -314,61 +342,173 @@ def health_tip_detail(request, pk):
 
 
 @login_required
-def health_reports(request):
-    """Sağlık raporları görünümü"""
-    # Son 30 günlük veriler
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=30)
-
-    # Egzersiz istatistikleri
-    exercise_stats = Exercise.objects.filter(user=request.user, date__range=[start_date, end_date]).aggregate(
-        total_duration=Sum("duration"),
-        avg_intensity=Avg("intensity"),
-        total_calories=Sum("calories_burned"),
-    )
+def health_data_import(request):
+    """Giyilebilir cihaz dışa aktarımlarını (CSV/JSON) dosyadan içe aktarma"""
+    result = None
+    if request.method == "POST":
+        form = HealthDataImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+            file_format = detect_format(upload.name)
+            if file_format is None:
+                form.add_error("file", "Desteklenmeyen dosya türü (csv, json, ndjson).")
+            else:
+                # Büyük yüklemeler diskte geçici dosyada tutulur; satırlar buradan akış halinde okunur
+                stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+                result = import_health_data(request.user, form.cleaned_data["kind"], stream, file_format)
+                messages.success(
+                    request,
+                    f"{result['created']} kayıt eklendi, {result['updated']} kayıt güncellendi, "
+                    f"{result['invalid']} kayıt geçersiz.",
+                )
+    else:
+        form = HealthDataImportForm()
+    return render(request, "health_data/data_import.html", {"form": form, "result": result})
 
-    # Uyku istatistikleri
-    sleep_stats = Sleep.objects.filter(user=request.user, start_time__range=[start_date, end_date]).aggregate(
-        avg_quality=Avg("quality"), total_duration=Sum("duration")
-    )
+
+@login_required
+def health_data_export(request):
+    """Hastanın tüm sağlık kayıtlarını NDJSON/JSON/CSV olarak akış halinde indirme"""
+    file_format = request.GET.get("format", "ndjson")
+    table = request.GET.get("table")
+    if file_format not in EXPORT_FORMATS or (table is not None and table not in EXPORT_TABLES):
+        return HttpResponseBadRequest("Geçersiz biçim veya tablo")
+    if file_format == "csv" and table is None:
+        return HttpResponseBadRequest("CSV dışa aktarımı için tablo seçilmeli")
+
+    tables = [table] if table else list(EXPORT_TABLES)
+    content = stream_export([request.user.id], file_format, tables)
+    if isinstance(request, ASGIRequest):
+        content = aiterate(content)
+
+    content_type, extension = EXPORT_FORMATS[file_format]
+    filename = f"saglik-verileri-{table or 'tum'}-{timezone.localdate():%Y%m%d}.{extension}"
+    response = StreamingHttpResponse(content, content_type=f"{content_type}; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+def health_reports(request):
+    """Sağlık raporları görünümü (ham kayıtlar yerine özet tablolarından okunur)"""
+    period = request.GET.get("period", "week")
+    if period not in REPORT_PERIODS:
+        period = "week"
+    today = timezone.localdate()
+    rollups = HealthRollup.objects.filter(user=request.user)
+
+    # Son 30 günün özeti en fazla 30 günlük satırdan hesaplanır
+    start_date = today - timedelta(days=29)
+    summary = sum_rollups(rollups.filter(period="day", period_start__range=(start_date, today)))
+
+    # Eğilim grafiği: seçilen dönem türünde son dönemler (eksik dönemler sıfır olarak gösterilir)
+    starts = recent_period_starts(period, today, REPORT_PERIODS[period])
+    by_start = {rollup.period_start: rollup for rollup in rollups.filter(period=period, period_start__gte=starts[0])}
+    trend = [by_start.get(start) or HealthRollup(period=period, period_start=start) for start in starts]
 
     context = {
-        "exercise_stats": exercise_stats,
-        "sleep_stats": sleep_stats,
+        "summary": summary,
         "start_date": start_date,
-        "end_date": end_date,
+        "end_date": today,
+        "period": period,
+        "period_choices": HealthRollup.PERIOD_CHOICES,
+        "export_tables": [(table, model._meta.verbose_name_plural) for table, (model, *_) in EXPORT_TABLES.items()],
+        "trend_data": {
+            "labels": [start.strftime("%m.%Y" if period == "month" else "%d.%m.%Y") for start in starts],
+            "exercise_duration": [rollup.exercise_duration for rollup in trend],
+            "exercise_calories": [rollup.exercise_calories for rollup in trend],
+            "sleep_duration": [round(rollup.avg_sleep_duration, 1) for rollup in trend],
+            "sleep_quality": [round(rollup.avg_sleep_quality, 1) for rollup in trend],
+            "steps": [round(rollup.avg_steps) for rollup in trend],
+        },
     }
     return render(request, "health_data/health_reports.html", context)
 
 
+def _as_float(value):
+    return None if value is None else float(value)
+
+
 @login_required
-def message_list(request):
-    """Mesaj listesi görünümü"""
-    received_messages = Message.objects.filter(receiver=request.user).order_by("-created_at")
-    sent_messages = Message.objects.filter(sender=request.user).order_by("-created_at")
+def lab_trend(request):
+    """Bir kan testi parametresinin zaman içindeki değerleri (JSON); doktorlar patient ile hasta seçebilir"""
+    parameter = request.GET.get("parameter", "").strip()
+    if not parameter:
+        return HttpResponseBadRequest("parameter gerekli")
+    user_id = request.user.id
+    if request.GET.get("patient"):
+        if not is_doctor(request.user):
+            return HttpResponseForbidden()
+        try:
+            user_id = int(request.GET["patient"])
+        except ValueError:
+            return HttpResponseBadRequest("Geçersiz hasta")
+
+    # Ad katalogda süreç içi önbellekten çözülür; sonuçlar tek bir indeks sorgusuyla okunur
+    catalogue = {lab_parameter.id: lab_parameter for lab_parameter in lab_parameters.by_name(parameter)}
+    results = BloodTestResult.objects.trend(user_id, list(catalogue)).values_list(
+        "date", "value", "value_num", "lab_parameter_id", "ref_low", "ref_high", "is_abnormal"
+    )
+    points = [
+        {
+            "date": day,
+            "value": _as_float(value_num),
+            "value_text": value,
+            "unit": catalogue[lab_parameter_id].unit,
+            "ref_low": _as_float(ref_low),
+            "ref_high": _as_float(ref_high),
+            "is_abnormal": is_abnormal,
+        }
+        for day, value, value_num, lab_parameter_id, ref_low, ref_high, is_abnormal in (results if catalogue else [])
+    ]
+    return JsonResponse({"parameter": parameter, "points": points})
 
-    # Okunmamış mesaj sayısı
-    unread_count = received_messages.filter(is_read=False).count()
+
+@login_required
+async def message_list(request):
+    """Mesaj listesi görünümü"""
+    user = await request.auser()
+    # Gelen/giden sayfaları ve okunmamış mesaj sayısı birbirinden bağımsız sorgulanır
+    received_messages, sent_messages, unread_count = await asyncio.gather(
+        akeyset_paginate(
+            request,
+            Message.objects.filter(receiver=user).select_related("sender"),
+            ("-created_at", "-id"),
+            cursor_param="received",
+        ),
+        akeyset_paginate(
+            request,
+            Message.objects.filter(sender=user).select_related("receiver"),
+            ("-created_at", "-id"),
+            cursor_param="sent",
+        ),
+        aget_unread_count(user.id),
+    )
 
     context = {
         "received_messages": received_messages,
         "sent_messages": sent_messages,
         "unread_count": unread_count,
     }
-    return render(request, "health_data/message_list.html", context)
+    return await arender(request, "health_data/message_list.html", context)
 
 
 @login_required
 def message_detail(request, message_id):
     """Mesaj detay görünümü"""
-    message = get_object_or_404(Message, id=message_id)
+    # Yalnızca mesajın göndereni veya alıcısı görebilir; diğer kullanıcılar için mesaj yokmuş gibi davranılır
+    message = get_object_or_404(
+        Message.objects.select_related("sender", "receiver").filter(Q(sender=request.user) | Q(receiver=request.user)),
+        id=message_id,
+    )
 
     # Mesajı okundu olarak işaretle
-    if message.receiver == request.user and not message.is_read:
+    if message.receiver_id == request.user.id and not message.is_read:
         message.mark_as_read()
 
-    # Yanıtları getir
-    replies = Message.objects.filter(parent_message=message).order_by("created_at")
+    # Konuşmanın tamamını (önceki mesajlar ve iç içe yanıtlar) gönderenleriyle birlikte tek indeksli sorguda getir
+    thread = Message.objects.conversation(message).select_related("sender", "receiver").order_by("created_at", "id")
+    replies = [item for item in thread if item.id != message.id]
 
     context = {
         "message": message,
@@ -400,16 +540,21 @@ def send_message(request, reply_to=None):
         if form.is_valid():
             message = form.save(commit=False)
             message.sender = request.user
+            message.email_pending = True
             if parent_message:
                 message.parent_message = parent_message
-            message.save()
 
-            # Email bildirimi gönder
-            try:
-                send_message_notification_email(message)
-            except Exception:
-                # Email gönderimi başarısız olsa bile mesaj kaydedildi
-                messages.warning(request, "Mesaj gönderildi fakat email bildirimi gönderilemedi.")
+            with transaction.atomic():
+                message.save()
+                Notification.objects.create(
+                    user=message.receiver,
+                    notification_type="message",
+                    title=f"Yeni Mesaj: {message.subject}",
+                    message=f"{request.user.get_full_name() or request.user.email} size yeni bir mesaj gönderdi.",
+                    link=reverse("health_data:message_detail", args=[message.id]),
+                )
+                # Email bildirimi işlem tamamlandıktan sonra arka planda gönderilir
+                transaction.on_commit(lambda: schedule_message_notification(message))
 
             messages.success(request, "Mesajınız başarıyla gönderildi.")
             return redirect("health_data:message_list")
@@ -441,32 +586,45 @@ def message_delete(request, message_id):
     return render(request, "health_data/message_confirm_delete.html", {"message": message})
 
 
-class HospitalRecordListView(LoginRequiredMixin, ListView):
-    model = HospitalRecord
-    template_name = "health_data/hospital_record_list.html"
-    context_object_name = "records"
+# Kayıt tipi -> şablondaki grup adı
+HOSPITAL_RECORD_GROUPS = {
+    "intervention": "interventions",
+    "xray": "xrays",
+    "blood_test": "blood_tests",
+    "lab_test": "lab_tests",
+    "imaging": "imaging",
+    "treatment": "treatments",
+}
 
-    def get_queryset(self):
-        if self.request.user.is_doctor:
-            # Doktorlar tüm kayıtları görebilir
-            return HospitalRecord.objects.all()
-        else:
-            # Normal kullanıcılar sadece kendi kayıtlarını görebilir
-            return HospitalRecord.objects.filter(user=self.request.user)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        records = context["records"]
+async def _acollect(queryset):
+    return [row async for row in queryset]
+
 
-        # Kayıtları türlerine göre grupla
-        context["interventions"] = records.filter(record_type="intervention")
-        context["xrays"] = records.filter(record_type="xray")
-        context["blood_tests"] = records.filter(record_type="blood_test")
-        context["lab_tests"] = records.filter(record_type="lab_test")
-        context["imaging"] = records.filter(record_type="imaging")
-        context["treatments"] = records.filter(record_type="treatment")
+@login_required
+async def hospital_record_list(request):
+    """Hastane kayıtları listesi; doktorlar tüm kayıtları, hastalar yalnızca kendi kayıtlarını görür"""
+    user = await request.auser()
+    records = HospitalRecord.objects.all() if user.is_doctor else HospitalRecord.objects.filter(user=user)
+
+    # Tür başına toplam kayıt sayıları tek sorguda
+    type_counts = dict(await _acollect(records.order_by().values_list("record_type").annotate(count=Count("id"))))
+    page = await akeyset_paginate(request, records, ("-date", "-created_at", "-id"))
 
-        return context
+    context = {
+        "records": page,
+        "record_type_summary": [
+            (label, type_counts[record_type])
+            for record_type, label in HospitalRecord.RECORD_TYPES
+            if type_counts.get(record_type)
+        ],
+    }
+    # Sayfadaki kayıtları ek sorgu yapmadan türlerine göre grupla
+    groups = {group: [] for group in HOSPITAL_RECORD_GROUPS.values()}
+    for record in page:
+        groups[HOSPITAL_RECORD_GROUPS[record.record_type]].append(record)
+    context.update(groups)
+    return await arender(request, "health_data/hospital_record_list.html", context)
 
 
 class HospitalRecordDetailView(LoginRequiredMixin, DetailView):
@@ -475,9 +633,13 @@ class HospitalRecordDetailView(LoginRequiredMixin, DetailView):
     context_object_name = "record"
 
     def get_queryset(self):
+        records = HospitalRecord.objects.prefetch_related(
+            Prefetch("blood_test_results", queryset=BloodTestResult.objects.select_related("lab_parameter")),
+            "lab_test_results",
+        )
         if self.request.user.is_doctor:
-            return HospitalRecord.objects.all()
-        return HospitalRecord.objects.filter(user=self.request.user)
+            return records
+        return records.filter(user=self.request.user)
 
 
 class HospitalRecordCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
@@ -7,7 +7,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chronicle.settings")
+    # Testler kendi ayar modülüyle çalışır (yalnızca "test" komutu; DJANGO_SETTINGS_MODULE önceliklidir)
+    settings_module = "chronicle.test_settings" if sys.argv[1:2] == ["test"] else "chronicle.settings"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc: